@@ -0,0 +1,105 @@
+"""Уведомления о сбоях без повторов в каждом цикле.
+
+Текст ошибки часто меняется от цикла к циклу (в ConnectionError, например,
+попадают параметры запроса), поэтому сравнение с прошлым текстом не
+спасает от повторов. Сбой опознаётся по отпечатку: классу исключения и
+месту, где оно выброшено. О первом сбое с новым отпечатком сообщается
+сразу, повторы копятся и уходят сводкой не чаще раза в
+ERROR_DIGEST_INTERVAL секунд, а после первого успешного цикла приходит
+одно сообщение о восстановлении.
+"""
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+ERROR_DIGEST_INTERVAL = float(os.getenv('ERROR_DIGEST_INTERVAL', 3600))
+
+
+def fingerprint(error) -> Tuple[str, str]:
+    """Класс исключения и функция, в которой оно выброшено."""
+    origin = '?'
+    traceback = error.__traceback__
+    while traceback is not None:
+        code = traceback.tb_frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        origin = f'{module}.{code.co_name}'
+        traceback = traceback.tb_next
+    return type(error).__name__, origin
+
+
+class Incident:
+    """Повторы одного сбоя с момента первого уведомления."""
+
+    __slots__ = ('reported_at', 'total', 'unreported')
+
+    def __init__(self, now):
+        self.reported_at = now
+        self.total = 1
+        self.unreported = 0
+
+
+class ErrorReporter:
+    """Решает, какое сообщение о сбое отправить и отправлять ли вообще."""
+
+    def __init__(self, interval=ERROR_DIGEST_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self.incidents: Dict[Tuple[str, str], Incident] = {}
+
+    def failure(self, error) -> Optional[str]:
+        """Текст сообщения о сбое error; None - сообщать не нужно."""
+        return self.report(fingerprint(error), error)
+
+    def report(self, key, error) -> Optional[str]:
+        """То же, что failure(), по готовому отпечатку key.
+
+        Нужен, когда исключение выброшено в другом процессе и до
+        отправителя доходят только его отпечаток и текст error.
+        """
+        key = tuple(key)
+        now = self._clock()
+        incident = self.incidents.get(key)
+        if incident is None:
+            self.incidents[key] = Incident(now)
+            return f'Сбой в работе программы: {error}'
+        incident.total += 1
+        incident.unreported += 1
+        if now - incident.reported_at < self.interval:
+            return None
+        count, incident.unreported = incident.unreported, 0
+        incident.reported_at = now
+        return (
+            f'Сбой продолжается: {count} повторов {key[0]} в {key[1]} '
+            f'за последние {round(self.interval / 60)} мин. '
+            f'Последний: {error}'
+        )
+
+    def dump(self) -> List[list]:
+        """Сбои для снимка: [класс, место, всего, не сообщено, прошло с].
+
+        Вместо времени последнего сообщения хранится, сколько секунд с
+        него прошло: monotonic() в новом процессе отсчитывается заново.
+        """
+        now = self._clock()
+        return [
+            [*key, incident.total, incident.unreported,
+             now - incident.reported_at]
+            for key, incident in self.incidents.items()
+        ]
+
+    def load(self, saved):
+        """Восстанавливает сбои из dump(): повторы не сообщаются заново."""
+        now = self._clock()
+        for kind, origin, total, unreported, elapsed in saved:
+            incident = Incident(now - elapsed)
+            incident.total = total
+            incident.unreported = unreported
+            self.incidents[kind, origin] = incident
+
+    def success(self) -> Optional[str]:
+        """Сообщение о восстановлении после сбоев; None, если сбоев не было."""
+        if not self.incidents:
+            return None
+        total = sum(incident.total for incident in self.incidents.values())
+        self.incidents.clear()
+        return f'Работа восстановлена. Сбоев за время перебоя: {total}.'
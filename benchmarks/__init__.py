@@ -0,0 +1,4 @@
+"""Нагрузочные проверки и бенчмарки бота.
+
+Запускаются из корня репозитория: python -m benchmarks.<модуль>.
+"""
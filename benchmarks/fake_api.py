@@ -0,0 +1,218 @@
+"""Локальная замена API Практикум.Домашки для нагрузочных проверок.
+
+Эмулирует эндпоинт homework_statuses: каждому токену соответствует
+студент с заданным числом работ, статусы которых время от времени
+меняются; from_date отбирает работы, обновлённые не раньше этого
+момента. Задержку ответа и долю ошибок 500 можно настроить.
+
+Запуск отдельным процессом:
+    python -m benchmarks.fake_api --latency 50 --error-rate 0.01
+Первая строка вывода - адрес эндпоинта.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PATH = '/api/user_api/homework_statuses/'
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+class SimulatedStudent:
+    """Работы одного студента со случайно меняющимися статусами."""
+
+    def __init__(self, homeworks_qty, rng):
+        now = int(time.time())
+        self._rng = rng
+        self._lock = threading.Lock()
+        self.homeworks = [
+            {
+                'id': number,
+                'homework_name': f'student__hw{number:02}.zip',
+                'lesson_name': f'Спринт {number}',
+                'reviewer_comment': '',
+                'status': rng.choice(STATUSES),
+                'updated': now - rng.randint(0, 30 * 24 * 60 * 60),
+            }
+            for number in range(homeworks_qty)
+        ]
+
+    def change_random_homework(self, now):
+        """Меняет статус случайной работы."""
+        if not self.homeworks:
+            return
+        with self._lock:
+            homework = self._rng.choice(self.homeworks)
+            homework['status'] = self._rng.choice(STATUSES)
+            homework['updated'] = now
+
+    def statuses_since(self, from_date) -> list:
+        """Работы, обновлённые не раньше from_date, - как в API."""
+        with self._lock:
+            changed = [
+                homework for homework in self.homeworks
+                if homework['updated'] >= from_date
+            ]
+        changed.sort(key=lambda homework: homework['updated'], reverse=True)
+        return [
+            dict(
+                {
+                    key: value for key, value in homework.items()
+                    if key != 'updated'
+                },
+                date_updated=datetime.fromtimestamp(
+                    homework['updated'], timezone.utc
+                ).strftime('%Y-%m-%dT%H:%M:%SZ')
+            )
+            for homework in changed
+        ]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Сотни одновременных соединений не должны упираться в backlog
+    request_queue_size = 1024
+
+
+class FakePracticumAPI:
+    """HTTP-сервер, отвечающий как эндпоинт homework_statuses."""
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0,
+                 homeworks_per_student=10, change_rate=0.05, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.homeworks_per_student = homeworks_per_student
+        self.change_rate = change_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._students = {}
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}{API_PATH}'
+
+    def student(self, token) -> SimulatedStudent:
+        """Студент, соответствующий токену; создаётся при первом запросе."""
+        with self._lock:
+            student = self._students.get(token)
+            if student is None:
+                student = self._students[token] = SimulatedStudent(
+                    self.homeworks_per_student,
+                    random.Random(self._rng.random())
+                )
+            return student
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='fake-api', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Обслуживает запросы в текущем потоке."""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Останавливает сервер."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path, headers):
+        """Код ответа и тело для запроса GET path."""
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.error_rate
+            changed = self._rng.random() < self.change_rate
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlsplit(path)
+        if url.path != API_PATH:
+            return 404, {'code': 'not_found'}
+        authorization = headers.get('Authorization', '')
+        if not authorization.startswith('OAuth ') or not authorization[6:]:
+            return 401, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+                'source': '__response__'
+            }
+        if failed:
+            return 500, {'code': 'internal_error'}
+        try:
+            from_date = int(parse_qs(url.query)['from_date'][0])
+        except (KeyError, ValueError):
+            return 400, {
+                'code': 'UnknownError',
+                'error': {'error': 'Wrong from_date format'}
+            }
+        now = int(time.time())
+        student = self.student(authorization[6:])
+        if changed:
+            student.change_random_homework(now)
+        return 200, {
+            'homeworks': student.statuses_since(from_date),
+            'current_date': now
+        }
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, data = api.respond(self.path, self.headers)
+                body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header(
+                    'Content-Type', 'application/json; charset=utf-8'
+                )
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    """Запускает эмулятор API из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='задержка ответа, мс')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='доля ответов 500')
+    parser.add_argument('--homeworks', type=int, default=10,
+                        help='работ у каждого студента')
+    parser.add_argument('--change-rate', type=float, default=0.05,
+                        help='вероятность смены статуса при запросе')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    api = FakePracticumAPI(
+        port=args.port, latency=args.latency / 1000,
+        error_rate=args.error_rate, homeworks_per_student=args.homeworks,
+        change_rate=args.change_rate, seed=args.seed
+    )
+    print(api.url, flush=True)
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+
+
+if __name__ == '__main__':
+    main()
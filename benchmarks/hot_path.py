@@ -0,0 +1,248 @@
+"""Микробенчмарки горячего пути разбора ответа с порогом регрессии.
+
+    python -m benchmarks.hot_path --save benchmarks/baseline.json
+    python -m benchmarks.hot_path --compare benchmarks/baseline.json
+
+Для ответов API с 1..100 000 работ замеряет пропускную способность (работ
+в секунду):
+    check_response  - проверка ответа по схеме;
+    parse_status    - текст сообщения по работе-словарю;
+    render_verdicts - текст сообщения по проверенной записи Homework;
+    pipeline        - запрос к заглушке транспорта, проверка ответа и
+                      сообщения по всем изменившимся работам.
+
+Абсолютные числа зависят от машины, поэтому в том же процессе замеряется
+калибровочный цикл на чистом Python, и сохраняется и сравнивается
+пропускная способность в его единицах. --save записывает результаты в
+JSON. --compare сравнивает с сохранёнными результатами и завершается с
+кодом 1, если пропускная способность хотя бы одного замера упала больше
+чем на --threshold. Если baseline снят на другой версии Python или другой
+архитектуре, --compare отказывается сравнивать (код 2), пока не указан
+--ignore-platform.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+
+import homework
+import state
+from benchmarks.validate import RawResponse, make_body
+
+SIZES = (1, 10, 100, 1000, 10000, 100000)
+# Допустимое падение пропускной способности относительно baseline
+THRESHOLD = 0.2
+# Каждый замер длится не меньше стольких обработанных работ
+MIN_ITEMS_PER_SAMPLE = 10000
+# Итераций калибровочного цикла в одном замере
+CALIBRATION_LOOPS = 20000
+
+
+class StubResponse(RawResponse):
+    """Успешный ответ API с готовым телом."""
+
+    status_code = 200
+    reason = 'OK'
+    headers = {}
+
+
+class StubTransport:
+    """Заглушка requests: на любой GET возвращает одно и то же тело."""
+
+    def __init__(self, body):
+        self.response = StubResponse(body)
+
+    def get(self, **kwargs):
+        return self.response
+
+
+def pipeline(transport):
+    """Запрос, проверка ответа и сообщения по всем работам."""
+    response = homework.fetch_homework_statuses(
+        'token', 1, session=transport
+    )
+    homeworks = homework.check_response(response)
+    messages = []
+    homework.send_new_statuses(
+        state.StatusIndex(), homeworks,
+        lambda text, homework_: messages.append(text)
+    )
+    return messages
+
+
+def cases(size) -> dict:
+    """Замеряемые функции для ответа с size работами."""
+    body = make_body(size)
+    data = json.loads(body)
+    records = homework.check_response(data)
+    transport = StubTransport(body)
+    return {
+        'check_response': lambda: homework.check_response(data),
+        'parse_status': lambda: [
+            homework.parse_status(item) for item in data['homeworks']
+        ],
+        'render_verdicts': lambda: [
+            homework.parse_status(record) for record in records
+        ],
+        'pipeline': lambda: pipeline(transport),
+    }
+
+
+def best_time(function, repeat) -> float:
+    """Лучшая из repeat длительностей function() в миллисекундах.
+
+    Минимум меньше медианы зависит от соседей по машине: медленные
+    замеры - это помехи, а не свойство кода.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def calibration_loop():
+    """Работа, похожая на горячий путь: словари, строки и вызовы."""
+    items = []
+    for number in range(CALIBRATION_LOOPS):
+        item = {'id': number, 'status': 'approved'}
+        items.append(f'{item["id"]}:{item.get("status")}')
+    return len(items)
+
+
+def calibrate(repeat=5) -> float:
+    """Скорость машины: итераций калибровочного цикла в секунду."""
+    return CALIBRATION_LOOPS / best_time(calibration_loop, repeat) * 1000
+
+
+def normalize(results, calibration) -> dict:
+    """Пропускная способность в итерациях калибровочного цикла."""
+    return {
+        name: round(value / calibration, 6)
+        for name, value in results.items()
+    }
+
+
+def platform_info() -> dict:
+    """Версия Python и архитектура, на которых снят замер."""
+    return {
+        'python': '.'.join(platform.python_version_tuple()[:2]),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+    }
+
+
+def platform_mismatch(saved) -> list:
+    """Чем платформа baseline отличается от текущей: [(ключ, было, есть)]."""
+    return [
+        (key, saved.get(key), value)
+        for key, value in platform_info().items()
+        if saved.get(key) != value
+    ]
+
+
+def run(sizes=SIZES, repeat=5) -> dict:
+    """Пропускная способность замеров: '<замер>[<работ>]' -> работ/с."""
+    results = {}
+    for size in sizes:
+        loops = max(1, MIN_ITEMS_PER_SAMPLE // size)
+        for name, function in cases(size).items():
+            def sample(function=function):
+                for _ in range(loops):
+                    function()
+
+            milliseconds = best_time(sample, repeat)
+            results[f'{name}[{size}]'] = round(
+                size * loops / milliseconds * 1000
+            )
+    return results
+
+
+def compare(baseline, results, threshold=THRESHOLD) -> list:
+    """Замеры, чья пропускная способность упала больше чем на threshold.
+
+    Возвращает список (замер, baseline, результат).
+    """
+    return [
+        (name, baseline[name], value)
+        for name, value in results.items()
+        if name in baseline and value < baseline[name] * (1 - threshold)
+    ]
+
+
+def load_baseline(path, ignore_platform=False) -> dict:
+    """Результаты baseline; завершает прогон, если сравнивать нельзя."""
+    with open(path, encoding='utf-8') as file:
+        saved = json.load(file)
+    if 'calibration' not in saved:
+        sys.exit(
+            f'{path}: нет калибровки, перезапишите baseline через --save'
+        )
+    mismatch = platform_mismatch(saved)
+    for key, expected, value in mismatch:
+        print(
+            f'baseline снят на {key}={expected}, сейчас {value}',
+            file=sys.stderr
+        )
+    if mismatch and not ignore_platform:
+        print(
+            'Сравнение на другой платформе недостоверно; '
+            'укажите --ignore-platform или перезапишите baseline',
+            file=sys.stderr
+        )
+        sys.exit(2)
+    return saved['results']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--sizes', type=lambda text: [int(size) for size in text.split(',')],
+        default=SIZES
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--ignore-platform', action='store_true')
+    args = parser.parse_args()
+    baseline = {}
+    if args.compare:
+        baseline = load_baseline(args.compare, args.ignore_platform)
+    # журнал бота не должен попадать в замеры
+    logging.disable(logging.CRITICAL)
+    calibration = calibrate(args.repeat)
+    raw = run(args.sizes, args.repeat)
+    # калибровка до и после замеров: берётся лучшая
+    calibration = max(calibration, calibrate(args.repeat))
+    results = normalize(raw, calibration)
+    print(f'{"calibration":>24}: {calibration:>12.0f} итераций/с')
+    for name, value in raw.items():
+        line = f'{name:>24}: {value:>12} работ/с'
+        if name in baseline:
+            line += f' ({results[name] / baseline[name] - 1:+.1%})'
+        print(line)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump({
+                **platform_info(),
+                'calibration': round(calibration),
+                'results': results,
+            }, file, indent=2, ensure_ascii=False)
+            file.write('\n')
+    regressions = compare(baseline, results, args.threshold)
+    for name, expected, value in regressions:
+        print(
+            f'Регрессия {name}: {value} вместо {expected} '
+            'в единицах калибровки',
+            file=sys.stderr
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Стоимость холодного импорта модуля бота по модулям.
+
+    python -m benchmarks.import_time --module homework --top 15
+
+Запускает `python -X importtime -c "import <module>"` в отдельном
+процессе --repeat раз и по медиане печатает самые дорогие модули
+(собственное и накопленное время в мс), полное время импорта и то, какие
+тяжёлые зависимости оказались загружены.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Зависимости, которые должны загружаться только при первом обращении
+HEAVY_MODULES = ('telegram', 'requests', 'orjson', 'http.server')
+
+
+def parse_importtime(stderr) -> dict:
+    """Разбирает вывод -X importtime: модуль -> (собственное, общее) мкс."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            # строка заголовка
+            continue
+        timings[name.strip()] = (int(own), int(cumulative))
+    return timings
+
+
+def measure(module) -> dict:
+    """Один холодный импорт module в новом процессе."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def run(module, repeat) -> dict:
+    """Медианы собственного и общего времени по модулям за repeat запусков."""
+    samples = defaultdict(list)
+    for _ in range(repeat):
+        for name, timing in measure(module).items():
+            samples[name].append(timing)
+    return {
+        name: (
+            statistics.median(own for own, _ in timings),
+            statistics.median(cumulative for _, cumulative in timings)
+        )
+        for name, timings in samples.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='homework')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    timings = run(args.module, args.repeat)
+    print(f'{"own ms":>9} {"cumulative ms":>14}  module')
+    ranked = sorted(timings.items(), key=lambda item: -item[1][0])
+    for name, (own, cumulative) in ranked[:args.top]:
+        print(f'{own / 1000:>9.2f} {cumulative / 1000:>14.2f}  {name}')
+    total = timings.get(args.module, (0, 0))[1]
+    print(f'{"total":>9}: {total / 1000:.2f} ms ({args.module})')
+    loaded = [name for name in HEAVY_MODULES if name in timings]
+    print(f'{"loaded":>9}: {", ".join(loaded) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Нагрузочный прогон цикла опроса против локального эмулятора API.
+
+Запускает benchmarks.fake_api отдельным процессом и опрашивает его
+poller.Poller'ом от имени N студентов. Telegram заменён заглушкой.
+
+    python -m benchmarks.poll_loop --tenants 1000 --duration 30 --latency 50
+
+Печатает число опросов в секунду, p50/p99 длительности запроса к API
+и потребление памяти процессом бота.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import circuit_breaker
+import homework
+import http_session
+import poller
+import scheduler
+import send_queue
+import state_store
+
+
+class NullBot:
+    """Заглушка telegram.Bot: сообщения никуда не отправляются."""
+
+    def send_message(self, chat_id, text, **kwargs):
+        pass
+
+
+class MeasuredPoller(poller.Poller):
+    """Poller, запоминающий длительность каждого запроса к API."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.errors = 0
+
+    def fetch(self, tenant, timestamp):
+        started = time.perf_counter()
+        try:
+            return super().fetch(tenant, timestamp)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+
+def percentile(values, fraction) -> float:
+    """Перцентиль fraction (0..1) по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в МБ; без /proc - пиковый."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def start_fake_api(args):
+    """Запускает эмулятор API и возвращает процесс и адрес эндпоинта."""
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'benchmarks.fake_api',
+            '--latency', str(args.latency),
+            '--error-rate', str(args.error_rate),
+            '--homeworks', str(args.homeworks),
+            '--seed', '1',
+        ],
+        stdout=subprocess.PIPE, text=True
+    )
+    return process, process.stdout.readline().strip()
+
+
+async def run_for(engine, duration):
+    """Крутит цикл опроса duration секунд."""
+    task = asyncio.ensure_future(engine.run())
+    await asyncio.sleep(duration)
+    engine.stop()
+    await task
+
+
+def run(args) -> dict:
+    """Выполняет прогон и возвращает сводку."""
+    process, url = start_fake_api(args)
+    homework.ENDPOINT = url
+    tenants = [
+        poller.Tenant(str(number), f'token{number}', str(number))
+        for number in range(args.tenants)
+    ]
+    bot = NullBot()
+    rss_before = rss_mb()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            store = state_store.StateStore(
+                os.path.join(directory, 'state.sqlite3')
+            )
+            engine = MeasuredPoller(
+                tenants, bot,
+                max_in_flight=args.max_in_flight,
+                session=http_session.create_session(
+                    pool_maxsize=args.max_in_flight
+                ),
+                store=store,
+                outbox=send_queue.SendQueue(
+                    bot, global_rate=10 ** 6, chat_rate=10 ** 6
+                ),
+                policy=scheduler.PollPolicy(
+                    args.interval, minimum=args.interval,
+                    maximum=args.interval
+                ),
+                breaker=circuit_breaker.CircuitBreaker(),
+            )
+            started = time.perf_counter()
+            asyncio.run(run_for(engine, args.duration))
+            elapsed = time.perf_counter() - started
+            store.close()
+    finally:
+        process.terminate()
+        process.wait()
+    latencies = engine.latencies
+    return {
+        'tenants': args.tenants,
+        'duration_s': round(elapsed, 2),
+        'polls': len(latencies),
+        'errors': engine.errors,
+        'polls_per_s': round(len(latencies) / elapsed, 1),
+        'latency_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'rss_mb': round(rss_mb(), 1),
+        'rss_growth_mb': round(rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='длительность прогона, с')
+    parser.add_argument('--interval', type=float, default=1,
+                        help='интервал опроса одного студента, с')
+    parser.add_argument('--max-in-flight', type=int,
+                        default=poller.MAX_IN_FLIGHT)
+    parser.add_argument('--latency', type=float, default=20,
+                        help='задержка ответа эмулятора, мс')
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--homeworks', type=int, default=10,
+                        help='работ у каждого студента')
+    parser.add_argument('--json', action='store_true',
+                        help='вывести сводку в JSON')
+    parser.add_argument('--log', action='store_true',
+                        help='не отключать журнал бота')
+    args = parser.parse_args()
+    if not args.log:
+        logging.disable(logging.WARNING)
+    report = run(args)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print(f'{key:>16}: {value}')
+
+
+if __name__ == '__main__':
+    main()
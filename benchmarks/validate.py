@@ -0,0 +1,84 @@
+"""Скорость разбора и проверки ответа API с тысячами работ.
+
+    python -m benchmarks.validate --homeworks 5000 --repeat 50
+
+Для каждого способа разбора JSON (json, orjson - если установлен)
+печатает среднее время разбора тела ответа и проверки schema.py.
+"""
+import argparse
+import json
+import statistics
+import time
+
+import schema
+
+STATUSES = schema.HOMEWORK_STATUSES
+
+
+class RawResponse:
+    """Ответ с готовым телом: json() и content, как у requests.Response."""
+
+    def __init__(self, body):
+        self.content = body
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def make_body(homeworks_qty) -> bytes:
+    """Тело ответа API с homeworks_qty работами."""
+    now = int(time.time())
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'student__hw{number:05}.zip',
+                'lesson_name': f'Спринт {number}',
+                'reviewer_comment': 'Замечаний нет.',
+                'status': STATUSES[number % len(STATUSES)],
+                'date_updated': '2023-01-01T00:00:00Z',
+            }
+            for number in range(homeworks_qty)
+        ],
+        'current_date': now,
+    }, ensure_ascii=False).encode('utf-8')
+
+
+def measure(function, repeat) -> float:
+    """Медиана длительности function() в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def run(homeworks_qty, repeat) -> dict:
+    """Замеряет разбор и проверку и возвращает сводку в мс."""
+    response = RawResponse(make_body(homeworks_qty))
+    backends = ['json'] + (['orjson'] if schema.orjson is not None else [])
+    report = {}
+    for backend in backends:
+        report[f'decode_{backend}_ms'] = measure(
+            lambda: schema.decode(response, backend), repeat
+        )
+    data = schema.decode(response, 'json')
+    report['validate_ms'] = measure(
+        lambda: schema.validate_response(data), repeat
+    )
+    return {key: round(value, 3) for key, value in report.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--homeworks', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    print(f'{"homeworks":>16}: {args.homeworks}')
+    for key, value in run(args.homeworks, args.repeat).items():
+        print(f'{key:>16}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Автомат защиты (circuit breaker) для запросов к API Практикума.
+
+При недоступности API все студенты упираются в один и тот же эндпоинт.
+После FAILURE_THRESHOLD сбоев подряд автомат размыкается (open) и запросы
+не отправляются вовсе; пауза растёт экспоненциально со случайным
+разбросом. По истечении паузы автомат полуразомкнут (half_open): проходит
+один пробный запрос, и его успех сразу замыкает автомат (closed).
+"""
+import os
+import random
+import threading
+import time
+
+import exceptions
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+BREAKER_BASE_DELAY = float(os.getenv('BREAKER_BASE_DELAY', 30))
+BREAKER_MAX_DELAY = float(os.getenv('BREAKER_MAX_DELAY', 1800))
+BREAKER_JITTER = 0.2
+# Через сколько секунд повторить попытку, пока идёт пробный запрос
+PROBE_DELAY = 5.0
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def is_endpoint_failure(error) -> bool:
+    """Говорит ли ошибка о сбое самого эндпоинта, а не данных студента.
+
+    Сетевые ошибки, 5xx и 429 касаются всех студентов; 401 или 400
+    означают проблему с конкретным токеном и автомат не размыкают.
+    """
+    if isinstance(error, exceptions.ConnectionError):
+        return True
+    if isinstance(error, exceptions.WrongAPIResponseCodeError):
+        status_code = error.status_code or 0
+        return status_code >= 500 or status_code == 429
+    return False
+
+
+class CircuitBreaker:
+    """Автомат защиты с экспоненциальной паузой."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD,
+                 base_delay=BREAKER_BASE_DELAY, max_delay=BREAKER_MAX_DELAY,
+                 jitter=BREAKER_JITTER, clock=time.monotonic,
+                 rng=random.random):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        # сколько раз подряд автомат размыкался - показатель степени паузы
+        self._trips = 0
+        self._retry_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние: closed, open или half_open."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() >= self._retry_at:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Можно ли сейчас отправить запрос."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Через сколько секунд имеет смысл повторить запрос."""
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN:
+                return self._retry_at - self._clock()
+            if state == HALF_OPEN:
+                return PROBE_DELAY
+            return 0.0
+
+    def record_success(self):
+        """Запрос прошёл: автомат замыкается."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trips = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Запрос не прошёл: при достижении порога автомат размыкается."""
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or (
+                state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._trip()
+
+    def _trip(self):
+        delay = min(self.max_delay, self.base_delay * 2 ** self._trips)
+        delay *= 1 + self.jitter * (2 * self._rng() - 1)
+        self._state = OPEN
+        self._trips = min(self._trips + 1, 32)
+        self._retry_at = self._clock() + delay
+        self._probing = False
+
+
+def for_endpoint(endpoint) -> CircuitBreaker:
+    """Общий для всего процесса автомат защиты эндпоинта."""
+    with _lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker()
+        return breaker
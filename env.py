@@ -0,0 +1,41 @@
+"""Загрузка .env до импорта модулей, читающих настройки.
+
+Настройки модулей (STATE_DB, TENANTS_FILE, MAX_IN_FLIGHT, LOG_LEVEL, ...)
+читаются из окружения при импорте, поэтому .env должен попасть в окружение
+раньше них. Точки входа импортируют этот модуль первым:
+
+    import env  # noqa: F401 - .env загружается до остальных модулей
+
+.env загружается, только если процесс запущен одной из ENTRY_POINTS:
+импорт homework.py в тестах и бенчмарках окружение не меняет.
+"""
+import os
+import sys
+
+# Скрипты, запуск которых загружает .env
+ENTRY_POINTS = ('homework.py', 'poller.py', 'supervisor.py')
+
+
+def is_entry_point(main=None) -> bool:
+    """Запущен ли процесс скриптом из ENTRY_POINTS этого каталога."""
+    if main is None:
+        main = sys.modules.get('__main__')
+    path = getattr(main, '__file__', None)
+    if not path:
+        return False
+    path = os.path.abspath(path)
+    return (
+        os.path.dirname(path) == os.path.dirname(os.path.abspath(__file__))
+        and os.path.basename(path) in ENTRY_POINTS
+    )
+
+
+def load():
+    """Переносит переменные из .env в окружение, не заменяя заданные."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+if is_entry_point():
+    load()
@@ -1,39 +1,113 @@
-from requests import Response
+"""Исключения бота.
+
+Исключения не держат ни ответ requests.Response, ни исходную ошибку
+requests: при создании из них берётся короткая сводка - код ответа,
+причина, начало тела не длиннее MAX_BODY_PREFIX символов и заголовки со
+скрытыми секретами. Текст собирается только в __str__, то есть когда
+ошибку действительно выводят в журнал или в Telegram.
+"""
 # Денис, скажите, я не намудрил с исключениями?
 
+MAX_BODY_PREFIX = 512
+# Длина прочих строк сводки: причины, значений заголовков и параметров
+MAX_VALUE_SIZE = 256
+MAX_HEADERS = 32
+SENSITIVE_HEADERS = frozenset({
+    'authorization', 'cookie', 'set-cookie', 'x-webhook-secret',
+    'proxy-authorization',
+})
+REDACTED = '***'
+
+
+def truncate(text, limit=MAX_VALUE_SIZE) -> str:
+    """Начало строки text не длиннее limit символов."""
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f'{text[:limit]}... (+{len(text) - limit} симв.)'
+
+
+def redact_headers(headers) -> dict:
+    """Копия заголовков со скрытыми секретами и укороченными значениями."""
+    return {
+        str(name): (
+            REDACTED if str(name).lower() in SENSITIVE_HEADERS
+            else truncate(value)
+        )
+        for name, value in list((headers or {}).items())[:MAX_HEADERS]
+    }
+
+
+def summarize_request(request_params) -> dict:
+    """Адрес, параметры и заголовки запроса без секретов."""
+    return {
+        'url': truncate(request_params.get('url', '')),
+        'params': {
+            str(name): truncate(value)
+            for name, value in (request_params.get('params') or {}).items()
+        },
+        'headers': redact_headers(request_params.get('headers')),
+    }
+
+
+def body_prefix(response, limit=MAX_BODY_PREFIX):
+    """Начало тела ответа и полный размер тела в байтах или символах.
+
+    Тело читается из content, чтобы не декодировать его целиком.
+    """
+    content = getattr(response, 'content', None)
+    if isinstance(content, bytes):
+        prefix = content[:limit * 4].decode('utf-8', errors='replace')
+        return prefix[:limit], len(content)
+    text = str(getattr(response, 'text', '') or '')
+    return text[:limit], len(text)
+
+
 class TelegramError(Exception):
 
     def __init__(self, error):
         """Ошибка отправки телеграм сообщения"""
+        # ошибки python-telegram-bot невелики, а send_queue.py нужен
+        # исходный объект: из RetryAfter берётся пауза retry_after
         self.error = error
+        super().__init__(error)
 
     def __str__(self):
-        return (f'Ошибка отправки телеграм сообщения: {self.error}')
+        return ('Ошибка отправки телеграм сообщения:'
+                f' {truncate(self.error)}')
 
 
 class WrongAPIResponseCodeError(Exception):
     """наш класс унаследованный от Exceptions"""
-    def __init__(self,
-                 request_params,
-                 response: Response):
+    def __init__(self, request_params, response):
         """Ответ сервера не является успешным"""
-        self.request_params = request_params
-        self.response = response
+        self.request = summarize_request(request_params)
+        self.status_code = getattr(response, 'status_code', None)
+        self.reason = truncate(getattr(response, 'reason', '') or '')
+        self.body, self.body_size = body_prefix(response)
+        self.headers = redact_headers(getattr(response, 'headers', None))
+        super().__init__(self.status_code, self.reason)
 
     def __str__(self):
+        body = self.body
+        if self.body_size > len(body):
+            body = f'{body}... (всего {self.body_size})'
         return ('Ответ сервера не является успешным:'
-                f' request params = {self.request_params};'
-                f' http_code = {self.response.status_code};'
-                f' reason = {self.response.reason};'
-                f' content = {self.response.text}')
+                f' url = {self.request["url"]};'
+                f' params = {self.request["params"]};'
+                f' http_code = {self.status_code};'
+                f' reason = {self.reason};'
+                f' content = {body}')
 
 
 class ConnectionError(Exception):
     """наш класс унаследованный от Exceptions"""
     def __init__(self, request_params: dict, error):
         """Во время подключения к эндпоинту произошла непредвиденная ошибка"""
-        self.request_params=request_params
-        self.error=error
+        self.request = summarize_request(request_params)
+        self.error_type = type(error).__name__
+        self.error = truncate(error)
+        super().__init__(self.error_type, self.error)
 
     def __str__(self):
         return (
@@ -42,5 +116,15 @@ class ConnectionError(Exception):
                 ' headers = {headers}; params = {params};'
             ).format(
                 error=self.error,
-                **self.request_params
+                **self.request
             )
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени цикла опроса исчерпан"""
+    def __init__(self, budget):
+        self.budget = budget
+        super().__init__(budget)
+
+    def __str__(self):
+        return f'Исчерпан бюджет времени цикла: {self.budget} с'
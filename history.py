@@ -0,0 +1,193 @@
+"""История смены статусов домашних работ в памяти.
+
+У каждого студента - кольцевой буфер последних HISTORY_SIZE переходов
+в колонках array: время (8 байт), номер работы (4 байта), прежний и новый
+статус (по байту). Статусы хранятся кодами из общей таблицы, а ключи
+работ - номерами в таблице студента, так что переход занимает 14 байт
+вместо кортежа строк. Последний статус каждой работы хранится отдельно и
+не теряется, когда буфер перезаписывается.
+
+    history.record('7', 'hw1', 'approved')
+    history.latest('7', 'hw1')        # 'approved'
+    history.since('7', timestamp)     # [Transition(...), ...]
+"""
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, NamedTuple, Optional
+
+import schema
+
+HISTORY_SIZE = int(os.getenv('HISTORY_SIZE', 256))
+
+# Код 0 - статуса не было (первое уведомление о работе)
+STATUSES: List[Optional[str]] = [None, *schema.HOMEWORK_STATUSES]
+STATUS_CODES: Dict[str, int] = {
+    status: code for code, status in enumerate(STATUSES) if code
+}
+_codes_lock = threading.Lock()
+
+
+def status_code(status) -> int:
+    """Код статуса; новый статус добавляется в таблицу."""
+    code = STATUS_CODES.get(status)
+    if code is not None:
+        return code
+    with _codes_lock:
+        code = STATUS_CODES.get(status)
+        if code is None:
+            if len(STATUSES) > 255:
+                raise ValueError(f'Слишком много статусов: {status}')
+            code = len(STATUSES)
+            STATUSES.append(sys.intern(status))
+            STATUS_CODES[STATUSES[code]] = code
+    return code
+
+
+class Transition(NamedTuple):
+    """Смена статуса работы."""
+
+    at: int
+    homework: str
+    previous: Optional[str]
+    status: str
+
+
+class TenantHistory:
+    """Кольцевой буфер переходов одного студента."""
+
+    __slots__ = (
+        'size', '_times', '_keys', '_previous', '_codes', '_start',
+        '_count', '_key_ids', '_key_names', '_latest'
+    )
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.size = size
+        self._times = array('q', bytes(8 * size))
+        self._keys = array('I', bytes(4 * size))
+        self._previous = array('B', bytes(size))
+        self._codes = array('B', bytes(size))
+        # позиция самого старого перехода и число переходов в буфере
+        self._start = 0
+        self._count = 0
+        self._key_ids: Dict[str, int] = {}
+        self._key_names: List[str] = []
+        # номер работы -> код последнего статуса
+        self._latest: Dict[int, int] = {}
+
+    def __len__(self):
+        return self._count
+
+    def record(self, key, status, at) -> bool:
+        """Добавляет переход; повтор того же статуса не записывается.
+
+        Время не меньше времени предыдущего перехода: на нём держится
+        двоичный поиск в since().
+        """
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = self._key_ids[key] = len(self._key_names)
+            self._key_names.append(key)
+        code = status_code(status)
+        previous = self._latest.get(key_id, 0)
+        if previous == code:
+            return False
+        self._latest[key_id] = code
+        if self._count:
+            last = self._times[(self._start + self._count - 1) % self.size]
+            at = max(at, last)
+        if self._count < self.size:
+            position = (self._start + self._count) % self.size
+            self._count += 1
+        else:
+            # буфер полон: перезаписывается самый старый переход
+            position = self._start
+            self._start = (self._start + 1) % self.size
+        self._times[position] = at
+        self._keys[position] = key_id
+        self._previous[position] = previous
+        self._codes[position] = code
+        return True
+
+    def latest(self, key) -> Optional[str]:
+        """Последний статус работы key или None."""
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            return None
+        return STATUSES[self._latest[key_id]]
+
+    def latest_all(self) -> Dict[str, str]:
+        """Последние статусы всех работ студента."""
+        names = self._key_names
+        return {
+            names[key_id]: STATUSES[code]
+            for key_id, code in self._latest.items()
+        }
+
+    def since(self, timestamp) -> List[Transition]:
+        """Переходы не раньше timestamp в порядке записи.
+
+        Время переходов не убывает, поэтому начало ищется двоичным
+        поиском.
+        """
+        times, start, size = self._times, self._start, self.size
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if times[(start + middle) % size] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        names = self._key_names
+        transitions = []
+        for index in range(low, self._count):
+            position = (start + index) % size
+            transitions.append(Transition(
+                times[position], names[self._keys[position]],
+                STATUSES[self._previous[position]],
+                STATUSES[self._codes[position]]
+            ))
+        return transitions
+
+
+class StatusHistory:
+    """История переходов всех студентов."""
+
+    def __init__(self, size=HISTORY_SIZE, clock=time.time):
+        self.size = size
+        self._clock = clock
+        self._tenants: Dict[str, TenantHistory] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tenant_id, key, status, at=None) -> bool:
+        """Записывает смену статуса работы key студента tenant_id.
+
+        Время берётся под блокировкой, поэтому переходы из разных
+        потоков записываются в порядке времени.
+        """
+        with self._lock:
+            at = int(self._clock() if at is None else at)
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                tenant = self._tenants[tenant_id] = TenantHistory(self.size)
+            return tenant.record(str(key), status, at)
+
+    def latest(self, tenant_id, key) -> Optional[str]:
+        """Последний статус работы key студента или None."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            return tenant.latest(str(key)) if tenant is not None else None
+
+    def latest_all(self, tenant_id) -> Dict[str, str]:
+        """Последние статусы всех работ студента."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            return tenant.latest_all() if tenant is not None else {}
+
+    def since(self, tenant_id, timestamp) -> List[Transition]:
+        """Переходы студента начиная с timestamp."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            return tenant.since(timestamp) if tenant is not None else []
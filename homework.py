@@ -1,14 +1,30 @@
+import env  # .env загружается до остальных модулей
+import functools
 import os
 import sys
+import threading
 import http
-import requests
 import time
 import logging
-import telegram
-from dotenv import load_dotenv
+import alerts
 import exceptions
+import history
+import lazy
+import shutdown as graceful
+import metrics
+import log_config
+import response_cache
+import schema
+import state
+import state_store
+import timeouts
+import tracing
 
-load_dotenv()
+# requests, python-telegram-bot и http.server приёмника уведомлений
+# импортируются при первом обращении
+requests = lazy.lazy_import('requests')
+telegram = lazy.lazy_import('telegram')
+webhook = lazy.lazy_import('webhook')
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
@@ -20,16 +36,31 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
-# Здесь задана глобальная конфигурация для всех логгеров
-logging.basicConfig(
-    level=logging.DEBUG,
-    filename='program.log',
-    filemode='w',
-    format='%(asctime)s - %(levelname)s - %(message)s - %(name)s')
+# Ключ единственного студента в хранилище состояния
+MAIN_TENANT_ID = 'main'
+# Валидаторы последнего обработанного ответа для get_api_answer()
+RESPONSE_CACHE = response_cache.ResponseCache()
+# Смены статусов, о которых бот сообщил (history.py)
+HISTORY = history.StatusHistory()
 # А тут установлены настройки логгера для текущего файла - homework.py
 logger = logging.getLogger(__name__)
-# Указываем обработчик логов StreamHandler
-logger.addHandler(logging.StreamHandler())
+
+
+def init():
+    """Загружает .env, читает токены из окружения и настраивает журнал.
+
+    Вызывается при запуске бота, а не при импорте модуля, - так импорт
+    остаётся быстрым и не трогает файлы.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, HEADERS
+    env.load()
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    # Глобальная конфигурация для всех логгеров: запись в файл и консоль
+    # идёт в фоновом потоке, уровень берётся из LOG_LEVEL
+    return log_config.setup_logging()
 
 
 def check_tokens():
@@ -43,86 +74,188 @@ def check_tokens():
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в указанный Telegram чат."""
     try:
         # Логируем сообщение перед отправкой
         logger.info('Сообщение подготовлено к отправке.')
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        kwargs = {}
+        deadline = timeouts.current()
+        if deadline is not None:
+            # отправка не ждёт дольше, чем осталось от бюджета цикла
+            kwargs['timeout'] = deadline.timeout()
+        with tracing.span('send_message'), metrics.SEND_LATENCY.time():
+            bot.send_message(chat_id, message, **kwargs)
     except telegram.TelegramError as error:
         # сбой при отправке сообщения в Telegram (уровень ERROR)
-        logger.error(f'Сообщение не отправленно: {error}')
+        logger.error('Сообщение не отправленно: %s', error)
+        metrics.ERRORS.inc(exception='TelegramError')
         raise exceptions.TelegramError(error)
     else:
         # удачная отправка любого сообщения в Telegram (уровень DEBUG)
-        logger.debug(f'Сообщение отправленно: {message}')
+        logger.debug('Сообщение отправленно: %s', message)
 
 
 def get_api_answer(timestamp) -> dict:
     """Делает запрос к единственному эндпоинту API-сервиса."""
+    return fetch_homework_statuses(
+        PRACTICUM_TOKEN, timestamp, cache=RESPONSE_CACHE
+    )
+
+
+def fetch_homework_statuses(token, timestamp, session=None,
+                            cache=None, deadline=None, raw=False):
+    """Запрашивает статусы домашних работ студента с токеном token.
+
+    session - общая requests.Session с пулом соединений; без неё
+    запрос выполняется через requests.get(). С cache (ResponseCache)
+    запрос условный: если данные не изменились с последнего обработанного
+    ответа, тело не разбирается и возвращается ответ без работ.
+    Тайм-ауты запроса ограничены бюджетом deadline (по умолчанию -
+    текущим timeouts.Deadline). С raw=True возвращается тело успешного
+    ответа (bytes) без разбора: его разбирает вызывающий.
+    """
+    transport = session or requests
     # Создаем словарь со всеми параметрами запроса
     timestamp = timestamp or int(time.time())
+    headers = {'Authorization': f'OAuth {token}'}
+    if cache is not None:
+        headers.update(cache.headers())
     request_params = {
         'url': ENDPOINT,
-        'headers': {'Authorization': f'OAuth {PRACTICUM_TOKEN}'},
-        'params': {'from_date': timestamp}
+        'headers': headers,
+        'params': {'from_date': timestamp},
+        'timeout': timeouts.request_timeout(deadline=deadline)
     }
-    try:
-        logging.info('Начинаем подключение к эндпоинту {url}')
-        response = requests.get(**request_params)
-        if response.status_code != http.HTTPStatus.OK:
+    logger.info('Начинаем подключение к эндпоинту %s', ENDPOINT)
+    # исключения бота выбрасываются вне блоков except: иначе в __context__
+    # осталась бы исходная ошибка вместе с ответом сервера
+    failure = None
+    with tracing.span('get_api_answer') as span:
+        try:
+            with metrics.API_LATENCY.time():
+                response = send_request(transport, request_params)
+        except requests.RequestException as error:
             # недоступность эндпоинта (уровень ERROR)
-            """Пользуясь случаем хочу у Вас спросить:
-            можно ли в файл лога добавлять все параметры?"""
-            logger.error('Ответ сервера не является успешным!')
-            raise exceptions.WrongAPIResponseCodeError(
-                {request_params},
-                {response}
+            logger.error('Во время подключения к эндпоинту произошла'
+                         ' непредвиденная ошибка!')
+            failure = exceptions.ConnectionError(request_params, error)
+        else:
+            span.set(
+                http_status=int(response.status_code),
+                body_size=len(getattr(response, 'content', b'') or b'')
             )
-        return response.json()
-    except Exception as error:
+            answer, failure = read_answer(
+                response, request_params, cache, timestamp, raw
+            )
+            if failure is None:
+                return answer
+        span.set(error=type(failure).__name__)
+    metrics.ERRORS.inc(exception=type(failure).__name__)
+    raise failure
+
+
+def read_answer(response, request_params, cache, timestamp, raw=False):
+    """Проверяет код ответа и разбирает тело; возвращает (ответ, ошибка).
+
+    С raw=True вместо разобранного ответа возвращается тело.
+    """
+    if cache is not None:
+        unchanged = unchanged_answer(cache, response, timestamp)
+        if unchanged is not None:
+            return unchanged, None
+    if response.status_code != http.HTTPStatus.OK:
         # недоступность эндпоинта (уровень ERROR)
-        logger.error('Во время подключения к эндпоинту произошла'
-                     ' непредвиденная ошибка!')
-        raise exceptions.ConnectionError(request_params, error)
+        logger.error('Ответ сервера не является успешным!')
+        return None, exceptions.WrongAPIResponseCodeError(
+            request_params, response
+        )
+    if raw:
+        return response.content, None
+    try:
+        return schema.decode(response), None
+    except ValueError as error:
+        logger.error('Ответ сервера не является JSON!')
+        return None, exceptions.ConnectionError(request_params, error)
+
+
+def send_request(transport, request_params):
+    """Выполняет GET и учитывает задержку ответа в timeouts.LATENCY.
+
+    Запрос, прерванный по тайм-ауту, учитывается с задержкой, равной
+    истраченному времени, и тайм-аут чтения растёт вслед за API.
+
+    С HEDGE_REQUESTS запрос дублируется, если ответа нет дольше p95.
+    """
+    def get():
+        started = time.perf_counter()
+        try:
+            response = transport.get(**request_params)
+        except requests.Timeout:
+            # задержка не меньше истраченного тайм-аута: без этого
+            # наблюдения окно не узнает, что API стал отвечать медленнее
+            timeouts.LATENCY.observe(time.perf_counter() - started)
+            raise
+        timeouts.LATENCY.observe(time.perf_counter() - started)
+        return response
+
+    if not timeouts.HEDGE_REQUESTS:
+        return get()
+    return timeouts.hedged(get, timeouts.LATENCY.hedge_delay())
+
+
+def unchanged_answer(cache, response, timestamp):
+    """Ответ без работ, если данные не изменились с прошлого раза.
+
+    Возвращает None, если ответ нужно разобрать как обычно.
+    """
+    if response.status_code == http.HTTPStatus.NOT_MODIFIED:
+        # курсор остаётся на месте: времени сервера в ответе нет
+        cache.not_modified()
+        return {'homeworks': [], 'current_date': timestamp}
+    if response.status_code == http.HTTPStatus.OK:
+        current_date = cache.unchanged_date(response)
+        if current_date is not None:
+            logger.debug('Ответ API не изменился.')
+            return {'homeworks': [], 'current_date': current_date}
+    return None
 
 
 def check_response(response):
-    """Проверяет ответ API на соответствие документации."""
-    if type(response) is not dict:
-        txt_error = 'Полученные данные не словарь!'
-        logger.error(txt_error)
-        raise TypeError(txt_error)
-    if 'current_date' not in response:
-        # отсутствие ожидаемых ключей в ответе API (уровень ERROR)
-        txt_error = 'Ключ current_date отсутствует!'
-        logger.error(txt_error)
-        raise KeyError(txt_error)
-    if type(response['current_date']) is not int:
-        txt_error = ('Объект homeworks не является целым числом'
-                     'обозначающим дату в формате unixtime!')
-        logger.error(txt_error)
-        raise TypeError(txt_error)
-    if 'homeworks' not in response:
-        # отсутствие ожидаемых ключей в ответе API (уровень ERROR)
-        txt_error = 'Ключ homeworks отсутствует'
-        logger.error(txt_error)
-        raise KeyError(txt_error)
-    if type(response['homeworks']) is not list:
-        txt_error = 'Объект homeworks не является списком'
-        logger.error(txt_error)
-        raise TypeError(txt_error)
-    # Если записей о работе нет - вернем ПУСТОЙ список
-    if response['homeworks'] == []:
+    """Проверяет ответ API на соответствие документации.
+
+    Конверт ответа и все работы проверяются по схеме за один проход
+    (schema.py); возвращаются все работы в виде записей schema.Homework.
+    """
+    try:
+        with tracing.span('check_response') as span:
+            homeworks = schema.validate_response(response)
+            span.set(homeworks=len(homeworks))
+    except (TypeError, KeyError, ValueError) as error:
+        # несоответствие ответа API документации (уровень ERROR)
+        logger.error('Ответ API не соответствует документации: %s', error)
+        raise
+    # Если записей о работе нет - отметим это в логе
+    if not homeworks:
         # отсутствие в ответе новых статусов (уровень DEBUG)
         logger.debug('Ответа пока нет!')
-        return {}
-    # Если записи получены - вернем первую запись
-    # для получения результата проверки на
-    # выбранную дату
-    return response.get('homeworks')[0]
+    # Вернем все записи: за одно окно могли измениться несколько работ
+    return homeworks
 
 
 def parse_status(homework):
     """Извлекает статус о конкретной домашней работе."""
+    if isinstance(homework, schema.Homework):
+        # запись уже проверена схемой в check_response()
+        verdict = HOMEWORK_VERDICTS.get(homework.status)
+        if verdict is not None:
+            return (
+                'Изменился статус проверки работы '
+                f'"{homework.homework_name}". {verdict}'
+            )
     if 'status' not in homework:
         # отсутствие ожидаемых ключей в ответе API (уровень ERROR)
         txt_error = 'Ключ status отсутствует в homework'
@@ -138,14 +271,63 @@ def parse_status(homework):
     if homework_status not in HOMEWORK_VERDICTS.keys():
         # неожиданный статус домашней работы,
         # обнаруженный в ответе API (уровень ERROR)
-        txt_error = ('Значение статуса не найдено'
-                     'в словаре HOMEWORK_VERDICTS')
+        txt_error = (f'Значение статуса {homework_status!r} работы '
+                     f'"{homework_name}" не найдено в словаре '
+                     'HOMEWORK_VERDICTS')
         logger.error(txt_error)
         raise ValueError(txt_error)
     verdict = HOMEWORK_VERDICTS[homework_status]
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+def send_new_statuses(statuses, homeworks, send, commit=True) -> int:
+    """Отправляет по сообщению на каждую работу со сменившимся статусом.
+
+    Сообщения формируются только для изменившихся работ и передаются
+    в send(text, homework); статус запоминается в statuses после
+    успешной отправки. С commit=False статус запоминает тот, кто
+    доставит сообщение. Работа с неизвестным статусом пропускается:
+    parse_status() уже записал её в журнал. Возвращает число
+    отправленных сообщений.
+    """
+    sent = 0
+    for homework in statuses.diff(homeworks):
+        try:
+            with tracing.span('parse_status'):
+                text = parse_status(homework)
+        except ValueError:
+            continue
+        send(text, homework)
+        if commit:
+            statuses.commit(homework)
+        sent += 1
+    return sent
+
+
+def record_status(store, key, status):
+    """Сохраняет статус работы после отправки сообщения о нём."""
+    store.record_status(MAIN_TENANT_ID, key, status)
+    HISTORY.record(MAIN_TENANT_ID, key, status)
+
+
+def start_push_receiver(bot, statuses, lock):
+    """Принимает уведомления о смене статуса для TELEGRAM_CHAT_ID.
+
+    Уведомления приходят на /push/main и обрабатываются так же, как
+    ответ API; опрос в main() продолжает сверять статусы.
+    """
+    def on_push(tenant_id, homeworks):
+        if tenant_id != MAIN_TENANT_ID:
+            raise KeyError(tenant_id)
+        with lock:
+            return send_new_statuses(
+                statuses, homeworks,
+                lambda text, homework: send_message(bot, text)
+            )
+
+    return webhook.start_receiver(on_push)
+
+
 def main():
     """Основная логика работы программы."""
     # Уважаемый ревьювер!
@@ -166,43 +348,65 @@ def main():
     # укажем бот
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
     logger.debug("Telegram-bot запущен!")
-    current_report: dict = {'name': '', 'output': ''}
-    prev_report: dict = current_report.copy()
-    while True:
-        current_timestamp = int(time.time())
-        logger.debug("Новый забег бота!")
-        try:
-            # получаем ответ API
-            response = get_api_answer(current_timestamp)
-            # если ответ содержательный - получаем первую строку
-            new_homeworks = check_response(response)
-            # если строка читаема
-            if new_homeworks:
-                # подготовим текст - сообщение
-                current_report['name'] = new_homeworks['homework_name']
-                current_report['output'] = parse_status(new_homeworks)
-            else:
-                current_report['output'] = (
-                    f'За период от {current_timestamp} до настоящего момента'
-                    ' домашних работ нет.'
-                )
-            if current_report != prev_report:
-
-                send_message(bot, current_report['output'])
-                prev_report = current_report.copy()
-            else:
-                logging.debug('В ответе нет новых статусов.')
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            current_report['output'] = message
-            logging.error(message, exc_info=True)
-            if current_report != prev_report:
-                send_message(bot, current_report['output'])
-                prev_report = current_report.copy()
-        finally:
-            time.sleep(RETRY_PERIOD)
+    # курсор from_date и отправленные статусы переживают перезапуск
+    store = state_store.StateStore()
+    timestamp = store.get(MAIN_TENANT_ID) or int(time.time())
+    statuses = state.StatusIndex(
+        store.statuses(MAIN_TENANT_ID),
+        on_commit=functools.partial(record_status, store)
+    )
+    # уведомления webhook.py и опрос не обрабатывают работы одновременно
+    lock = threading.Lock()
+    if webhook.WEBHOOK_PORT:
+        start_push_receiver(bot, statuses, lock)
+    # повторы одного и того же сбоя уходят сводкой, а не каждый цикл
+    reporter = alerts.ErrorReporter()
+    # SIGTERM и SIGINT прерывают паузу, а не цикл; состояние сохраняется
+    shutdown = graceful.GracefulShutdown().install()
+    try:
+        while True:
+            logger.debug("Новый забег бота!")
+            # трасса цикла: запрос, проверка, отправка и пауза
+            with tracing.trace('cycle', tenant=MAIN_TENANT_ID):
+                try:
+                    # запрос к API и отправка сообщений делят бюджет цикла
+                    with timeouts.Deadline(timeouts.CYCLE_BUDGET):
+                        # получаем ответ API
+                        response = get_api_answer(timestamp)
+                        # проверяем ответ и получаем все записи о работах
+                        homeworks = check_response(response)
+                        # сообщение по каждой работе со сменившимся статусом
+                        with lock:
+                            sent = send_new_statuses(
+                                statuses, homeworks or [],
+                                lambda text, homework: send_message(bot, text)
+                            )
+                    if not sent:
+                        logger.debug('В ответе нет новых статусов.')
+                    # ответ обработан - следующий такой же можно не разбирать
+                    RESPONSE_CACHE.commit()
+                    # сдвигаем курсор на время сервера
+                    timestamp = response['current_date']
+                    store.advance(MAIN_TENANT_ID, timestamp)
+                    recovered = reporter.success()
+                    if recovered:
+                        send_message(bot, recovered)
+
+                except Exception as error:
+                    logger.error(
+                        'Сбой в работе программы: %s', error, exc_info=True
+                    )
+                    notice = reporter.failure(error)
+                    if notice:
+                        send_message(bot, notice)
+                finally:
+                    with tracing.span('sleep'), shutdown.pause():
+                        time.sleep(RETRY_PERIOD)
+    finally:
+        shutdown.uninstall()
+        store.close()
 
 
 if __name__ == '__main__':
+    init()
     main()
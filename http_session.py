@@ -0,0 +1,71 @@
+"""Общая HTTP-сессия с пулом keep-alive соединений.
+
+Голый requests.get() открывает новое TCP/TLS соединение на каждый запрос.
+Сессия с HTTPAdapter держит соединения с practicum.yandex.ru открытыми и
+переиспользует их между циклами опроса и между студентами.
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Число хостов, для которых держится отдельный пул соединений
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+# Максимум соединений с одним хостом
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 32))
+# Повторы идемпотентных запросов при сбоях соединения и 502/503/504
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (502, 503, 504)
+RETRY_METHODS = frozenset({'GET', 'HEAD'})
+
+_session = None
+_lock = threading.Lock()
+
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS,
+                   pool_maxsize=HTTP_POOL_MAXSIZE,
+                   retries=HTTP_RETRIES) -> requests.Session:
+    """Создаёт сессию с пулом соединений и повторами GET-запросов.
+
+    pool_block=True не даёт открыть больше pool_maxsize соединений
+    с одним хостом: лишние запросы ждут свободное соединение.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=RETRY_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Возвращает общую для всего процесса сессию, создавая её при нужде."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """Закрывает общую сессию и все её соединения."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
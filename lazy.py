@@ -0,0 +1,41 @@
+"""Отложенный импорт тяжёлых зависимостей.
+
+python-telegram-bot и requests тянут за собой десятки модулей, а нужны
+только когда бот действительно отправляет сообщение или запрос. Объект
+lazy_import('requests') ведёт себя как модуль requests, но импортирует
+его при первом обращении к атрибуту. Запись атрибута (в том числе
+monkeypatch в тестах) попадает в настоящий модуль.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Заместитель модуля, импортирующий его при первом обращении."""
+
+    def _load(self):
+        return importlib.import_module(self.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return f'<lazy module {self.__name__!r}>'
+
+
+def lazy_import(name):
+    """Модуль name, если он уже импортирован, иначе его заместитель."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,139 @@
+"""Настройка журнала бота.
+
+Записи не пишутся на диск в потоке, который их создал: QueueHandler
+кладёт их в очередь, а фоновый QueueListener форматирует и записывает в
+файл с ротацией по размеру и в консоль. Одинаковые повторяющиеся строки
+уровней DEBUG и INFO (например, «Новый забег бота!») выводятся не чаще
+раза в LOG_REPEAT_INTERVAL секунд.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.getenv('LOG_FILE', 'program.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_REPEAT_INTERVAL = float(os.getenv('LOG_REPEAT_INTERVAL', 300))
+# Сколько последних разных строк помнит фильтр повторов
+LOG_REPEAT_KEYS = 1024
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s - %(name)s'
+
+
+# Аргументы этих типов не меняются, пока запись ждёт в очереди
+IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+
+class RepeatFilter(logging.Filter):
+    """Пропускает одинаковую запись DEBUG/INFO не чаще раза в interval.
+
+    Одинаковой считается запись того же логгера с тем же шаблоном и теми
+    же аргументами: строки о разных событиях по одному шаблону не
+    подавляются. При следующем выводе к записи добавляется число
+    подавленных повторов. Фильтр помнит не больше max_keys строк,
+    давно не встречавшиеся забываются первыми.
+    """
+
+    def __init__(self, interval=LOG_REPEAT_INTERVAL, clock=time.monotonic,
+                 max_keys=LOG_REPEAT_KEYS):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._clock = clock
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        if record.levelno >= logging.WARNING or not self.interval:
+            return True
+        args = record.args
+        try:
+            if args and (
+                type(args) is not tuple
+                or not all(isinstance(arg, IMMUTABLE_ARGS) for arg in args)
+            ):
+                key = (record.name, record.getMessage())
+            else:
+                key = (record.name, record.msg, args)
+            hash(key)
+        except TypeError:
+            return True
+        now = self._clock()
+        with self._lock:
+            shown_at, suppressed = self._seen.get(key, (None, 0))
+            if shown_at is not None and now - shown_at < self.interval:
+                self._seen[key] = (shown_at, suppressed + 1)
+                self._seen.move_to_end(key)
+                return False
+            self._seen[key] = (now, 0)
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+        if suppressed:
+            record.msg = f'{record.msg} (повторов подавлено: {suppressed})'
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler, оставляющий форматирование потоку записи.
+
+    Стандартный prepare() форматирует запись в вызывающем потоке; здесь
+    запись с неизменяемыми аргументами (строки и числа) уходит в очередь
+    как есть. Запись с другими аргументами форматируется сразу - объект
+    может измениться, пока запись ждёт в очереди, - а трассировка
+    исключения переводится в текст, чтобы не держать кадры стека.
+    """
+
+    _formatter = logging.Formatter()
+
+    def prepare(self, record):
+        args = record.args
+        if args and (
+            type(args) is not tuple
+            or not all(isinstance(arg, IMMUTABLE_ARGS) for arg in args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._formatter.formatException(
+                    record.exc_info
+                )
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level=None, filename=None) -> QueueListener:
+    """Настраивает корневой логгер и запускает поток записи журнала.
+
+    Без аргументов уровень и файл берутся из LOG_LEVEL и LOG_FILE в
+    момент вызова - уже с учётом загруженного .env.
+    """
+    if level is None:
+        level = os.getenv('LOG_LEVEL', LOG_LEVEL).upper()
+    if filename is None:
+        filename = os.getenv('LOG_FILE', LOG_FILE)
+    records = queue.SimpleQueue()
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(
+        filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+    queue_handler = DeferredQueueHandler(records)
+    queue_handler.addFilter(RepeatFilter())
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    listener = QueueListener(records, file_handler, stream_handler)
+    listener.start()
+    # при выходе дописываем очередь на диск
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,251 @@
+"""Метрики бота в текстовом формате Prometheus.
+
+Небольшой реестр счётчиков, гистограмм и показателей без внешних
+зависимостей и локальный HTTP-эндпоинт /metrics для их снятия.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонно растущий счётчик с метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Увеличивает счётчик с метками labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение счётчика с метками labels."""
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, labels, value
+
+
+class Gauge:
+    """Показатель, значение которого вычисляется при снятии метрик."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function=None):
+        self.name = name
+        self.documentation = documentation
+        self._function = function
+        self._value = 0
+
+    def set(self, value):
+        """Запоминает значение показателя."""
+        self._value = value
+
+    def set_function(self, function):
+        """Значение будет браться из function() при каждом снятии."""
+        self._function = function
+
+    def samples(self):
+        value = self._function() if self._function else self._value
+        yield self.name, (), value
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Учитывает одно наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Измеряет длительность блока with."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            yield (
+                self.name + '_bucket', (('le', _format_value(bound)),),
+                cumulative
+            )
+        yield self.name + '_sum', (), total
+        yield self.name + '_count', (), cumulative
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    name, documentation, **kwargs
+                )
+            elif not isinstance(metric, cls):
+                raise ValueError(f'Метрика {name} уже зарегистрирована')
+            return metric
+
+    def counter(self, name, documentation) -> Counter:
+        """Регистрирует счётчик или возвращает уже существующий."""
+        return self._register(Counter, name, documentation)
+
+    def gauge(self, name, documentation, function=None) -> Gauge:
+        """Регистрирует показатель или возвращает уже существующий."""
+        gauge = self._register(Gauge, name, documentation)
+        if function is not None:
+            gauge.set_function(function)
+        return gauge
+
+    def histogram(self, name, documentation,
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        """Регистрирует гистограмму или возвращает уже существующую."""
+        return self._register(
+            Histogram, name, documentation, buckets=buckets
+        )
+
+    def unregister(self, name, function=None) -> bool:
+        """Убирает метрику name; True, если она была зарегистрирована.
+
+        С function показатель убирается, только если его значение всё ещё
+        берётся из function: так владелец не снимет чужой показатель.
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None or (
+                function is not None
+                and getattr(metric, '_function', None) is not function
+            ):
+                return False
+            del self._metrics[name]
+            return True
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(
+                    f'{name}{_format_labels(labels)} {_format_value(value)}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+API_LATENCY = REGISTRY.histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикум.Домашки'
+)
+SEND_LATENCY = REGISTRY.histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram'
+)
+API_HEDGED = REGISTRY.counter(
+    'homework_api_hedged_requests_total',
+    'Число продублированных запросов к API'
+)
+ERRORS = REGISTRY.counter(
+    'homework_errors_total',
+    'Число ошибок по классам исключений'
+)
+
+
+def start_http_server(port, address='127.0.0.1', registry=REGISTRY):
+    """Запускает эндпоинт /metrics в фоновом потоке."""
+    # http.server нужен только с включённым эндпоинтом
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # запросы Prometheus не засоряют лог бота
+            pass
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    return server
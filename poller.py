@@ -0,0 +1,710 @@
+"""Многопользовательский опрос API Практикум.Домашки в одном процессе.
+
+Все студенты (tenants) из файла конфигурации опрашиваются из одного
+событийного цикла asyncio. Блокирующие вызовы requests и telegram
+выполняются в пуле потоков, а число одновременных запросов ограничено
+семафором, поэтому тысячи студентов не превращаются в тысячи соединений.
+"""
+import env  # noqa: F401 - .env загружается до остальных модулей
+import asyncio
+import functools
+import heapq
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import telegram
+from telegram.utils.request import Request
+
+import alerts
+import circuit_breaker
+import homework
+import history
+import http_session
+import metrics
+import response_cache
+import scheduler
+import send_queue
+import sharding
+import shutdown
+import snapshot
+import state
+import state_store
+import tracing
+import webhook
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+MAX_IN_FLIGHT = int(os.getenv('MAX_IN_FLIGHT', 32))
+# Максимальная пауза планировщика между проверками очереди
+SCHEDULER_TICK = 1.0
+# Опрос, не начатый через столько секунд после срока, считается просроченным
+OVERDUE_AFTER = 60
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))
+# Сколько секунд при остановке ждать отправки очереди сообщений
+OUTBOX_DRAIN_TIMEOUT = 30
+# В течение скольких секунд после перезапуска распределить опросы,
+# срок которых прошёл, пока процесс не работал
+CATCHUP_SPREAD = 60
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Tenant:
+    """Студент: токен API Практикума и чат для уведомлений."""
+
+    tenant_id: str
+    practicum_token: str
+    chat_id: str
+
+
+@dataclass
+class TenantState:
+    """Изолированное состояние опроса одного студента."""
+
+    # курсор from_date: current_date из последнего обработанного ответа
+    timestamp: int = 0
+    # последние отправленные статусы работ студента
+    statuses: state.StatusIndex = field(default_factory=state.StatusIndex)
+    # какие сообщения о сбоях отправлять (alerts.py)
+    reporter: alerts.ErrorReporter = field(
+        default_factory=alerts.ErrorReporter
+    )
+    # когда последний раз менялся статус какой-либо работы (unixtime)
+    changed_at: float = field(default_factory=time.time)
+    # валидаторы последнего обработанного ответа API
+    cache: response_cache.ResponseCache = field(
+        default_factory=response_cache.ResponseCache
+    )
+    # опрос и уведомление webhook.py не обрабатывают работы одновременно
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # обслуживает ли студента этот процесс (см. sharding.py)
+    owned: bool = True
+    # работы, сообщения о которых ещё в очереди: ключ -> новый статус
+    undelivered: Dict[str, str] = field(default_factory=dict)
+    # курсор, на который можно сдвинуться, когда они будут доставлены
+    next_timestamp: Optional[int] = None
+
+    def advance(self, timestamp):
+        """Сдвигает курсор, как только доставлены все сообщения.
+
+        Пока сообщение о работе не доставлено, курсор стоит на месте:
+        если очередь его отбросит, следующий ответ API снова вернёт
+        работу, и её статус, ещё не запомненный в statuses, снова
+        попадёт в очередь отправки. Вызывается под lock.
+        """
+        if self.undelivered:
+            self.next_timestamp = timestamp
+        else:
+            self.timestamp = timestamp
+            self.next_timestamp = None
+
+    def delivered(self, key, status) -> bool:
+        """Запоминает доставленный статус; True, если курсор сдвинулся."""
+        with self.lock:
+            self.statuses.remember(key, status)
+            if self.undelivered.get(key) == status:
+                del self.undelivered[key]
+            if self.undelivered or self.next_timestamp is None:
+                return False
+            self.advance(self.next_timestamp)
+            return True
+
+    def undeliverable(self, key, status):
+        """Забывает отброшенное сообщение; курсор остаётся на месте."""
+        with self.lock:
+            if self.undelivered.get(key) == status:
+                del self.undelivered[key]
+                self.next_timestamp = None
+
+
+def load_tenants(path) -> List[Tenant]:
+    """Загружает список студентов из JSON-файла конфигурации.
+
+    Ожидается список объектов с ключами id, practicum_token и chat_id.
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if type(data) is not list:
+        raise TypeError('Конфигурация студентов должна быть списком!')
+    tenants: Dict[str, Tenant] = {}
+    for number, item in enumerate(data):
+        for key in ('id', 'practicum_token', 'chat_id'):
+            if item.get(key) in (None, ''):
+                raise KeyError(
+                    f'Ключ {key} отсутствует у студента №{number}'
+                )
+        tenant_id = str(item['id'])
+        if tenant_id in tenants:
+            raise ValueError(f'Студент {tenant_id} указан дважды')
+        tenants[tenant_id] = Tenant(
+            tenant_id=tenant_id,
+            practicum_token=item['practicum_token'],
+            chat_id=str(item['chat_id']),
+        )
+    return list(tenants.values())
+
+
+class Poller:
+    """Планировщик опроса множества студентов в одном событийном цикле.
+
+    Очередь опросов хранится в куче по времени следующего запуска,
+    поэтому на каждом шаге обрабатываются только студенты, которым
+    пора в опрос, а не весь список.
+    """
+
+    def __init__(self, tenants, bot,
+                 max_in_flight=MAX_IN_FLIGHT,
+                 retry_period=homework.RETRY_PERIOD,
+                 session=None,
+                 store=None,
+                 outbox=None,
+                 policy=None,
+                 breaker=None,
+                 shard=None,
+                 snapshot_path=None):
+        self.bot = bot
+        # Сообщения отправляются через очередь с лимитами Telegram
+        if outbox is None:
+            outbox = send_queue.SendQueue(bot)
+        self.outbox = outbox
+        # Одна сессия на все циклы и всех студентов
+        self.session = session or http_session.get_session()
+        self.tenants = {tenant.tenant_id: tenant for tenant in tenants}
+        # Курсоры и отправленные статусы студентов хранятся в SQLite
+        self.store = store or state_store.StateStore()
+        # доставленные смены статусов всех студентов (history.py)
+        self.history = history.StatusHistory()
+        self.states = {
+            tenant_id: self._restore_state(tenant_id)
+            for tenant_id in self.tenants
+        }
+        self.max_in_flight = max_in_flight
+        # retry_period - базовый интервал, политика сдвигает его
+        # в зависимости от статусов работ студента
+        self.policy = policy or scheduler.PollPolicy(retry_period)
+        # Автомат защиты общий для всех студентов одного эндпоинта
+        self.breaker = breaker or circuit_breaker.for_endpoint(
+            homework.ENDPOINT
+        )
+        # sharding.Membership: какие студенты достались этому процессу
+        self.shard = shard
+        # файл снимка для тёплого перезапуска (snapshot.py)
+        self.snapshot_path = snapshot_path
+        self._schedule = []
+        # студенты других процессов: их нет в расписании, пока кольцо
+        # шардирования не изменится
+        self._parked = set()
+        self._ring_version = None
+        self._tasks = set()
+        self._stopped = None
+        # показатели этого опросчика; снимаются в release_metrics()
+        self._gauges = [
+            ('homework_poller_tenants', 'Число студентов',
+             lambda: len(self.tenants)),
+            ('homework_poller_tenants_due',
+             'Студенты, срок опроса которых наступил',
+             lambda: self.count_due(0)),
+            ('homework_poller_tenants_overdue',
+             f'Студенты, опрос которых опаздывает более {OVERDUE_AFTER} с',
+             lambda: self.count_due(OVERDUE_AFTER)),
+            ('homework_send_queue_depth',
+             'Сообщения, ожидающие отправки в Telegram',
+             lambda: len(self.outbox)),
+            ('homework_send_in_progress',
+             'Сообщения, отправляемые в Telegram прямо сейчас',
+             lambda: self.outbox.busy),
+            ('homework_circuit_breaker_open',
+             'Разомкнут ли автомат защиты API (1 - да)',
+             lambda: int(self.breaker.state != circuit_breaker.CLOSED)),
+            ('homework_shard_tenants_owned',
+             'Студенты, которых обслуживает этот процесс',
+             lambda: sum(
+                 tenant_state.owned for tenant_state in self.states.values()
+             )),
+        ]
+        for name, documentation, function in self._gauges:
+            metrics.REGISTRY.gauge(name, documentation, function)
+
+    def release_metrics(self):
+        """Снимает показатели опросчика с общего реестра метрик.
+
+        Функции показателей держат ссылку на опросчик; показатель, который
+        уже перерегистрировал другой опросчик, остаётся.
+        """
+        for name, _, function in self._gauges:
+            metrics.REGISTRY.unregister(name, function)
+
+    def _restore_state(self, tenant_id) -> TenantState:
+        """Восстанавливает состояние студента из хранилища."""
+        return TenantState(
+            timestamp=self.store.get(tenant_id, 0),
+            statuses=state.StatusIndex(self.store.statuses(tenant_id))
+        )
+
+    def owns(self, tenant_id) -> bool:
+        """Обслуживает ли студента этот процесс.
+
+        Студент, перешедший от другого процесса, получает состояние,
+        сохранённое прежним владельцем.
+        """
+        if self.shard is None:
+            return True
+        tenant_state = self.states[tenant_id]
+        if not self.shard.owns(tenant_id):
+            tenant_state.owned = False
+            return False
+        if not tenant_state.owned:
+            cursor, statuses = self.store.reload(tenant_id)
+            self.states[tenant_id] = TenantState(
+                timestamp=cursor or 0,
+                statuses=state.StatusIndex(statuses)
+            )
+        return True
+
+    def fetch(self, tenant, timestamp) -> dict:
+        """Запрашивает API и сообщает автомату защиты об исходе запроса."""
+        try:
+            response = homework.fetch_homework_statuses(
+                tenant.practicum_token, timestamp, session=self.session,
+                cache=self.states[tenant.tenant_id].cache
+            )
+        except Exception as error:
+            if circuit_breaker.is_endpoint_failure(error):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def poll_tenant(self, tenant_id) -> bool:
+        """Один цикл опроса студента: запрос, проверка, уведомления.
+
+        Повторяет логику homework.main() для одного студента, но хранит
+        статусы работ в его собственном TenantState. Сообщения уходят в
+        очередь отправки, а статус сохраняется в хранилище только после
+        доставки сообщения. Возвращает False, если запрос не отправлялся:
+        студента обслуживает другой процесс или автомат защиты разомкнут.
+        """
+        if not self.owns(tenant_id) or not self.breaker.allow():
+            return False
+        tenant = self.tenants[tenant_id]
+        tenant_state = self.states[tenant_id]
+        timestamp = tenant_state.timestamp or int(time.time())
+        try:
+            with tracing.trace('cycle', tenant=tenant_id):
+                response = self.fetch(tenant, timestamp)
+                homeworks = homework.check_response(response)
+                self.process(
+                    tenant_id, homeworks, response['current_date']
+                )
+        except Exception as error:
+            message = f'Сбой в работе программы: {error}'
+            logger.error('Студент %s: %s', tenant_id, message, exc_info=True)
+            self.notify(tenant_id, tenant_state.reporter.failure(error))
+            return True
+        self.notify(tenant_id, tenant_state.reporter.success())
+        with tenant_state.lock:
+            # Ответ обработан - следующий такой же можно не разбирать.
+            # Пока сообщения не доставлены, валидаторы не принимаются:
+            # иначе после отброшенного сообщения совпавший ответ (или 304)
+            # не вернул бы работу, а курсор ушёл бы дальше неё.
+            if not tenant_state.undelivered and (
+                tenant_state.next_timestamp is None
+            ):
+                tenant_state.cache.commit()
+        return True
+
+    def notify(self, tenant_id, text):
+        """Ставит в очередь сообщение о сбое или восстановлении, если есть."""
+        if text:
+            self.outbox.put(
+                self.tenants[tenant_id].chat_id, text, key=(tenant_id, None)
+            )
+
+    def delivered(self, tenant_id, key, status):
+        """Запоминает и сохраняет статус работы после доставки сообщения."""
+        tenant_state = self.states[tenant_id]
+        advanced = tenant_state.delivered(key, status)
+        self.store.record_status(tenant_id, key, status)
+        if advanced:
+            self.store.advance(tenant_id, tenant_state.timestamp)
+        self.history.record(tenant_id, key, status)
+
+    def enqueue(self, tenant_id, key, status, text):
+        """Ставит в очередь сообщение о новом статусе работы."""
+        tenant_state = self.states[tenant_id]
+        tenant_state.undelivered[key] = status
+        self.outbox.put(
+            self.tenants[tenant_id].chat_id, text, key=(tenant_id, key),
+            on_sent=functools.partial(self.delivered, tenant_id, key, status),
+            on_failed=functools.partial(
+                tenant_state.undeliverable, key, status
+            )
+        )
+
+    def process(self, tenant_id, homeworks, current_date=None) -> int:
+        """Ставит в очередь сообщения по работам со сменившимся статусом.
+
+        Статус запоминается и сохраняется в хранилище только после
+        доставки сообщения. current_date - время сервера из ответа API:
+        курсор сдвигается на него, когда все сообщения доставлены.
+        Возвращает число поставленных в очередь сообщений.
+        """
+        tenant_state = self.states[tenant_id]
+
+        def send(text, homework_):
+            self.enqueue(
+                tenant_id, tenant_state.statuses.key(homework_),
+                homework_['status'], text
+            )
+
+        with tenant_state.lock:
+            if not tenant_state.owned:
+                # студент перешёл к другому процессу во время опроса
+                return 0
+            undelivered = tenant_state.undelivered
+            # сообщение о таком статусе уже ждёт отправки
+            homeworks = [
+                homework_ for homework_ in homeworks
+                if undelivered.get(tenant_state.statuses.key(homework_))
+                != homework_.get('status')
+            ]
+            sent = homework.send_new_statuses(
+                tenant_state.statuses, homeworks, send, commit=False
+            )
+            if current_date is not None:
+                tenant_state.advance(current_date)
+        if sent:
+            tenant_state.changed_at = time.time()
+        return sent
+
+    def push(self, tenant_id, homeworks) -> int:
+        """Обрабатывает работы из уведомления webhook.py.
+
+        Выбрасывает KeyError, если студент не найден или его
+        обслуживает другой процесс.
+        """
+        if tenant_id not in self.tenants or not self.owns(tenant_id):
+            raise KeyError(tenant_id)
+        return self.process(tenant_id, homeworks)
+
+    def next_interval(self, tenant_id, polled=True) -> float:
+        """Интервал до следующего опроса студента.
+
+        Учитывает статусы работ студента и состояние автомата защиты:
+        пока API недоступен, опрос откладывается до пробного запроса.
+        """
+        tenant_state = self.states[tenant_id]
+        if not tenant_state.owned:
+            # студент перешёл к этому процессу или кольцо изменилось
+            # во время опроса: проверяем после задержки передачи
+            return self.shard.handoff_delay * (1 + random.random())
+        interval = self.policy.next_interval(
+            reviewing=tenant_state.statuses.count('reviewing') > 0,
+            idle_for=time.time() - tenant_state.changed_at
+        )
+        retry_in = self.breaker.retry_in()
+        if not retry_in:
+            return interval
+        if not polled:
+            # Пропущенный опрос повторяем сразу после паузы автомата,
+            # с разбросом, чтобы студенты не пришли все в одну секунду
+            return retry_in + random.random() * circuit_breaker.PROBE_DELAY
+        return max(interval, retry_in)
+
+    def count_due(self, late_by=0) -> int:
+        """Число студентов, чей опрос должен был начаться late_by с назад."""
+        deadline = time.monotonic() - late_by
+        return sum(1 for due, _ in list(self._schedule) if due <= deadline)
+
+    def schedule(self, tenant_id, due):
+        """Ставит опрос студента в очередь на момент due (monotonic)."""
+        heapq.heappush(self._schedule, (due, tenant_id))
+
+    def park(self, tenant_id, ring_version) -> bool:
+        """Убирает из расписания студента другого процесса.
+
+        Студент, который достался этому процессу и ждёт только задержки
+        передачи, не убирается; не убирается и студент, кольцо для
+        которого изменилось за время опроса.
+        """
+        shard = self.shard
+        if (
+            shard is None or shard.assigned(tenant_id)
+            or shard.version != ring_version
+        ):
+            return False
+        self._parked.add(tenant_id)
+        return True
+
+    def unpark(self):
+        """Возвращает убранных студентов в расписание при смене кольца.
+
+        Перешедших студентов этот процесс проверит через задержку
+        передачи; оставшиеся чужими снова уберутся после проверки.
+        Студентов, ушедших к другому процессу, он отдаёт сразу (release).
+        """
+        if self.shard is None or self.shard.version == self._ring_version:
+            return
+        self._ring_version = self.shard.version
+        for tenant_id, tenant_state in self.states.items():
+            if tenant_state.owned and not self.shard.assigned(tenant_id):
+                self.release(tenant_id)
+        delay = self.shard.handoff_delay
+        now = time.monotonic()
+        for tenant_id in self._parked:
+            self.schedule(tenant_id, now + delay * (1 + random.random()))
+        self._parked.clear()
+
+    def release(self, tenant_id) -> int:
+        """Отдаёт студента другому процессу: убирает его сообщения.
+
+        Статусы неотправленных сообщений не сохранены, а курсор стоит на
+        месте, поэтому новый владелец найдёт эти работы сам; отправь их и
+        прежний владелец, сообщение пришло бы дважды. Опрос, идущий в
+        этот момент, новых сообщений уже не поставит (см. process()).
+        Возвращает число убранных сообщений.
+        """
+        tenant_state = self.states[tenant_id]
+        with tenant_state.lock:
+            tenant_state.owned = False
+            tenant_state.undelivered.clear()
+            tenant_state.next_timestamp = None
+            discarded = self.outbox.discard(
+                lambda key: isinstance(key, tuple) and key[0] == tenant_id
+            )
+        if discarded:
+            logger.info(
+                'Студент %s перешёл к другому процессу, сообщений убрано: %d',
+                tenant_id, discarded
+            )
+        return discarded
+
+    def snapshot(self) -> dict:
+        """Снимок того, чего нет в хранилище состояния.
+
+        Для каждого студента - срок следующего опроса (unixtime), время
+        смены статуса, продолжающиеся сбои и валидаторы ответа API; для
+        каждого неотправленного сообщения - студент, ключ и статус работы.
+        """
+        now_monotonic, now = time.monotonic(), time.time()
+        due = {
+            tenant_id: now + max(0.0, at - now_monotonic)
+            for at, tenant_id in self._schedule
+        }
+        tenants = {}
+        for tenant_id, tenant_state in self.states.items():
+            cache = tenant_state.cache
+            tenants[tenant_id] = [
+                due.get(tenant_id), tenant_state.changed_at,
+                tenant_state.reporter.dump(), cache.etag, cache.last_modified,
+                cache.digest.hex() if cache.digest else None,
+            ]
+        outbox = []
+        for message in self.outbox.pending():
+            if not isinstance(message.key, tuple):
+                continue
+            tenant_id, key = message.key
+            status = None
+            if key is not None:
+                status = self.states[tenant_id].undelivered.get(key)
+            outbox.append([tenant_id, key, status, message.text])
+        return {'tenants': tenants, 'outbox': outbox}
+
+    def restore(self, saved):
+        """Восстанавливает снимок и планирует опросы по его расписанию.
+
+        Опросы, срок которых прошёл, распределяются по CATCHUP_SPREAD
+        секундам, а не запускаются все сразу.
+        """
+        now_monotonic, now = time.monotonic(), time.time()
+        tenants = saved.get('tenants', {})
+        for tenant_id in self.tenants:
+            due = now_monotonic
+            if tenant_id in tenants:
+                (due_at, changed_at, incidents,
+                 etag, last_modified, digest) = tenants[tenant_id]
+                tenant_state = self.states[tenant_id]
+                tenant_state.changed_at = changed_at
+                # сбой, о котором уже сообщили, не повторяется после
+                # перезапуска, а восстановление будет замечено
+                tenant_state.reporter.load(incidents)
+                cache = tenant_state.cache
+                cache.etag, cache.last_modified = etag, last_modified
+                cache.digest = bytes.fromhex(digest) if digest else None
+                cache.not_modified()
+                if due_at is not None:
+                    delay = due_at - now
+                    if delay < 0:
+                        delay = random.random() * CATCHUP_SPREAD
+                    due = now_monotonic + delay
+            self.schedule(tenant_id, due)
+        for tenant_id, key, status, text in saved.get('outbox', []):
+            tenant = self.tenants.get(tenant_id)
+            if tenant is None:
+                continue
+            if key is not None and status is not None:
+                self.enqueue(tenant_id, key, status, text)
+                continue
+            self.outbox.put(tenant.chat_id, text, key=(tenant_id, key))
+        logger.info(
+            'Состояние восстановлено из снимка: %d студентов, %d сообщений',
+            len(tenants), len(saved.get('outbox', []))
+        )
+
+    def _schedule_start(self):
+        """Планирует первые опросы: по снимку или всех студентов сразу."""
+        saved = None
+        if self.snapshot_path:
+            saved = snapshot.load(self.snapshot_path)
+        if saved:
+            self.restore(saved)
+            return
+        now = time.monotonic()
+        for tenant_id in self.tenants:
+            self.schedule(tenant_id, now)
+
+    def stop(self):
+        """Останавливает планирование новых опросов."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def run(self):
+        """Опрашивает студентов, пока не будет вызван stop()."""
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight,
+            thread_name_prefix='poller'
+        )
+        self._schedule_start()
+        logger.debug('Запущен опрос %d студентов', len(self.tenants))
+        self.outbox.start()
+        try:
+            while not self._stopped.is_set():
+                self.unpark()
+                now = time.monotonic()
+                while self._schedule and self._schedule[0][0] <= now:
+                    # Семафор ограничивает число запросов «в полёте»:
+                    # пока все слоты заняты, новые опросы ждут здесь.
+                    await semaphore.acquire()
+                    if self._stopped.is_set():
+                        semaphore.release()
+                        break
+                    _, tenant_id = heapq.heappop(self._schedule)
+                    task = loop.create_task(
+                        self._poll(loop, executor, semaphore, tenant_id)
+                    )
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                delay = SCHEDULER_TICK
+                if self._schedule:
+                    delay = min(
+                        delay, max(0, self._schedule[0][0] - time.monotonic())
+                    )
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            executor.shutdown(wait=True)
+            self.outbox.stop(timeout=OUTBOX_DRAIN_TIMEOUT)
+            self.store.flush()
+            if self.snapshot_path:
+                snapshot.save(self.snapshot_path, self.snapshot())
+            self.release_metrics()
+
+    async def _poll(self, loop, executor, semaphore, tenant_id):
+        """Выполняет опрос студента в пуле потоков и планирует следующий."""
+        polled = True
+        ring_version = self.shard.version if self.shard else None
+        try:
+            polled = await loop.run_in_executor(
+                executor, self.poll_tenant, tenant_id
+            )
+        except Exception as error:
+            logger.error('Студент %s: сбой опроса: %s', tenant_id, error)
+        finally:
+            tenant_state = self.states[tenant_id]
+            if tenant_state.timestamp:
+                self.store.advance(tenant_id, tenant_state.timestamp)
+            semaphore.release()
+            if tenant_state.owned or not self.park(tenant_id, ring_version):
+                self.schedule(
+                    tenant_id,
+                    time.monotonic() + self.next_interval(tenant_id, polled)
+                )
+
+
+async def serve(engine):
+    """Выполняет engine.run() до сигнала SIGTERM или SIGINT.
+
+    По сигналу новые опросы не начинаются, начатые завершаются, очередь
+    сообщений отправляется за OUTBOX_DRAIN_TIMEOUT, а состояние
+    сохраняется в снимок.
+    """
+    loop = asyncio.get_running_loop()
+    for signum in shutdown.SIGNALS:
+        loop.add_signal_handler(signum, engine.stop)
+    await engine.run()
+
+
+def main():
+    """Запускает опрос всех студентов из TENANTS_FILE."""
+    if not homework.TELEGRAM_TOKEN:
+        message = (
+            'Отсутсвует обязательная переменная окружения TELEGRAM_TOKEN.'
+            ' Программа принудительно остановлена.'
+        )
+        logger.critical(message)
+        sys.exit(message)
+    tenants = load_tenants(TENANTS_FILE)
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_PORT)
+    # Пул соединений бота должен вмещать все потоки отправки
+    bot = telegram.Bot(
+        token=homework.TELEGRAM_TOKEN,
+        request=Request(con_pool_size=send_queue.SEND_WORKERS + 4)
+    )
+    policy = receiver = None
+    if webhook.WEBHOOK_PORT:
+        # статусы приходят уведомлениями, опрос только сверяет их
+        policy = scheduler.PollPolicy(
+            webhook.WEBHOOK_POLL_INTERVAL,
+            minimum=webhook.WEBHOOK_POLL_INTERVAL,
+            maximum=max(
+                webhook.WEBHOOK_POLL_INTERVAL, scheduler.MAX_POLL_INTERVAL
+            )
+        )
+    shard = sharding.Membership().start() if sharding.SHARD_DB else None
+    engine = Poller(
+        tenants, bot, policy=policy, shard=shard,
+        snapshot_path=snapshot.SNAPSHOT_FILE
+    )
+    if webhook.WEBHOOK_PORT:
+        receiver = webhook.start_receiver(engine.push)
+    try:
+        asyncio.run(serve(engine))
+    finally:
+        if receiver is not None:
+            receiver.shutdown()
+        if shard is not None:
+            shard.stop()
+        http_session.close_session()
+
+
+if __name__ == '__main__':
+    homework.init()
+    main()
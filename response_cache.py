@@ -0,0 +1,90 @@
+"""Условные запросы к API и пропуск неизменившихся ответов.
+
+Большинство опросов возвращает те же данные, что и в прошлый раз.
+ResponseCache запоминает валидаторы HTTP (ETag, Last-Modified) и хеш тела
+последнего обработанного ответа одного студента:
+- если сервер отдаёт валидаторы, запрос уходит с If-None-Match и
+  If-Modified-Since, и ответ 304 не содержит тела вовсе;
+- иначе тело сравнивается по хешу без учёта current_date (оно меняется
+  при каждом запросе), и совпавший ответ не разбирается и не проверяется.
+
+Валидаторы и хеш принимаются (commit) только после того, как ответ
+полностью обработан: ответ, на котором цикл упал, будет разобран заново.
+Опросчик (poller.py) принимает их, только когда все сообщения студента
+доставлены: отброшенное сообщение найдётся в следующем ответе.
+"""
+import hashlib
+import re
+
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(-?\d+)')
+
+
+def body_digest(body):
+    """Хеш тела ответа без current_date и само current_date.
+
+    Возвращает (None, None), если current_date в теле не найдено.
+    """
+    match = CURRENT_DATE.search(body)
+    if match is None:
+        return None, None
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(body[:match.start(1)])
+    digest.update(body[match.end(1):])
+    return digest.digest(), int(match.group(1))
+
+
+class ResponseCache:
+    """Валидаторы и хеш последнего обработанного ответа одного студента."""
+
+    __slots__ = (
+        'etag', 'last_modified', 'digest',
+        '_pending_etag', '_pending_last_modified', '_pending_digest',
+    )
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        self._pending_etag = None
+        self._pending_last_modified = None
+        self._pending_digest = None
+
+    def headers(self) -> dict:
+        """Заголовки условного запроса."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def unchanged_date(self, response):
+        """current_date из ответа, если тело совпало с обработанным.
+
+        Иначе запоминает валидаторы и хеш ответа до commit() и
+        возвращает None - ответ нужно разобрать.
+        """
+        headers = getattr(response, 'headers', None) or {}
+        self._pending_etag = headers.get('ETag')
+        self._pending_last_modified = headers.get('Last-Modified')
+        body = getattr(response, 'content', None)
+        if not isinstance(body, bytes):
+            self._pending_digest = None
+            return None
+        digest, current_date = body_digest(body)
+        self._pending_digest = digest
+        if digest is not None and digest == self.digest:
+            return current_date
+        return None
+
+    def not_modified(self):
+        """Сервер ответил 304: валидаторы остаются прежними."""
+        self._pending_etag = self.etag
+        self._pending_last_modified = self.last_modified
+        self._pending_digest = self.digest
+
+    def commit(self):
+        """Ответ обработан: его валидаторы пойдут в следующие запросы."""
+        self.etag = self._pending_etag
+        self.last_modified = self._pending_last_modified
+        self.digest = self._pending_digest
@@ -0,0 +1,51 @@
+"""Политика интервала опроса студента.
+
+Пока работа на проверке (reviewing), вердикт может прийти в любую минуту,
+поэтому студент опрашивается чаще. Если статусы давно не менялись,
+интервал постепенно растёт до верхней границы. Случайный разброс (jitter)
+не даёт тысячам студентов опрашиваться в одну и ту же секунду.
+"""
+import os
+import random
+
+MIN_POLL_INTERVAL = int(os.getenv('MIN_POLL_INTERVAL', 60))
+MAX_POLL_INTERVAL = int(os.getenv('MAX_POLL_INTERVAL', 3600))
+# Без изменений столько секунд - интервал удваивается
+IDLE_STEP = int(os.getenv('POLL_IDLE_STEP', 6 * 60 * 60))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+
+
+class PollPolicy:
+    """Вычисляет интервал до следующего опроса студента."""
+
+    def __init__(self, base, minimum=MIN_POLL_INTERVAL,
+                 maximum=MAX_POLL_INTERVAL, idle_step=IDLE_STEP,
+                 jitter=POLL_JITTER, rng=random.random):
+        if not minimum <= base <= maximum:
+            raise ValueError(
+                'Интервал опроса должен быть между '
+                f'{minimum} и {maximum} секундами'
+            )
+        self.base = base
+        self.minimum = minimum
+        self.maximum = maximum
+        self.idle_step = idle_step
+        self.jitter = jitter
+        self._rng = rng
+
+    def next_interval(self, reviewing: bool, idle_for: float) -> float:
+        """Интервал в секундах.
+
+        reviewing - есть ли у студента работы на проверке,
+        idle_for - сколько секунд статусы студента не менялись.
+        """
+        if reviewing:
+            interval = self.minimum
+        else:
+            steps = int(idle_for // self.idle_step) if self.idle_step else 0
+            # min() до возведения в степень: большой простой не даёт
+            # переполнения, а интервал всё равно упирается в maximum
+            interval = self.base * 2 ** min(steps, 32)
+        if self.jitter:
+            interval *= 1 + self.jitter * (2 * self._rng() - 1)
+        return min(self.maximum, max(self.minimum, interval))
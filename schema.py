@@ -0,0 +1,184 @@
+"""Проверка ответа API Практикум.Домашки по схеме за один проход.
+
+Схема ответа описана декларативно и заранее компилируется в функции
+проверки: конверт ответа и каждая работа из homeworks проверяются за
+один обход, а работы превращаются в компактные записи Homework. Ошибки -
+те же TypeError, KeyError и ValueError, что и раньше, но с путём до
+неверного значения, например homeworks[12].status.
+
+JSON_BACKEND=orjson включает более быстрый разбор тела ответа, если
+пакет orjson установлен; иначе используется response.json().
+"""
+import importlib.util
+import json
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import lazy
+
+# orjson импортируется при первом разборе, а не вместе с модулем
+orjson = (
+    lazy.lazy_import('orjson') if importlib.util.find_spec('orjson')
+    else None
+)
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'json')
+# Статусы, о которых бот умеет сообщать: ключи homework.HOMEWORK_VERDICTS.
+# Схема ответа их не ограничивает: работа с неизвестным статусом не должна
+# отбрасывать весь ответ, её пропускает homework.send_new_statuses()
+HOMEWORK_STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+class Field(NamedTuple):
+    """Поле словаря в схеме."""
+
+    name: str
+    type: type
+    required: bool = True
+    choices: Optional[Tuple] = None
+
+
+class Homework:
+    """Компактная запись о домашней работе из ответа API.
+
+    Хранит только то, что нужно для уведомлений. Поддерживает чтение
+    как словарь (homework['status'], homework.get('id')), поэтому
+    подходит везде, где раньше передавался словарь из ответа API.
+    """
+
+    __slots__ = ('id', 'homework_name', 'status')
+
+    def __init__(self, homework_name, status, id=None):
+        self.id = id
+        self.homework_name = homework_name
+        self.status = status
+
+    def __repr__(self):
+        return (
+            f'Homework(id={self.id!r}, homework_name='
+            f'{self.homework_name!r}, status={self.status!r})'
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return (self.id, self.homework_name, self.status) == (
+            other.id, other.homework_name, other.status
+        )
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        """Значение поля key, как у словаря."""
+        if key not in self.__slots__:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+
+HOMEWORK_SCHEMA = (
+    Field('homework_name', str),
+    Field('status', str),
+    Field('id', int, required=False),
+)
+
+
+def _type_name(value) -> str:
+    return type(value).__name__
+
+
+def compile_record(fields, record, prefix):
+    """Собирает функцию проверки словаря по схеме fields.
+
+    Возвращённая функция validate(item, index) проверяет item и создаёт
+    record с полями в порядке схемы; путь prefix[index] подставляется
+    в текст ошибки и строится только при ошибке.
+    """
+    checks = tuple(
+        (field.name, field.type, field.required,
+         frozenset(field.choices) if field.choices else None)
+        for field in fields
+    )
+
+    def validate(item, index):
+        if type(item) is not dict:
+            raise TypeError(
+                f'{prefix}[{index}]: ожидался словарь, '
+                f'получен {_type_name(item)}'
+            )
+        values = []
+        for name, expected, required, choices in checks:
+            value = item.get(name)
+            if value is None:
+                if required:
+                    raise KeyError(
+                        f'Ключ {name} отсутствует в {prefix}[{index}]'
+                    )
+            elif type(value) is not expected:
+                raise TypeError(
+                    f'{prefix}[{index}].{name}: ожидался '
+                    f'{expected.__name__}, получен {_type_name(value)}'
+                )
+            elif choices is not None and value not in choices:
+                raise ValueError(
+                    f'{prefix}[{index}].{name}: неизвестное значение '
+                    f'{value!r}'
+                )
+            values.append(value)
+        return record(*values)
+
+    return validate
+
+
+validate_homework = compile_record(HOMEWORK_SCHEMA, Homework, 'homeworks')
+
+
+def validate_response(response) -> list:
+    """Проверяет ответ API и возвращает список записей Homework.
+
+    Конверт и все работы проверяются за один проход; первая найденная
+    ошибка прерывает проверку.
+    """
+    if type(response) is not dict:
+        raise TypeError('Полученные данные не словарь!')
+    if 'current_date' not in response:
+        raise KeyError('Ключ current_date отсутствует!')
+    if type(response['current_date']) is not int:
+        raise TypeError(
+            'current_date: ожидалось целое число - время в формате unixtime,'
+            f' получен {_type_name(response["current_date"])}'
+        )
+    if 'homeworks' not in response:
+        raise KeyError('Ключ homeworks отсутствует')
+    homeworks = response['homeworks']
+    if type(homeworks) is not list:
+        raise TypeError(
+            f'homeworks: ожидался список, получен {_type_name(homeworks)}'
+        )
+    validate = validate_homework
+    return [validate(item, index) for index, item in enumerate(homeworks)]
+
+
+def loads(body, backend=None):
+    """Разбирает JSON из тела ответа (bytes) выбранным способом."""
+    backend = backend or JSON_BACKEND
+    if backend == 'orjson' and orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode(response, backend=None):
+    """Разбирает JSON из тела ответа выбранным способом.
+
+    При ошибке разбора выбрасывает ValueError, как response.json().
+    """
+    backend = backend or JSON_BACKEND
+    if backend == 'orjson' and orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
@@ -0,0 +1,349 @@
+"""Очередь исходящих сообщений Telegram с ограничением частоты.
+
+Telegram ограничивает частоту отправки: около 30 сообщений в секунду на
+бота и около одного сообщения в секунду в один чат; при превышении он
+отвечает 429 с параметром retry_after. Очередь соблюдает оба ограничения
+с помощью «ведёр токенов», выдерживает паузу retry_after и сливает
+сообщения: пока сообщение ждёт отправки, более новый статус той же работы
+заменяет его текст, а не встаёт в очередь вторым сообщением. Сообщение,
+которое не удалось отправить по другой причине, повторяется с растущей
+паузой до SEND_ATTEMPTS раз.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import telegram
+
+import exceptions
+import homework
+import tracing
+
+# Ограничения Telegram: сообщений в секунду на бота и в один чат
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+# Потоков отправки: каждый вызов Telegram блокирует поток на время запроса
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', 4))
+# Попыток отправки сообщения и пауза перед первым повтором, секунды;
+# каждая следующая пауза вдвое длиннее
+SEND_ATTEMPTS = int(os.getenv('SEND_ATTEMPTS', 5))
+SEND_RETRY_DELAY = float(os.getenv('SEND_RETRY_DELAY', 1))
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+
+    def _refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    def delay(self, now) -> float:
+        """Сколько секунд ждать до появления токена."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        """Забирает один токен."""
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass
+class OutgoingMessage:
+    """Сообщение, ожидающее отправки."""
+
+    chat_id: str
+    text: str
+    key: object
+    # Вызывается после успешной доставки сообщения
+    on_sent: Optional[Callable] = None
+    # Вызывается, если сообщение не отправлено за все попытки
+    on_failed: Optional[Callable] = None
+    # Неудачных попыток отправки, не считая пауз retry_after
+    attempts: int = 0
+    # Интервал трассы, в которой сообщение поставлено в очередь
+    parent: object = None
+    # Отменено через discard(), пока отправлялось: не повторяется
+    cancelled: bool = False
+
+
+class SendQueue:
+    """Очередь отправки с ограничением частоты и слиянием сообщений.
+
+    Сообщения отправляет пул из workers потоков, поэтому медленный ответ
+    Telegram не задерживает ни опрос API, ни другие сообщения. Сообщения
+    одного чата отправляются по порядку, а чат, исчерпавший свой лимит,
+    не задерживает остальные чаты.
+    """
+
+    def __init__(self, bot,
+                 global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE,
+                 workers=SEND_WORKERS,
+                 attempts=SEND_ATTEMPTS,
+                 retry_delay=SEND_RETRY_DELAY):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.workers = workers
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self._global = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        # ключ -> сообщение и очереди ключей по чатам
+        self._messages = {}
+        self._chats = {}
+        # куча (не раньше, порядковый номер, чат) готовых к отправке чатов
+        self._ready = []
+        # чаты, сообщение которых отправляется прямо сейчас -> сообщение
+        self._busy = {}
+        self._paused_until = 0.0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads = []
+
+    def __len__(self):
+        with self._cond:
+            return len(self._messages)
+
+    def put(self, chat_id, text, key=None, on_sent=None, on_failed=None):
+        """Ставит сообщение в очередь.
+
+        Если сообщение с тем же key ещё не отправлено, его текст
+        заменяется новым.
+        """
+        with self._cond:
+            if key is None:
+                key = object()
+            message = self._messages.get(key)
+            if message is not None:
+                message.text = text
+                message.on_sent = on_sent
+                message.on_failed = on_failed
+                message.parent = tracing.current()
+                self.coalesced += 1
+                return
+            self._messages[key] = OutgoingMessage(
+                chat_id, text, key, on_sent, on_failed,
+                parent=tracing.current()
+            )
+            keys = self._chats.setdefault(chat_id, deque())
+            keys.append(key)
+            if len(keys) == 1 and chat_id not in self._busy:
+                self._push_chat(chat_id, time.monotonic())
+            self._cond.notify_all()
+
+    def pending(self) -> list:
+        """Неотправленные сообщения в порядке очередей чатов."""
+        with self._cond:
+            return [
+                self._messages[key]
+                for keys in self._chats.values() for key in keys
+            ]
+
+    def discard(self, match) -> int:
+        """Убирает из очереди сообщения, для ключа которых match() истинно.
+
+        Сообщение, которое уже отправляется, отменить нельзя, но при
+        неудаче оно не повторяется. Обработчики исхода отменённых
+        сообщений не вызываются. Возвращает число убранных сообщений.
+        """
+        with self._cond:
+            keys = [key for key in self._messages if match(key)]
+            for key in keys:
+                message = self._messages.pop(key)
+                chat = self._chats[message.chat_id]
+                chat.remove(key)
+                if not chat:
+                    del self._chats[message.chat_id]
+            for message in self._busy.values():
+                if match(message.key):
+                    message.cancelled = True
+            if keys:
+                # чаты без сообщений не должны остаться в очереди готовых
+                self._ready = [
+                    item for item in self._ready if item[2] in self._chats
+                ]
+                heapq.heapify(self._ready)
+                self._cond.notify_all()
+            return len(keys)
+
+    @property
+    def busy(self) -> int:
+        """Число сообщений, отправляемых прямо сейчас."""
+        return len(self._busy)
+
+    def start(self):
+        """Запускает потоки отправки."""
+        self._stopping = False
+        self._threads = [
+            threading.Thread(
+                target=self._worker, name=f'send-queue-{number}', daemon=True
+            )
+            for number in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def drain(self, timeout=None) -> bool:
+        """Ждёт отправки всех сообщений; False, если не успели."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._messages and not self._busy, timeout
+            )
+
+    def stop(self, timeout=None):
+        """Отправляет оставшиеся сообщения за timeout и останавливает пул."""
+        if not self.drain(timeout):
+            logger.error(
+                'Не отправлено сообщений при остановке: %d', len(self)
+            )
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    def _push_chat(self, chat_id, now, delay=0.0):
+        not_before = now + max(delay, self._bucket(chat_id).delay(now))
+        heapq.heappush(self._ready, (not_before, next(self._seq), chat_id))
+
+    def _take(self) -> Optional[OutgoingMessage]:
+        """Ждёт сообщение, которое можно отправить, не нарушая лимиты."""
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                now = time.monotonic()
+                wait = None
+                if self._ready:
+                    wait = max(self._ready[0][0], self._paused_until) - now
+                    if wait <= 0:
+                        wait = self._global.delay(now)
+                        if wait <= 0:
+                            break
+                self._cond.wait(wait)
+            _, _, chat_id = heapq.heappop(self._ready)
+            keys = self._chats[chat_id]
+            message = self._messages.pop(keys.popleft())
+            if not keys:
+                del self._chats[chat_id]
+            self._global.consume(now)
+            self._bucket(chat_id).consume(now)
+            self._busy[chat_id] = message
+            return message
+
+    def _done(self, message, sent, retry_after=None) -> bool:
+        """Возвращает чат в очередь после попытки отправки.
+
+        Возвращает True, если сообщение отброшено после всех попыток
+        (отменённое через discard() отброшенным не считается).
+        """
+        with self._cond:
+            now = time.monotonic()
+            chat_id = message.chat_id
+            self._busy.pop(chat_id, None)
+            delay = 0.0
+            retry = retry_after is not None
+            if sent:
+                self.sent += 1
+            elif retry:
+                self._paused_until = max(
+                    self._paused_until, now + retry_after
+                )
+            else:
+                message.attempts += 1
+                retry = message.attempts < self.attempts
+                if retry:
+                    delay = self.retry_delay * 2 ** (message.attempts - 1)
+                else:
+                    self.failed += 1
+                    logger.error(
+                        'Сообщение в чат %s не отправлено за %d попыток',
+                        chat_id, message.attempts
+                    )
+            if message.cancelled:
+                retry = False
+            # Сообщение возвращается в начало очереди чата,
+            # если его ещё не заменило более новое
+            if retry and message.key not in self._messages:
+                self._messages[message.key] = message
+                self._chats.setdefault(chat_id, deque()).appendleft(
+                    message.key
+                )
+            if self._chats.get(chat_id):
+                self._push_chat(chat_id, now, delay)
+            self._cond.notify_all()
+            return not sent and not retry and not message.cancelled
+
+    @staticmethod
+    def _notify(callback):
+        """Вызывает обработчик исхода отправки, не останавливая поток."""
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as error:
+            logger.error('Ошибка обработки исхода отправки: %s', error)
+
+    def _worker(self):
+        """Поток пула отправки сообщений из очереди."""
+        while True:
+            message = self._take()
+            if message is None:
+                return
+            sent = False
+            retry_after = None
+            try:
+                with tracing.attach(message.parent):
+                    homework.send_chat_message(
+                        self.bot, message.chat_id, message.text
+                    )
+            except exceptions.TelegramError as error:
+                if isinstance(error.error, telegram.error.RetryAfter):
+                    retry_after = error.error.retry_after
+                    logger.warning(
+                        'Telegram просит подождать %s с', retry_after
+                    )
+            except Exception as error:
+                # сбой вне Telegram не должен останавливать поток
+                # и оставлять чат занятым
+                logger.error(
+                    'Сбой отправки сообщения: %s', error, exc_info=True
+                )
+            else:
+                sent = True
+                self._notify(message.on_sent)
+            finally:
+                dropped = self._done(message, sent, retry_after)
+            if dropped:
+                self._notify(message.on_failed)
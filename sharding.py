@@ -0,0 +1,169 @@
+"""Распределение студентов между несколькими процессами poller.py.
+
+Каждый процесс (воркер) арендует место в общей базе SHARD_DB и продлевает
+аренду раз в LEASE_TTL / 3 секунд. Живые воркеры образуют кольцо
+согласованного хеширования, и студент обслуживается тем воркером, которому
+его id принадлежит на кольце. Когда воркер падает (аренда истекает) или
+добавляется новый, на другой воркер переходят только студенты, чей
+участок кольца изменился.
+
+Новый владелец начинает опрос перешедшего студента через handoff_delay
+после изменения кольца - за это время прежний успевает его увидеть. Увидев
+его, прежний владелец убирает из очереди сообщения перешедших студентов и
+не ставит новых (Poller.release): их статусы не сохранены, курсор стоит
+на месте, и новый владелец найдёт эти работы сам. Дважды может прийти
+только сообщение, которое уже отправлялось в момент передачи.
+"""
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Пустое значение - шардирование выключено, процесс опрашивает всех
+SHARD_DB = os.getenv('SHARD_DB', '')
+SHARD_WORKER_ID = os.getenv(
+    'SHARD_WORKER_ID', f'{socket.gethostname()}-{os.getpid()}'
+)
+LEASE_TTL = float(os.getenv('SHARD_LEASE_TTL', 30))
+# Точек каждого воркера на кольце: чем больше, тем ровнее распределение
+RING_REPLICAS = 64
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS leases ('
+    ' worker_id TEXT PRIMARY KEY,'
+    ' expires_at REAL NOT NULL'
+    ') WITHOUT ROWID'
+)
+UPSERT_LEASE = (
+    'INSERT INTO leases (worker_id, expires_at) VALUES (?, ?)'
+    ' ON CONFLICT (worker_id) DO UPDATE SET expires_at = excluded.expires_at'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key) -> int:
+    digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными точками."""
+
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        self.nodes = frozenset(nodes)
+        points = sorted(
+            (_hash(f'{node}#{replica}'), node)
+            for node in self.nodes for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key):
+        """Воркер, которому принадлежит key; None для пустого кольца."""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+class Membership:
+    """Аренда места воркера в общей базе SQLite и текущее кольцо."""
+
+    def __init__(self, path=SHARD_DB, worker_id=SHARD_WORKER_ID,
+                 lease_ttl=LEASE_TTL, clock=time.time):
+        self.path = path
+        self.worker_id = worker_id
+        self.lease_ttl = lease_ttl
+        # за это время все воркеры успевают увидеть новое кольцо
+        self.handoff_delay = lease_ttl / 3
+        self._clock = clock
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=10
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(SCHEMA)
+        self._lock = threading.Lock()
+        self.ring = HashRing()
+        # растёт при каждом изменении кольца
+        self.version = 0
+        self._previous = HashRing()
+        self._changed_at = 0.0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def heartbeat(self) -> HashRing:
+        """Продлевает аренду и перестраивает кольцо по живым воркерам."""
+        now = self._clock()
+        with self._lock:
+            with self._conn:
+                self._conn.execute('BEGIN IMMEDIATE')
+                self._conn.execute(
+                    UPSERT_LEASE, (self.worker_id, now + self.lease_ttl)
+                )
+                self._conn.execute(
+                    'DELETE FROM leases WHERE expires_at < ?', (now,)
+                )
+                workers = {
+                    worker_id for worker_id, in self._conn.execute(
+                        'SELECT worker_id FROM leases'
+                    )
+                }
+            if workers != self.ring.nodes:
+                logger.info(
+                    'Воркеры: %s (было %d)',
+                    ', '.join(sorted(workers)), len(self.ring.nodes)
+                )
+                self._previous = self.ring
+                self.ring = HashRing(workers)
+                self._changed_at = now
+                self.version += 1
+            return self.ring
+
+    def owns(self, key) -> bool:
+        """Обслуживает ли этот воркер студента key.
+
+        Перешедшего студента воркер берёт только через handoff_delay
+        после изменения кольца.
+        """
+        with self._lock:
+            if self.ring.owner(key) != self.worker_id:
+                return False
+            if self._previous.owner(key) == self.worker_id:
+                return True
+            return self._clock() - self._changed_at >= self.handoff_delay
+
+    def assigned(self, key) -> bool:
+        """Принадлежит ли key этому воркеру на кольце, даже до передачи."""
+        return self.ring.owner(key) == self.worker_id
+
+    def start(self):
+        """Занимает место в кольце и продлевает аренду в фоне."""
+        self.heartbeat()
+        self._thread = threading.Thread(
+            target=self._heartbeat_loop, name='shard-lease', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Освобождает место: студенты сразу переходят к другим воркерам."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM leases WHERE worker_id = ?', (self.worker_id,)
+            )
+            self._conn.close()
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.lease_ttl / 3):
+            try:
+                self.heartbeat()
+            except sqlite3.Error as error:
+                logger.error('Не удалось продлить аренду: %s', error)
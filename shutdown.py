@@ -0,0 +1,48 @@
+"""Корректное завершение синхронного цикла по SIGTERM и SIGINT.
+
+Сигнал, пришедший во время паузы между циклами, прерывает её сразу;
+сигнал во время цикла дожидается его окончания, и пауза уже не
+начинается. В обоих случаях выбрасывается SystemExit, поэтому блоки
+finally (сохранение состояния) выполняются.
+"""
+import signal
+from contextlib import contextmanager
+
+SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class GracefulShutdown:
+    """Обработчик сигналов остановки для цикла с паузой."""
+
+    def __init__(self):
+        self.requested = False
+        self._sleeping = False
+        self._previous = {}
+
+    def install(self):
+        """Устанавливает обработчики; вызывается из главного потока."""
+        for signum in SIGNALS:
+            self._previous[signum] = signal.signal(signum, self.handle)
+        return self
+
+    def uninstall(self):
+        """Возвращает прежние обработчики сигналов."""
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous = {}
+
+    def handle(self, signum, frame):
+        self.requested = True
+        if self._sleeping:
+            raise SystemExit(0)
+
+    @contextmanager
+    def pause(self):
+        """Пауза, которую сигнал остановки прерывает немедленно."""
+        self._sleeping = True
+        try:
+            if self.requested:
+                raise SystemExit(0)
+            yield
+        finally:
+            self._sleeping = False
@@ -0,0 +1,59 @@
+"""Снимок состояния poller.py для тёплого перезапуска.
+
+При остановке по SIGTERM/SIGINT poller.py сохраняет в SNAPSHOT_FILE то,
+чего нет в хранилище состояния: когда опрашивать каждого студента,
+продолжающиеся сбои (alerts.py), валидаторы последнего ответа API и
+сообщения, которые не успели уйти в Telegram. При старте снимок загружается и удаляется:
+опрос продолжается по прежнему расписанию, без повторных сообщений и без
+одновременного опроса всех студентов.
+"""
+import json
+import logging
+import os
+import time
+
+SNAPSHOT_FILE = os.getenv('SNAPSHOT_FILE', 'poller.snapshot')
+# Более старый снимок не используется: расписание в нём неактуально
+SNAPSHOT_MAX_AGE = float(os.getenv('SNAPSHOT_MAX_AGE', 24 * 60 * 60))
+SNAPSHOT_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+def save(path, data):
+    """Атомарно записывает снимок: файл либо прежний, либо новый целиком."""
+    data = dict(data, version=SNAPSHOT_VERSION, saved_at=time.time())
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, separators=(',', ':'))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load(path, max_age=SNAPSHOT_MAX_AGE):
+    """Читает и удаляет снимок; None, если его нет или он непригоден.
+
+    Снимок используется один раз: после аварийного завершения старый
+    снимок не должен снова поставить в очередь отправленные сообщения.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as error:
+        logger.error('Снимок состояния не прочитан: %s', error)
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    if type(data) is not dict or data.get('version') != SNAPSHOT_VERSION:
+        logger.warning('Снимок состояния другой версии пропущен')
+        return None
+    if time.time() - data.get('saved_at', 0) > max_age:
+        logger.warning('Снимок состояния устарел и пропущен')
+        return None
+    return data
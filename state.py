@@ -0,0 +1,63 @@
+"""Индекс последних известных статусов домашних работ студента."""
+from collections import Counter
+from typing import Dict, List
+
+
+class StatusIndex:
+    """Статусы домашних работ студента по ключу id или homework_name.
+
+    diff() сравнивает ответ API с индексом и возвращает только работы,
+    у которых статус действительно сменился, поэтому сообщения
+    формируются лишь для изменившихся работ.
+    """
+
+    def __init__(self, statuses=None, on_commit=None):
+        self._statuses: Dict[str, str] = statuses or {}
+        # число работ в каждом статусе, без обхода всего индекса
+        self._counts = Counter(self._statuses.values())
+        # on_commit(key, status) сохраняет статус во внешнем хранилище
+        self._on_commit = on_commit
+
+    def __len__(self):
+        return len(self._statuses)
+
+    @staticmethod
+    def key(homework: dict) -> str:
+        """Ключ работы: id, а если его нет - название работы."""
+        if homework.get('id') is not None:
+            return str(homework['id'])
+        return homework.get('homework_name')
+
+    def count(self, status) -> int:
+        """Число работ в статусе status."""
+        return self._counts[status]
+
+    def get(self, key):
+        """Возвращает последний известный статус работы."""
+        return self._statuses.get(key)
+
+    def diff(self, homeworks: List[dict]) -> List[dict]:
+        """Отбирает работы, статус которых отличается от известного."""
+        statuses = self._statuses
+        return [
+            homework for homework in homeworks
+            if statuses.get(self.key(homework)) != homework.get('status')
+        ]
+
+    def commit(self, homework: dict):
+        """Запоминает статус работы после успешной отправки уведомления."""
+        self.remember(self.key(homework), homework.get('status'))
+
+    def remember(self, key, status):
+        """Запоминает статус работы с ключом key."""
+        previous = self._statuses.get(key)
+        if previous is not None:
+            self._counts[previous] -= 1
+        self._counts[status] += 1
+        self._statuses[key] = status
+        if self._on_commit is not None:
+            self._on_commit(key, status)
+
+    def snapshot(self) -> Dict[str, str]:
+        """Копия индекса: ключ работы -> статус."""
+        return dict(self._statuses)
@@ -0,0 +1,167 @@
+"""Хранилище состояния бота в SQLite.
+
+Хранит последний отправленный статус каждой работы каждого студента и
+курсор from_date, поэтому перезапуск не приводит к повторной рассылке.
+База работает в режиме WAL, а запись выполняет отдельный поток, который
+собирает изменения в пачки и фиксирует их одной транзакцией, - цикл
+опроса только кладёт изменения в очередь и не ждёт диска.
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict
+
+STATE_DB = os.getenv('STATE_DB', 'state.sqlite3')
+# Максимум изменений в одной транзакции
+BATCH_SIZE = 1000
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS statuses ('
+    ' tenant_id TEXT NOT NULL,'
+    ' homework_key TEXT NOT NULL,'
+    ' status TEXT NOT NULL,'
+    ' PRIMARY KEY (tenant_id, homework_key)'
+    ') WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS cursors ('
+    ' tenant_id TEXT PRIMARY KEY,'
+    ' cursor INTEGER NOT NULL'
+    ') WITHOUT ROWID',
+)
+UPSERT_STATUS = (
+    'INSERT INTO statuses (tenant_id, homework_key, status) VALUES (?, ?, ?)'
+    ' ON CONFLICT (tenant_id, homework_key)'
+    ' DO UPDATE SET status = excluded.status'
+)
+UPSERT_CURSOR = (
+    'INSERT INTO cursors (tenant_id, cursor) VALUES (?, ?)'
+    ' ON CONFLICT (tenant_id) DO UPDATE SET cursor = excluded.cursor'
+    ' WHERE excluded.cursor > cursors.cursor'
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    """Статусы работ и курсоры студентов с фоновой пакетной записью.
+
+    Курсоры доступны через get()/advance()/flush(), статусы работ
+    загружаются один раз при старте методом statuses().
+    """
+
+    def __init__(self, path=STATE_DB, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # В режиме WAL NORMAL сохраняет целостность базы при сбое
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, int] = dict(
+            self._conn.execute('SELECT tenant_id, cursor FROM cursors')
+        )
+        self._statuses = defaultdict(dict)
+        for tenant_id, key, status in self._conn.execute(
+            'SELECT tenant_id, homework_key, status FROM statuses'
+        ):
+            self._statuses[tenant_id][key] = status
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name='state-store', daemon=True
+        )
+        self._writer.start()
+
+    def statuses(self, tenant_id) -> dict:
+        """Отдаёт сохранённые статусы работ студента (ключ -> статус)."""
+        with self._lock:
+            return self._statuses.pop(tenant_id, {})
+
+    def reload(self, tenant_id):
+        """Перечитывает из базы курсор и статусы работ студента.
+
+        Нужно, когда студента обслуживал другой процесс с той же базой:
+        загруженное при старте состояние к этому времени устарело.
+        Возвращает пару (курсор или None, статусы).
+        """
+        conn = sqlite3.connect(self.path)
+        try:
+            row = conn.execute(
+                'SELECT cursor FROM cursors WHERE tenant_id = ?', (tenant_id,)
+            ).fetchone()
+            statuses = dict(conn.execute(
+                'SELECT homework_key, status FROM statuses'
+                ' WHERE tenant_id = ?', (tenant_id,)
+            ))
+        finally:
+            conn.close()
+        with self._lock:
+            self._statuses.pop(tenant_id, None)
+            if row is not None and row[0] > self._cursors.get(tenant_id, 0):
+                self._cursors[tenant_id] = row[0]
+            return self._cursors.get(tenant_id), statuses
+
+    def record_status(self, tenant_id, key, status):
+        """Ставит в очередь запись отправленного статуса работы."""
+        self._queue.put((UPSERT_STATUS, (tenant_id, str(key), status)))
+
+    def get(self, tenant_id, default=None):
+        """Возвращает сохранённый курсор студента."""
+        with self._lock:
+            return self._cursors.get(tenant_id, default)
+
+    def advance(self, tenant_id, cursor: int):
+        """Сдвигает курсор студента вперёд; назад курсор не двигается."""
+        with self._lock:
+            if cursor <= self._cursors.get(tenant_id, 0):
+                return
+            self._cursors[tenant_id] = cursor
+        self._queue.put((UPSERT_CURSOR, (tenant_id, cursor)))
+
+    def flush(self):
+        """Ждёт, пока все изменения из очереди будут записаны в базу."""
+        self._queue.join()
+
+    def close(self):
+        """Записывает оставшиеся изменения и закрывает базу."""
+        if self._closed:
+            return
+        self._closed = True
+        # None - сигнал потоку записи завершиться после текущей очереди
+        self._queue.put(None)
+        self._writer.join()
+        self._conn.close()
+
+    def _write_loop(self):
+        """Поток записи: собирает изменения в пачки по batch_size."""
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            changes = [item for item in batch if item is not None]
+            stopping = len(changes) < len(batch)
+            try:
+                if changes:
+                    self._write(changes)
+            except sqlite3.Error as error:
+                logger.error('Не удалось сохранить состояние: %s', error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        """Записывает пачку изменений одной транзакцией."""
+        with self._conn:
+            self._conn.execute('BEGIN')
+            for statement, params in batch:
+                self._conn.execute(statement, params)
@@ -0,0 +1,407 @@
+"""Опрос студентов пулом процессов с единым этапом отправки.
+
+Разбор JSON, проверка ответа и подготовка текстов сообщений занимают
+процессор, и в одном процессе потоки poller.py упираются в GIL. Запросы
+же ждут сеть, а не процессор. Поэтому Supervisor запрашивает API сам, в
+SUPERVISOR_FETCHERS потоках (по умолчанию MAX_IN_FLIGHT из poller.py), а
+тела ответов раздаёт пачками по SUPERVISOR_BATCH процессам пула
+(SUPERVISOR_WORKERS, по умолчанию по числу ядер). Процесс пула разбирает
+и проверяет ответы и готовит сообщения по изменившимся работам, а
+результат возвращает супервизору. Супервизор - единственный, кто ставит
+сообщения в очередь отправки и пишет состояние в хранилище.
+
+Пока автомат защиты не замкнут, цикл не опрашивает всех студентов: в
+полуоткрытом состоянии уходит одна пробная пачка, и только если она
+замкнула автомат, опрашиваются остальные.
+
+Если процесс пула падает, пул перезапускается, а пачки, оставшиеся без
+результата, отправляются повторно.
+"""
+import env  # noqa: F401 - .env загружается до остальных модулей
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed,
+    wait
+)
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import List, NamedTuple, Optional, Tuple
+
+import telegram
+from telegram.utils.request import Request
+
+import alerts
+import circuit_breaker
+import exceptions
+import history
+import homework
+import http_session
+import log_config
+import poller
+import schema
+import send_queue
+import shutdown
+import state
+import state_store
+
+SUPERVISOR_WORKERS = int(
+    os.getenv('SUPERVISOR_WORKERS', 0)
+) or os.cpu_count() or 1
+SUPERVISOR_BATCH = int(os.getenv('SUPERVISOR_BATCH', 100))
+# Одновременных запросов к API из супервизора
+SUPERVISOR_FETCHERS = int(
+    os.getenv('SUPERVISOR_FETCHERS', 0)
+) or poller.MAX_IN_FLIGHT
+# Сколько раз отправлять пачку в пул, если процесс пула упал
+BATCH_ATTEMPTS = 2
+
+logger = logging.getLogger(__name__)
+
+
+class TenantResult(NamedTuple):
+    """Итог опроса одного студента в процессе пула."""
+
+    tenant_id: str
+    # current_date из ответа; None, если опрос не удался
+    current_date: Optional[int] = None
+    # (ключ работы, статус, текст сообщения) по изменившимся работам
+    changes: Tuple[Tuple[str, str, str], ...] = ()
+    # текст ошибки и её отпечаток (alerts.fingerprint), если опрос не удался
+    error: str = ''
+    fingerprint: Tuple[str, ...] = ()
+    endpoint_failure: bool = False
+
+
+def _init_worker(level, endpoint):
+    """Готовит процесс пула: журнал только в консоль, адрес API."""
+    homework.ENDPOINT = endpoint
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(log_config.LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def failed(tenant_id, error) -> TenantResult:
+    """Итог неудачного опроса студента."""
+    return TenantResult(
+        tenant_id, error=str(error),
+        fingerprint=alerts.fingerprint(error),
+        endpoint_failure=circuit_breaker.is_endpoint_failure(error)
+    )
+
+
+def parse_tenant(tenant_id, body, statuses) -> TenantResult:
+    """Разбирает ответ API и готовит сообщения по изменившимся работам."""
+    try:
+        try:
+            response = schema.loads(body)
+        except ValueError as error:
+            logger.error('Ответ сервера не является JSON!')
+            # как в homework.fetch_homework_statuses: тело не JSON -
+            # сбой эндпоинта
+            raise exceptions.ConnectionError(
+                {'url': homework.ENDPOINT}, error
+            ) from None
+        homeworks = homework.check_response(response)
+        changes = []
+        for homework_ in state.StatusIndex(statuses).diff(homeworks):
+            try:
+                text = homework.parse_status(homework_)
+            except ValueError:
+                # неизвестный статус уже записан в журнал
+                continue
+            changes.append((
+                state.StatusIndex.key(homework_), homework_['status'], text
+            ))
+    except Exception as error:
+        return failed(tenant_id, error)
+    return TenantResult(
+        tenant_id, response['current_date'], tuple(changes)
+    )
+
+
+def parse_batch(batch) -> List[TenantResult]:
+    """Разбирает ответы пачки студентов; выполняется в процессе пула."""
+    return [parse_tenant(*item) for item in batch]
+
+
+class Supervisor:
+    """Раздаёт студентов пулу процессов и отправляет результаты."""
+
+    # функция процесса пула: пачка заданий -> список TenantResult
+    batch_task = staticmethod(parse_batch)
+
+    def __init__(self, tenants, bot,
+                 workers=SUPERVISOR_WORKERS,
+                 batch_size=SUPERVISOR_BATCH,
+                 fetchers=SUPERVISOR_FETCHERS,
+                 retry_period=homework.RETRY_PERIOD,
+                 store=None,
+                 outbox=None,
+                 breaker=None):
+        self.tenants = {tenant.tenant_id: tenant for tenant in tenants}
+        self.workers = workers
+        self.batch_size = batch_size
+        self.fetchers = fetchers
+        self.retry_period = retry_period
+        if outbox is None:
+            outbox = send_queue.SendQueue(bot)
+        self.outbox = outbox
+        self.store = store or state_store.StateStore()
+        self.history = history.StatusHistory()
+        self.breaker = breaker or circuit_breaker.for_endpoint(
+            homework.ENDPOINT
+        )
+        self.states = {
+            tenant_id: poller.TenantState(
+                timestamp=self.store.get(tenant_id, 0),
+                statuses=state.StatusIndex(self.store.statuses(tenant_id))
+            )
+            for tenant_id in self.tenants
+        }
+        self.restarts = 0
+        self._executor = None
+        self._fetch_executor = None
+        self._stopped = threading.Event()
+
+    def _start_pool(self):
+        # spawn: потоки журнала и хранилища не копируются в процессы пула
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(log_config.LOG_LEVEL, homework.ENDPOINT)
+        )
+
+    def _restart_pool(self, broken):
+        """Перезапускает пул, если он ещё не перезапущен после сбоя."""
+        if self._executor is not broken:
+            return
+        logger.error('Процесс пула упал, пул перезапускается')
+        broken.shutdown(wait=False)
+        self.restarts += 1
+        self._start_pool()
+
+    def fetch(self, tenant_id, probe=False):
+        """Запрашивает API для студента; выполняется в потоке запросов.
+
+        Возвращает тело ответа, TenantResult со сбоем или None, если
+        запрос не отправлялся: автомат защиты разомкнулся во время цикла.
+        Пробный запрос (probe) отправляется и при полуоткрытом автомате.
+        """
+        breaker_state = self.breaker.state
+        if breaker_state == circuit_breaker.OPEN or (
+            breaker_state != circuit_breaker.CLOSED and not probe
+        ):
+            return None
+        try:
+            return homework.fetch_homework_statuses(
+                self.tenants[tenant_id].practicum_token,
+                self.states[tenant_id].timestamp,
+                session=http_session.get_session(), raw=True
+            )
+        except Exception as error:
+            return failed(tenant_id, error)
+
+    def run_cycle(self) -> int:
+        """Опрашивает студентов один раз; возвращает число сообщений.
+
+        При полуоткрытом автомате сначала опрашивается одна пробная
+        пачка, остальные - только если она замкнула автомат.
+        """
+        if not self.breaker.allow():
+            logger.warning('API недоступен, цикл опроса пропущен')
+            return 0
+        tenant_ids = list(self.tenants)
+        if self.breaker.state == circuit_breaker.CLOSED:
+            return self.poll(tenant_ids)
+        probe, rest = (
+            tenant_ids[:self.batch_size], tenant_ids[self.batch_size:]
+        )
+        sent = self.poll(probe, probe=True)
+        if rest and self.breaker.state == circuit_breaker.CLOSED:
+            sent += self.poll(rest)
+        return sent
+
+    def poll(self, tenant_ids, probe=False) -> int:
+        """Запрашивает API в потоках, а ответы разбирает пулом процессов.
+
+        Тела ответов уходят в пул пачками по batch_size, как только
+        пачка набрана; сбои запросов отправляются сразу.
+        """
+        if self._executor is None:
+            self._start_pool()
+        if self._fetch_executor is None:
+            self._fetch_executor = ThreadPoolExecutor(
+                max_workers=self.fetchers, thread_name_prefix='fetch'
+            )
+        pending = {}
+        fetches = {
+            self._fetch_executor.submit(self.fetch, tenant_id, probe):
+                tenant_id
+            for tenant_id in tenant_ids
+        }
+        sent = 0
+        batch = []
+        for future in as_completed(fetches):
+            tenant_id, body = fetches[future], future.result()
+            if isinstance(body, TenantResult):
+                sent += self.deliver(body)
+            elif body is not None:
+                batch.append((
+                    tenant_id, body,
+                    self.states[tenant_id].statuses.snapshot()
+                ))
+                if len(batch) >= self.batch_size:
+                    self._submit(pending, batch)
+                    batch = []
+        if batch:
+            self._submit(pending, batch)
+        return sent + self._collect(pending)
+
+    def _submit(self, pending, batch, attempt=1):
+        """Отправляет пачку ответов в пул процессов."""
+        executor = self._executor
+        future = executor.submit(self.batch_task, batch)
+        pending[future] = (batch, attempt, executor)
+
+    def _collect(self, pending) -> int:
+        """Отправляет результаты пачек; пачки упавшего процесса - повторно."""
+        sent = 0
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, attempt, executor = pending.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    self._restart_pool(executor)
+                    if attempt < BATCH_ATTEMPTS:
+                        self._submit(pending, batch, attempt + 1)
+                        continue
+                    results = [
+                        TenantResult(
+                            item[0],
+                            error='процесс разбора аварийно завершился',
+                            fingerprint=(
+                                'BrokenProcessPool', 'supervisor.poll'
+                            )
+                        )
+                        for item in batch
+                    ]
+                sent += sum(self.deliver(result) for result in results)
+        return sent
+
+    def deliver(self, result) -> int:
+        """Единый этап отправки: очередь сообщений и сохранение состояния."""
+        tenant = self.tenants[result.tenant_id]
+        tenant_state = self.states[result.tenant_id]
+        if result.endpoint_failure:
+            self.breaker.record_failure()
+        elif result.current_date is not None:
+            self.breaker.record_success()
+        if result.fingerprint:
+            message = f'Сбой в работе программы: {result.error}'
+            logger.error('Студент %s: %s', result.tenant_id, message)
+            self.notify(tenant, tenant_state.reporter.report(
+                result.fingerprint, result.error
+            ))
+            return 0
+        queued = 0
+        with tenant_state.lock:
+            for key, status, text in result.changes:
+                if tenant_state.undelivered.get(key) == status:
+                    # сообщение о таком статусе уже ждёт отправки
+                    continue
+                tenant_state.undelivered[key] = status
+                self.outbox.put(
+                    tenant.chat_id, text, key=(tenant.tenant_id, key),
+                    on_sent=partial(
+                        self.delivered, tenant.tenant_id, key, status
+                    ),
+                    on_failed=partial(
+                        tenant_state.undeliverable, key, status
+                    )
+                )
+                queued += 1
+            # курсор сдвигается, только когда все сообщения доставлены
+            tenant_state.advance(result.current_date)
+        if result.changes:
+            tenant_state.changed_at = time.time()
+        self.notify(tenant, tenant_state.reporter.success())
+        if tenant_state.timestamp:
+            self.store.advance(tenant.tenant_id, tenant_state.timestamp)
+        return queued
+
+    def notify(self, tenant, text):
+        """Ставит в очередь сообщение о сбое или восстановлении, если есть."""
+        if text:
+            self.outbox.put(
+                tenant.chat_id, text, key=(tenant.tenant_id, None)
+            )
+
+    def delivered(self, tenant_id, key, status):
+        """Запоминает и сохраняет статус работы после доставки сообщения."""
+        tenant_state = self.states[tenant_id]
+        advanced = tenant_state.delivered(key, status)
+        self.store.record_status(tenant_id, key, status)
+        if advanced:
+            self.store.advance(tenant_id, tenant_state.timestamp)
+        self.history.record(tenant_id, key, status)
+
+    def stop(self):
+        """Останавливает опрос после текущего цикла."""
+        self._stopped.set()
+
+    def run(self):
+        """Опрашивает студентов каждые retry_period, пока не вызван stop()."""
+        self.outbox.start()
+        try:
+            while not self._stopped.is_set():
+                started = time.monotonic()
+                self.run_cycle()
+                self._stopped.wait(
+                    max(0, self.retry_period - (time.monotonic() - started))
+                )
+        finally:
+            if self._fetch_executor is not None:
+                self._fetch_executor.shutdown(wait=True)
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self.outbox.stop(timeout=poller.OUTBOX_DRAIN_TIMEOUT)
+            self.store.flush()
+
+
+def main():
+    """Запускает опрос студентов из TENANTS_FILE пулом процессов."""
+    if not homework.TELEGRAM_TOKEN:
+        message = (
+            'Отсутсвует обязательная переменная окружения TELEGRAM_TOKEN.'
+            ' Программа принудительно остановлена.'
+        )
+        logger.critical(message)
+        sys.exit(message)
+    tenants = poller.load_tenants(poller.TENANTS_FILE)
+    bot = telegram.Bot(
+        token=homework.TELEGRAM_TOKEN,
+        request=Request(con_pool_size=send_queue.SEND_WORKERS + 4)
+    )
+    supervisor = Supervisor(tenants, bot)
+    # по сигналу текущий цикл завершается, а очередь сообщений отправляется
+    for signum in shutdown.SIGNALS:
+        signal.signal(signum, lambda *args: supervisor.stop())
+    supervisor.run()
+
+
+if __name__ == '__main__':
+    homework.init()
+    main()
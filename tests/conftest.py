@@ -1,5 +1,6 @@
 import sys
 import os
+import tempfile
 
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,3 +27,6 @@ os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
 
+# состояние main() не должно попадать в рабочую директорию
+os.environ['STATE_DB'] = os.path.join(tempfile.mkdtemp(), 'state.sqlite3')
+os.environ['LOG_FILE'] = os.path.join(tempfile.mkdtemp(), 'program.log')
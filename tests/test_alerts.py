@@ -0,0 +1,114 @@
+import alerts
+import exceptions
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def connection_error(attempt):
+    try:
+        raise exceptions.ConnectionError(
+            {'url': 'https://api', 'headers': {}, 'params': {
+                'from_date': attempt
+            }},
+            'timed out'
+        )
+    except exceptions.ConnectionError as error:
+        return error
+
+
+def value_error():
+    try:
+        raise ValueError('bad status')
+    except ValueError as error:
+        return error
+
+
+class TestErrorReporter:
+
+    def test_fingerprint_ignores_message(self):
+        assert alerts.fingerprint(connection_error(1)) == (
+            alerts.fingerprint(connection_error(2))
+        ), 'Отпечаток не должен зависеть от текста ошибки.'
+        assert alerts.fingerprint(connection_error(1)) == (
+            'ConnectionError', 'test_alerts.connection_error'
+        )
+
+    def test_repeats_are_collapsed_into_digest(self):
+        clock = FakeClock()
+        reporter = alerts.ErrorReporter(interval=3600, clock=clock)
+        assert reporter.failure(connection_error(0)).startswith(
+            'Сбой в работе программы:'
+        ), 'О первом сбое нужно сообщить сразу.'
+        for attempt in range(1, 6):
+            clock.now += 600
+            assert reporter.failure(connection_error(attempt)) is None, (
+                'Повтор того же сбоя не отправляется каждый цикл.'
+            )
+        clock.now += 600
+        digest = reporter.failure(connection_error(6))
+        assert digest is not None and '6 повторов' in digest, (
+            'Раз в интервал должна приходить сводка повторов.'
+        )
+        clock.now += 600
+        assert reporter.failure(connection_error(7)) is None
+
+    def test_new_fingerprint_is_reported_at_once(self):
+        reporter = alerts.ErrorReporter(clock=FakeClock())
+        assert reporter.failure(connection_error(0))
+        assert reporter.failure(value_error()), (
+            'Сбой другого вида должен отправляться сразу.'
+        )
+
+    def test_recovery_notice_is_sent_once(self):
+        reporter = alerts.ErrorReporter(clock=FakeClock())
+        assert reporter.success() is None
+        reporter.failure(connection_error(0))
+        reporter.failure(connection_error(1))
+        assert reporter.success() == (
+            'Работа восстановлена. Сбоев за время перебоя: 2.'
+        )
+        assert reporter.success() is None, (
+            'Сообщение о восстановлении отправляется один раз.'
+        )
+        assert reporter.failure(connection_error(2)).startswith(
+            'Сбой в работе программы:'
+        )
+
+    def test_dump_and_load(self):
+        clock = FakeClock()
+        reporter = alerts.ErrorReporter(interval=3600, clock=clock)
+        reporter.failure(connection_error(0))
+        clock.now += 1000
+        reporter.failure(connection_error(1))
+        saved = reporter.dump()
+        # новый процесс: monotonic() отсчитывается заново
+        clock = FakeClock()
+        restored = alerts.ErrorReporter(interval=3600, clock=clock)
+        restored.load(saved)
+        assert restored.failure(connection_error(2)) is None, (
+            'Восстановленный сбой не должен сообщаться заново.'
+        )
+        clock.now += 2600
+        assert '3 повторов' in restored.failure(connection_error(3)), (
+            'Сводка должна прийти через интервал после прошлого сообщения.'
+        )
+        assert restored.success() == (
+            'Работа восстановлена. Сбоев за время перебоя: 4.'
+        )
+
+    def test_report_by_fingerprint(self):
+        reporter = alerts.ErrorReporter(clock=FakeClock())
+        key = alerts.fingerprint(connection_error(0))
+        assert reporter.report(list(key), 'сбой 0') == (
+            'Сбой в работе программы: сбой 0'
+        )
+        assert reporter.failure(connection_error(1)) is None, (
+            'Отпечаток из другого процесса совпадает с отпечатком ошибки.'
+        )
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import circuit_breaker
+import exceptions
+import utils
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def breaker(self, clock):
+        return circuit_breaker.CircuitBreaker(
+            failure_threshold=2, base_delay=10, max_delay=25, jitter=0,
+            clock=clock
+        )
+
+    def test_opens_after_threshold_and_recovers(self):
+        clock = FakeClock()
+        breaker = self.breaker(clock)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == circuit_breaker.OPEN
+        assert not breaker.allow(), (
+            'Разомкнутый автомат не должен пропускать запросы.'
+        )
+        assert breaker.retry_in() == 10
+        clock.now = 10
+        assert breaker.state == circuit_breaker.HALF_OPEN
+        assert breaker.allow(), 'После паузы должен пройти пробный запрос.'
+        assert not breaker.allow(), 'Пробный запрос должен быть один.'
+        breaker.record_success()
+        assert breaker.state == circuit_breaker.CLOSED
+        assert breaker.allow()
+
+    def test_failed_probe_doubles_delay(self):
+        clock = FakeClock()
+        breaker = self.breaker(clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        for expected_delay in (20, 25):
+            clock.now += breaker.retry_in()
+            assert breaker.allow()
+            breaker.record_failure()
+            assert breaker.retry_in() == expected_delay, (
+                'Пауза должна расти экспоненциально до max_delay.'
+            )
+
+    def test_endpoint_failures(self):
+        response = utils.MockResponseGET(
+            http_status=HTTPStatus.UNAUTHORIZED
+        )
+        assert not circuit_breaker.is_endpoint_failure(
+            exceptions.WrongAPIResponseCodeError({}, response)
+        ), 'Ошибка токена студента не должна размыкать автомат.'
+        response.status_code = HTTPStatus.BAD_GATEWAY
+        assert circuit_breaker.is_endpoint_failure(
+            exceptions.WrongAPIResponseCodeError({}, response)
+        )
+        assert circuit_breaker.is_endpoint_failure(
+            exceptions.ConnectionError({}, 'timeout')
+        )
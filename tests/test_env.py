@@ -0,0 +1,30 @@
+import os
+import types
+
+import env
+
+
+class TestEnv:
+
+    def module(self, filename):
+        main = types.ModuleType('__main__')
+        main.__file__ = os.path.join(
+            os.path.dirname(os.path.abspath(env.__file__)), filename
+        )
+        return main
+
+    def test_entry_points_load_dotenv(self):
+        for filename in env.ENTRY_POINTS:
+            assert env.is_entry_point(self.module(filename)), (
+                f'Запуск {filename} должен загружать .env до импорта '
+                'остальных модулей.'
+            )
+
+    def test_other_programs_do_not_load_dotenv(self, tmp_path):
+        assert not env.is_entry_point(self.module('tracing.py'))
+        other = types.ModuleType('__main__')
+        other.__file__ = str(tmp_path / 'poller.py')
+        assert not env.is_entry_point(other)
+        assert not env.is_entry_point(types.ModuleType('__main__')), (
+            'Импорт в тестах и интерпретаторе не должен менять окружение.'
+        )
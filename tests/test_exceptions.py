@@ -0,0 +1,93 @@
+import gc
+import tracemalloc
+from http import HTTPStatus
+
+import pytest
+
+import exceptions
+
+REQUEST_PARAMS = {
+    'url': 'https://practicum.yandex.ru/api/user_api/homework_statuses/',
+    'headers': {'Authorization': 'OAuth secret-token'},
+    'params': {'from_date': 0},
+}
+BODY_SIZE = 10 * 1024 * 1024
+
+
+class HugeResponse:
+
+    def __init__(self, status_code=HTTPStatus.INTERNAL_SERVER_ERROR):
+        self.status_code = status_code
+        self.reason = 'Internal Server Error'
+        self.content = b'x' * BODY_SIZE
+        self.headers = {
+            'Content-Type': 'text/html', 'Set-Cookie': 'session=secret'
+        }
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+
+class TestExceptionSummary:
+
+    def test_memory_per_error_is_bounded(self):
+        tracemalloc.start()
+        try:
+            errors = []
+            response = HugeResponse()
+            baseline = tracemalloc.get_traced_memory()[0]
+            for _ in range(10):
+                errors.append(exceptions.WrongAPIResponseCodeError(
+                    REQUEST_PARAMS, response
+                ))
+            per_error = (tracemalloc.get_traced_memory()[0] - baseline) / 10
+            del response
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        assert per_error < 16 * 1024, (
+            'Исключение должно хранить сводку, а не тело ответа.'
+        )
+        assert retained < BODY_SIZE, (
+            'Исключение не должно удерживать ответ сервера.'
+        )
+
+    def test_str_is_bounded(self):
+        error = exceptions.WrongAPIResponseCodeError(
+            REQUEST_PARAMS, HugeResponse()
+        )
+        text = str(error)
+        assert len(text) < 2 * 1024
+        assert f'всего {BODY_SIZE}' in text
+        assert error.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert error.headers['Set-Cookie'] == exceptions.REDACTED
+
+    def test_secrets_are_redacted(self):
+        error = exceptions.ConnectionError(
+            REQUEST_PARAMS, ValueError('y' * 100000)
+        )
+        text = str(error)
+        assert 'secret-token' not in text, (
+            'Токен не должен попадать в текст ошибки.'
+        )
+        assert len(text) < 2 * 1024
+        assert error.error_type == 'ValueError'
+
+
+class TestFetchErrors:
+
+    def test_error_does_not_chain_response(
+            self, monkeypatch, homework_module):
+        monkeypatch.setattr(
+            homework_module.requests, 'get',
+            lambda *args, **kwargs: HugeResponse()
+        )
+        with pytest.raises(
+            homework_module.exceptions.WrongAPIResponseCodeError
+        ) as excinfo:
+            homework_module.get_api_answer(1)
+        assert excinfo.value.__context__ is None, (
+            'Исключение не должно тянуть за собой исходную ошибку.'
+        )
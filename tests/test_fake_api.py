@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from benchmarks import fake_api
+
+
+@pytest.fixture
+def api():
+    server = fake_api.FakePracticumAPI(
+        homeworks_per_student=5, change_rate=0, seed=1
+    ).start()
+    yield server
+    server.stop()
+
+
+class TestFakeAPI:
+
+    def test_from_date_semantics(self, api, monkeypatch, homework_module):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', api.url)
+        response = homework_module.fetch_homework_statuses('token', 1)
+        assert len(homework_module.check_response(response)) == 5, (
+            'С from_date в прошлом эмулятор должен вернуть все работы.'
+        )
+        api.student('token').change_random_homework(int(time.time()))
+        response = homework_module.fetch_homework_statuses(
+            'token', response['current_date']
+        )
+        assert len(response['homeworks']) == 1, (
+            'Эмулятор должен возвращать только работы, обновлённые '
+            'после from_date.'
+        )
+
+    def test_errors(self, api, monkeypatch, homework_module):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', api.url)
+        api.error_rate = 1
+        with pytest.raises(homework_module.exceptions.WrongAPIResponseCodeError):
+            homework_module.fetch_homework_statuses('token', 1)
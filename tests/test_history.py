@@ -0,0 +1,119 @@
+import sys
+import time
+
+import history
+import send_queue
+import state_store
+import utils
+
+
+class TestTenantHistory:
+
+    def test_latest_and_transitions(self):
+        tenant = history.TenantHistory(size=8)
+        tenant.record('hw1', 'reviewing', 100)
+        tenant.record('hw1', 'approved', 200)
+        tenant.record('hw2', 'rejected', 300)
+        assert tenant.latest('hw1') == 'approved'
+        assert tenant.latest('hw3') is None
+        assert tenant.latest_all() == {'hw1': 'approved', 'hw2': 'rejected'}
+        assert tenant.since(200) == [
+            history.Transition(200, 'hw1', 'reviewing', 'approved'),
+            history.Transition(300, 'hw2', None, 'rejected'),
+        ], 'since() должен вернуть переходы не раньше заданного времени.'
+
+    def test_repeated_status_is_not_recorded(self):
+        tenant = history.TenantHistory(size=8)
+        assert tenant.record('hw1', 'approved', 100)
+        assert not tenant.record('hw1', 'approved', 200)
+        assert len(tenant) == 1
+
+    def test_ring_buffer_keeps_latest(self):
+        tenant = history.TenantHistory(size=4)
+        tenant.record('old', 'approved', 0)
+        statuses = ('reviewing', 'rejected')
+        for at in range(1, 11):
+            tenant.record('hw', statuses[at % 2], at)
+        assert len(tenant) == 4, 'Буфер не должен расти дальше size.'
+        assert [item.at for item in tenant.since(0)] == [7, 8, 9, 10]
+        assert tenant.latest('old') == 'approved', (
+            'Последний статус работы не теряется при перезаписи буфера.'
+        )
+
+    def test_statuses_are_interned(self, monkeypatch):
+        # новый статус не должен оставаться в общей таблице после теста
+        monkeypatch.setattr(history, 'STATUSES', list(history.STATUSES))
+        monkeypatch.setattr(
+            history, 'STATUS_CODES', dict(history.STATUS_CODES)
+        )
+        code = history.status_code('on_hold')
+        assert history.STATUSES[code] == 'on_hold'
+        assert history.status_code('on_hold') == code
+        assert history.STATUSES[code] is sys.intern('on_hold')
+
+    def test_storage_is_compact(self):
+        tenant = history.TenantHistory(size=1000)
+        columns = sum(
+            sys.getsizeof(column) for column in (
+                tenant._times, tenant._keys, tenant._previous, tenant._codes
+            )
+        )
+        assert columns < 1000 * 16, (
+            'Переход должен занимать считанные байты в колонках array.'
+        )
+
+    def test_queries_are_fast(self):
+        tenant = history.TenantHistory(size=256)
+        for at in range(10000):
+            tenant.record(f'hw{at % 50}', ('approved', 'rejected')[at % 2], at)
+        started = time.perf_counter()
+        for _ in range(1000):
+            tenant.latest('hw7')
+            tenant.since(9990)
+        per_query = (time.perf_counter() - started) / 2000
+        assert per_query < 100e-6, (
+            'Запрос к истории должен выполняться за микросекунды.'
+        )
+
+
+class TestStatusHistory:
+
+    def test_tenants_are_separate(self):
+        clock = iter(range(100, 200)).__next__
+        statuses = history.StatusHistory(clock=clock)
+        statuses.record('1', 'hw', 'approved')
+        statuses.record('2', 'hw', 'rejected')
+        assert statuses.latest('1', 'hw') == 'approved'
+        assert statuses.latest_all('2') == {'hw': 'rejected'}
+        assert statuses.since('3', 0) == []
+        assert statuses.since('2', 0) == [
+            history.Transition(101, 'hw', None, 'rejected')
+        ]
+
+    def test_time_never_goes_back(self):
+        clock = iter([100.7, 90, 95]).__next__
+        statuses = history.StatusHistory(clock=clock)
+        statuses.record('1', 'hw', 'reviewing')
+        statuses.record('1', 'hw', 'approved')
+        statuses.record('1', 'hw', 'rejected', at=99.5)
+        assert [item.at for item in statuses.since('1', 0)] == [
+            100, 100, 100
+        ], 'Время перехода не должно быть раньше предыдущего.'
+        assert type(statuses.since('1', 0)[2].at) is int
+        assert len(statuses.since('1', 100)) == 3
+
+
+class TestPollerHistory:
+
+    def test_delivered_status_is_in_history(self, tmp_path):
+        import poller
+
+        bot = utils.MockTelegramBot()
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        engine = poller.Poller(
+            [poller.Tenant('7', 'token', '1007')], bot, store=store,
+            outbox=send_queue.SendQueue(bot)
+        )
+        engine.delivered('7', 'hw1', 'approved')
+        assert engine.history.latest('7', 'hw1') == 'approved'
+        store.close()
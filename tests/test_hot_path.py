@@ -0,0 +1,44 @@
+from benchmarks import hot_path
+
+
+class TestHotPath:
+
+    def test_pipeline_renders_message_per_homework(self):
+        transport = hot_path.StubTransport(hot_path.make_body(25))
+        messages = hot_path.pipeline(transport)
+        assert len(messages) == 25, (
+            'Заглушка должна проходить весь путь от запроса до сообщений.'
+        )
+
+    def test_run_reports_throughput(self):
+        results = hot_path.run(sizes=(10,), repeat=1)
+        assert set(results) == {
+            'check_response[10]', 'parse_status[10]',
+            'render_verdicts[10]', 'pipeline[10]',
+        }
+        assert all(value > 0 for value in results.values())
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        baseline = {'pipeline[10]': 1000, 'parse_status[10]': 1000}
+        results = {
+            'pipeline[10]': 700, 'parse_status[10]': 900, 'new[10]': 1,
+        }
+        assert hot_path.compare(baseline, results, threshold=0.2) == [
+            ('pipeline[10]', 1000, 700)
+        ], 'Падение больше порога должно считаться регрессией.'
+
+    def test_results_are_normalized_by_calibration(self):
+        assert hot_path.normalize(
+            {'pipeline[10]': 3000}, calibration=1500
+        ) == {'pipeline[10]': 2.0}, (
+            'Результат сохраняется в единицах калибровочного цикла.'
+        )
+        assert hot_path.calibrate(repeat=1) > 0
+
+    def test_platform_mismatch(self):
+        saved = hot_path.platform_info()
+        assert hot_path.platform_mismatch(saved) == []
+        saved['machine'] = 'other'
+        assert [key for key, _, _ in hot_path.platform_mismatch(saved)] == [
+            'machine'
+        ], 'Baseline другой архитектуры нельзя сравнивать молча.'
@@ -0,0 +1,32 @@
+class TestHttpSession:
+
+    def test_session_pool_and_retries(self):
+        import http_session
+
+        session = http_session.create_session(
+            pool_connections=2, pool_maxsize=7, retries=3
+        )
+        adapter = session.get_adapter('https://practicum.yandex.ru/')
+        assert adapter._pool_maxsize == 7, (
+            'Проверьте, что размер пула соединений настраивается.'
+        )
+        assert adapter._pool_block, (
+            'Число соединений с одним хостом должно быть ограничено.'
+        )
+        assert adapter.max_retries.total == 3
+        assert adapter.max_retries.is_retry('GET', 503)
+        assert not adapter.max_retries.is_retry('POST', 503), (
+            'Повторять можно только идемпотентные запросы.'
+        )
+        session.close()
+
+    def test_shared_session_is_reused(self):
+        import http_session
+
+        session = http_session.get_session()
+        assert http_session.get_session() is session, (
+            'Проверьте, что сессия переиспользуется между вызовами.'
+        )
+        http_session.close_session()
+        assert http_session.get_session() is not session
+        http_session.close_session()
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+import lazy
+from benchmarks import import_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyModule:
+
+    @pytest.fixture
+    def fake_module(self, monkeypatch):
+        module = types.ModuleType('lazy_fake')
+        module.value = 1
+        monkeypatch.delitem(sys.modules, 'lazy_fake', raising=False)
+        loads = []
+
+        def import_module(name):
+            loads.append(name)
+            sys.modules[name] = module
+            return module
+
+        monkeypatch.setattr(lazy.importlib, 'import_module', import_module)
+        return module, loads
+
+    def test_imports_on_first_access(self, fake_module):
+        module, loads = fake_module
+        proxy = lazy.lazy_import('lazy_fake')
+        assert loads == [], 'Модуль не должен импортироваться заранее.'
+        assert proxy.value == 1
+        assert loads == ['lazy_fake']
+
+    def test_setattr_reaches_real_module(self, fake_module):
+        module, _ = fake_module
+        proxy = lazy.lazy_import('lazy_fake')
+        proxy.value = 2
+        assert module.value == 2, (
+            'Запись атрибута заместителя должна менять настоящий модуль.'
+        )
+        del proxy.value
+        assert not hasattr(module, 'value')
+
+    def test_loaded_module_is_returned_as_is(self):
+        assert lazy.lazy_import('os') is os
+
+
+class TestImportTime:
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        timings = import_time.measure('homework')
+        assert 'homework' in timings
+        loaded = [
+            name for name in import_time.HEAVY_MODULES if name in timings
+        ]
+        assert loaded == [], (
+            f'Импорт homework не должен загружать {", ".join(loaded)}.'
+        )
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        env = dict(os.environ, LOG_FILE=str(tmp_path / 'program.log'))
+        subprocess.run(
+            [sys.executable, '-c', 'import homework'],
+            cwd=ROOT, env=env, check=True
+        )
+        assert not (tmp_path / 'program.log').exists(), (
+            'Журнал настраивается в init(), а не при импорте.'
+        )
+
+    def test_init_configures_logging(self, tmp_path):
+        env = dict(os.environ, LOG_FILE=str(tmp_path / 'program.log'))
+        subprocess.run(
+            [sys.executable, '-c', 'import homework; homework.init()'],
+            cwd=ROOT, env=env, check=True
+        )
+        assert (tmp_path / 'program.log').exists()
@@ -0,0 +1,112 @@
+import atexit
+import logging
+import sys
+
+import log_config
+
+
+def make_record(msg, *args, level=logging.DEBUG):
+    return logging.LogRecord('homework', level, __file__, 1, msg, args, None)
+
+
+class TestRepeatFilter:
+
+    def test_repeated_line_is_suppressed(self):
+        now = [0.0]
+        repeat_filter = log_config.RepeatFilter(60, clock=lambda: now[0])
+        assert repeat_filter.filter(make_record('Новый забег бота!'))
+        assert not repeat_filter.filter(make_record('Новый забег бота!')), (
+            'Повтор той же строки в пределах интервала должен подавляться.'
+        )
+        now[0] = 61
+        record = make_record('Новый забег бота!')
+        assert repeat_filter.filter(record)
+        assert 'повторов подавлено: 1' in record.getMessage(), (
+            'После интервала строка должна выводиться с числом повторов.'
+        )
+
+    def test_repeat_key_includes_args(self):
+        repeat_filter = log_config.RepeatFilter(60, clock=lambda: 0.0)
+        assert repeat_filter.filter(make_record('Студент %s', 1))
+        assert repeat_filter.filter(make_record('Студент %s', 2)), (
+            'Строки с другими аргументами - другие события, они не '
+            'подавляются.'
+        )
+        assert not repeat_filter.filter(make_record('Студент %s', 1)), (
+            'Повтором считается тот же шаблон с теми же аргументами.'
+        )
+        assert repeat_filter.filter(make_record('Статус %s', {'id': 1}))
+        assert not repeat_filter.filter(
+            make_record('Статус %s', {'id': 1})
+        ), 'Изменяемые аргументы сравниваются по готовой строке.'
+        assert repeat_filter.filter(make_record('Статус %s', {'id': 2}))
+
+    def test_seen_lines_are_bounded(self):
+        repeat_filter = log_config.RepeatFilter(
+            60, clock=lambda: 0.0, max_keys=10
+        )
+        for number in range(100):
+            repeat_filter.filter(make_record(f'Строка {number}'))
+        assert len(repeat_filter._seen) == 10, (
+            'Фильтр повторов не должен помнить неограниченно много строк.'
+        )
+        assert not repeat_filter.filter(make_record('Строка 99'))
+
+    def test_warnings_are_never_suppressed(self):
+        repeat_filter = log_config.RepeatFilter(60, clock=lambda: 0.0)
+        for _ in range(3):
+            assert repeat_filter.filter(
+                make_record('Сбой', level=logging.ERROR)
+            ), 'Ошибки не должны подавляться.'
+
+
+class TestDeferredQueueHandler:
+
+    def test_mutable_args_are_formatted_at_once(self):
+        records = []
+        handler = log_config.DeferredQueueHandler(None)
+        handler.enqueue = records.append
+        state = {'status': 'reviewing'}
+        handler.handle(make_record('Статус %s', state))
+        state['status'] = 'approved'
+        assert records[0].getMessage() == "Статус {'status': 'reviewing'}", (
+            'Запись должна сохранить значение аргумента на момент вызова.'
+        )
+        handler.handle(make_record('Попытка %s', 1))
+        assert records[1].args == (1,), (
+            'Неизменяемые аргументы форматируются в потоке записи.'
+        )
+
+    def test_exception_is_rendered_to_text(self):
+        records = []
+        handler = log_config.DeferredQueueHandler(None)
+        handler.enqueue = records.append
+        try:
+            raise ValueError('сбой')
+        except ValueError:
+            record = logging.LogRecord(
+                'homework', logging.ERROR, __file__, 1, 'Сбой', (),
+                sys.exc_info()
+            )
+        handler.handle(record)
+        assert records[0].exc_info is None
+        assert 'ValueError: сбой' in records[0].exc_text
+
+
+class TestSetupLogging:
+
+    def test_records_reach_rotating_file(self, tmp_path):
+        filename = tmp_path / 'bot.log'
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        listener = log_config.setup_logging('DEBUG', str(filename))
+        try:
+            logging.getLogger('homework').warning('Проверка %s', 'журнала')
+        finally:
+            atexit.unregister(listener.stop)
+            listener.stop()
+            root.handlers[:] = handlers
+            root.setLevel(level)
+        assert 'Проверка журнала' in filename.read_text(encoding='utf-8'), (
+            'Запись должна попасть в файл журнала.'
+        )
@@ -0,0 +1,79 @@
+import urllib.request
+
+import metrics
+
+
+class TestMetrics:
+
+    def test_render_prometheus_text(self):
+        registry = metrics.Registry()
+        histogram = registry.histogram('latency_seconds', 'Latency',
+                                       buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        counter = registry.counter('errors_total', 'Errors')
+        counter.inc(exception='ConnectionError')
+        counter.inc(exception='ConnectionError')
+        registry.gauge('queue_depth', 'Queue', lambda: 7)
+        text = registry.render()
+        for line in (
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            'latency_seconds_count 3',
+            'errors_total{exception="ConnectionError"} 2',
+            'queue_depth 7',
+        ):
+            assert line in text.splitlines(), (
+                f'В выводе метрик нет строки `{line}`.'
+            )
+
+    def test_unregister_keeps_foreign_gauge(self):
+        registry = metrics.Registry()
+
+        def first():
+            return 1
+
+        def second():
+            return 2
+
+        registry.gauge('queue_depth', 'Queue', first)
+        registry.gauge('queue_depth', 'Queue', second)
+        assert not registry.unregister('queue_depth', first), (
+            'Показатель, перерегистрированный другим владельцем, остаётся.'
+        )
+        assert 'queue_depth 2' in registry.render().splitlines()
+        assert registry.unregister('queue_depth', second)
+        assert 'queue_depth' not in registry.render()
+        assert not registry.unregister('queue_depth')
+
+    def test_http_endpoint(self):
+        registry = metrics.Registry()
+        registry.counter('polls_total', 'Polls').inc()
+        server = metrics.start_http_server(0, registry=registry)
+        try:
+            url = 'http://127.0.0.1:{}/metrics'.format(server.server_port)
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'polls_total 1' in body
+
+    def test_api_errors_are_counted(self, monkeypatch, homework_module):
+        import requests
+
+        def mock_get(*args, **kwargs):
+            raise requests.ConnectionError('Something wrong')
+
+        before = metrics.ERRORS.value(exception='ConnectionError')
+        monkeypatch.setattr(requests, 'get', mock_get)
+        try:
+            homework_module.get_api_answer(1)
+        except Exception:
+            pass
+        assert metrics.ERRORS.value(exception='ConnectionError') == (
+            before + 1
+        ), 'Ошибки подключения к API должны учитываться в метриках.'
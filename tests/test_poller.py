@@ -0,0 +1,228 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import metrics
+import send_queue
+import state_store
+import utils
+
+
+class TestPoller:
+    HOMEWORK = {'homework_name': 'hw123', 'status': 'approved'}
+
+    def write_tenants(self, tmp_path, count):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': i, 'practicum_token': f'token{i}', 'chat_id': 1000 + i}
+            for i in range(count)
+        ]))
+        return path
+
+    def test_load_tenants(self, tmp_path):
+        import poller
+
+        tenants = poller.load_tenants(self.write_tenants(tmp_path, 3))
+        assert [tenant.tenant_id for tenant in tenants] == ['0', '1', '2'], (
+            'Проверьте, что студенты загружаются из файла конфигурации.'
+        )
+        assert tenants[2].chat_id == '1002'
+
+    def test_load_tenants_duplicate_id(self, tmp_path):
+        import poller
+
+        path = tmp_path / 'tenants.json'
+        tenant = {'id': 1, 'practicum_token': 'token', 'chat_id': 1}
+        path.write_text(json.dumps([tenant, tenant]))
+        with pytest.raises(ValueError):
+            poller.load_tenants(path)
+
+    def test_cursor_waits_for_delivery(self, tmp_path, monkeypatch,
+                                       homework_module):
+        import poller
+
+        monkeypatch.setattr(
+            homework_module, 'fetch_homework_statuses',
+            lambda *args, **kwargs: {
+                'homeworks': [self.HOMEWORK], 'current_date': 1000
+            }
+        )
+        bot = utils.MockTelegramBot()
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        outbox = send_queue.SendQueue(bot)
+        engine = poller.Poller(
+            [poller.Tenant('7', 'token', '1007')], bot,
+            store=store, outbox=outbox
+        )
+        tenant_state = engine.states['7']
+        tenant_state.timestamp = 500
+        engine.poll_tenant('7')
+        assert tenant_state.timestamp == 500, (
+            'Курсор не должен сдвигаться, пока сообщение не доставлено.'
+        )
+        assert tenant_state.statuses.get('hw123') is None
+        # очередь отбросила сообщение: следующий опрос ставит его снова
+        message, = outbox.pending()
+        outbox._messages.clear()
+        outbox._chats.clear()
+        message.on_failed()
+        engine.poll_tenant('7')
+        message, = outbox.pending()
+        message.on_sent()
+        assert tenant_state.timestamp == 1000
+        assert tenant_state.statuses.get('hw123') == 'approved'
+        store.flush()
+        assert store.get('7') == 1000
+        store.close()
+
+    def test_dropped_message_survives_unchanged_response(self, tmp_path):
+        import poller
+
+        class ApiSession:
+            # тело не меняется, меняется только current_date
+            current_date = 1000
+
+            def get(self, url, headers, params, timeout=None):
+                self.current_date += 10
+                response = requests.Response()
+                response.status_code = 200
+                response._content = json.dumps({
+                    'homeworks': [TestPoller.HOMEWORK],
+                    'current_date': self.current_date,
+                }).encode()
+                return response
+
+        bot = utils.MockTelegramBot()
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        outbox = send_queue.SendQueue(bot)
+        engine = poller.Poller(
+            [poller.Tenant('7', 'token', '1007')], bot, session=ApiSession(),
+            store=store, outbox=outbox
+        )
+        tenant_state = engine.states['7']
+        tenant_state.timestamp = 500
+        engine.poll_tenant('7')
+        message, = outbox.pending()
+        outbox._messages.clear()
+        outbox._chats.clear()
+        message.on_failed()
+        engine.poll_tenant('7')
+        assert tenant_state.timestamp == 500, (
+            'Курсор не должен уходить дальше недоставленной работы.'
+        )
+        message, = outbox.pending()
+        message.on_sent()
+        assert tenant_state.timestamp == 1020
+        assert tenant_state.statuses.get('hw123') == 'approved', (
+            'Отброшенное сообщение должно найтись при следующем опросе, '
+            'даже если ответ API не изменился.'
+        )
+        outbox._messages.clear()
+        outbox._chats.clear()
+        engine.poll_tenant('7')
+        assert not outbox.pending()
+        assert tenant_state.cache.digest is not None, (
+            'Когда всё доставлено, ответ запоминается в кэше.'
+        )
+        store.close()
+
+    def test_repeated_failures_are_collapsed(self, tmp_path, monkeypatch,
+                                             homework_module):
+        import poller
+
+        attempts = []
+
+        def mock_fetch(*args, **kwargs):
+            attempts.append(1)
+            if len(attempts) <= 3:
+                raise ConnectionError(f'попытка {len(attempts)}')
+            return {'homeworks': [], 'current_date': 1000}
+
+        monkeypatch.setattr(
+            homework_module, 'fetch_homework_statuses', mock_fetch
+        )
+        bot = utils.MockTelegramBot()
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        outbox = send_queue.SendQueue(bot)
+        engine = poller.Poller(
+            [poller.Tenant('7', 'token', '1007')], bot,
+            store=store, outbox=outbox
+        )
+        texts = []
+        for _ in range(4):
+            engine.poll_tenant('7')
+            texts.extend(message.text for message in outbox.pending())
+            outbox._messages.clear()
+            outbox._chats.clear()
+        assert len(texts) == 2, (
+            'Повторы сбоя с другим текстом не должны отправляться '
+            'каждый цикл.'
+        )
+        assert texts[0].startswith('Сбой в работе программы: попытка 1')
+        assert texts[1].startswith('Работа восстановлена')
+        store.close()
+
+    def test_poll_all_tenants_with_bounded_concurrency(
+            self, tmp_path, monkeypatch, homework_module):
+        import poller
+
+        tenants_qty = 50
+        max_in_flight = 4
+        tenants = poller.load_tenants(
+            self.write_tenants(tmp_path, tenants_qty)
+        )
+        bot = utils.MockTelegramBot()
+        lock = threading.Lock()
+        stats = {'in_flight': 0, 'peak': 0, 'tokens': set()}
+
+        def mock_fetch(token, timestamp, session=None, cache=None):
+            with lock:
+                stats['in_flight'] += 1
+                stats['peak'] = max(stats['peak'], stats['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                stats['in_flight'] -= 1
+                stats['tokens'].add(token)
+            return {'homeworks': [self.HOMEWORK], 'current_date': 1000}
+
+        monkeypatch.setattr(
+            homework_module, 'fetch_homework_statuses', mock_fetch
+        )
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        outbox = send_queue.SendQueue(bot, global_rate=1000)
+        engine = poller.Poller(
+            tenants, bot, max_in_flight=max_in_flight, retry_period=3600,
+            store=store, outbox=outbox
+        )
+
+        async def run_until_polled():
+            task = asyncio.ensure_future(engine.run())
+            while len(stats['tokens']) < tenants_qty:
+                await asyncio.sleep(0.01)
+            engine.stop()
+            await task
+
+        asyncio.run(asyncio.wait_for(run_until_polled(), 10))
+        assert stats['peak'] <= max_in_flight, (
+            'Число одновременных запросов не должно превышать max_in_flight.'
+        )
+        assert 'homework_poller_tenants ' not in (
+            metrics.REGISTRY.render()
+        ), 'После остановки опросчик снимает свои показатели с реестра.'
+        for state in engine.states.values():
+            assert state.statuses.get('hw123') == 'approved', (
+                'Проверьте, что у каждого студента своё состояние.'
+            )
+        store.close()
+        restored = state_store.StateStore(store.path)
+        assert restored.get('7') == 1000, (
+            'Курсор студента должен сохраняться по current_date из ответа.'
+        )
+        assert restored.statuses('7') == {'hw123': 'approved'}, (
+            'Отправленные статусы должны сохраняться в хранилище.'
+        )
+        restored.close()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import response_cache
+
+
+class FakeResponse:
+
+    def __init__(self, data=None, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode() if data is not None else b''
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TestResponseCache:
+    HOMEWORKS = [{'id': 1, 'homework_name': 'hw1', 'status': 'approved'}]
+
+    @pytest.fixture
+    def responses(self, monkeypatch, homework_module):
+        queue = []
+        sent_headers = []
+
+        def mock_get(url, headers, params, timeout=None):
+            sent_headers.append(headers)
+            return queue.pop(0)
+
+        monkeypatch.setattr(homework_module.requests, 'get', mock_get)
+        return queue, sent_headers
+
+    def fetch(self, homework_module, cache, timestamp=1):
+        return homework_module.fetch_homework_statuses(
+            'token', timestamp, cache=cache
+        )
+
+    def test_same_body_is_not_decoded(self, responses, homework_module):
+        queue, _ = responses
+        cache = response_cache.ResponseCache()
+        for current_date in (10, 20, 30):
+            queue.append(FakeResponse(
+                {'homeworks': self.HOMEWORKS, 'current_date': current_date}
+            ))
+        assert self.fetch(homework_module, cache)['homeworks']
+        # ответ не обработан - повторный разбирается заново
+        assert self.fetch(homework_module, cache)['homeworks'], (
+            'Без commit() ответ должен разбираться полностью.'
+        )
+        cache.commit()
+        assert self.fetch(homework_module, cache) == {
+            'homeworks': [], 'current_date': 30
+        }, 'Неизменившийся ответ должен возвращаться без работ.'
+
+    def test_not_modified(self, responses, homework_module):
+        queue, sent_headers = responses
+        cache = response_cache.ResponseCache()
+        queue.append(FakeResponse(
+            {'homeworks': self.HOMEWORKS, 'current_date': 10},
+            headers={'ETag': '"v1"', 'Last-Modified': 'yesterday'}
+        ))
+        self.fetch(homework_module, cache)
+        cache.commit()
+        queue.append(FakeResponse(status_code=304))
+        assert self.fetch(homework_module, cache, timestamp=10) == {
+            'homeworks': [], 'current_date': 10
+        }
+        assert sent_headers[-1]['If-None-Match'] == '"v1"', (
+            'Запрос должен уходить с валидаторами прошлого ответа.'
+        )
+        assert sent_headers[-1]['If-Modified-Since'] == 'yesterday'
@@ -0,0 +1,36 @@
+import pytest
+
+import scheduler
+
+
+class TestPollPolicy:
+
+    def policy(self, **kwargs):
+        params = dict(minimum=60, maximum=3600, idle_step=100, jitter=0)
+        params.update(kwargs)
+        return scheduler.PollPolicy(600, **params)
+
+    def test_reviewing_is_polled_faster(self):
+        policy = self.policy()
+        assert policy.next_interval(reviewing=True, idle_for=0) == 60, (
+            'Работы на проверке должны опрашиваться чаще.'
+        )
+        assert policy.next_interval(reviewing=False, idle_for=0) == 600
+
+    def test_idle_interval_grows_to_maximum(self):
+        policy = self.policy()
+        assert policy.next_interval(reviewing=False, idle_for=150) == 1200
+        assert policy.next_interval(
+            reviewing=False, idle_for=10 ** 9
+        ) == 3600, 'Интервал не должен превышать верхнюю границу.'
+
+    def test_jitter_stays_in_bounds(self):
+        low = self.policy(jitter=0.5, rng=lambda: 0.0)
+        high = self.policy(jitter=0.5, rng=lambda: 1.0)
+        assert low.next_interval(reviewing=False, idle_for=0) == 300
+        assert high.next_interval(reviewing=False, idle_for=0) == 900
+        assert low.next_interval(reviewing=True, idle_for=0) == 60
+
+    def test_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            scheduler.PollPolicy(600, minimum=700)
@@ -0,0 +1,88 @@
+import pytest
+
+import schema
+
+
+def make_response(*homeworks):
+    return {'homeworks': list(homeworks), 'current_date': 1}
+
+
+class TestValidateResponse:
+
+    def test_returns_compact_records(self):
+        records = schema.validate_response(make_response(
+            {'id': 7, 'homework_name': 'hw7', 'status': 'approved',
+             'reviewer_comment': 'Отлично'},
+            {'homework_name': 'hw8', 'status': 'reviewing'},
+        ))
+        assert records == [
+            schema.Homework('hw7', 'approved', 7),
+            schema.Homework('hw8', 'reviewing'),
+        ], 'Каждая работа должна превращаться в запись Homework.'
+        assert records[0]['status'] == 'approved'
+        assert records[1].get('id') is None
+        assert 'id' not in records[1]
+
+    @pytest.mark.parametrize('homework, error, path', [
+        ('hw', TypeError, 'homeworks[1]'),
+        ({'status': 'approved'}, KeyError, 'homework_name'),
+        ({'homework_name': 'hw', 'status': 1}, TypeError,
+         'homeworks[1].status'),
+        ({'homework_name': 'hw', 'status': 'approved', 'id': '1'},
+         TypeError, 'homeworks[1].id'),
+    ])
+    def test_error_has_path(self, homework, error, path):
+        valid = {'homework_name': 'hw0', 'status': 'approved'}
+        with pytest.raises(error) as info:
+            schema.validate_response(make_response(valid, homework))
+        assert path in str(info.value), (
+            'Текст ошибки должен указывать путь до неверного значения.'
+        )
+        assert 'homeworks[1]' in str(info.value)
+
+    def test_unknown_status_does_not_reject_response(self, homework_module):
+        records = schema.validate_response(make_response(
+            {'homework_name': 'hw1', 'status': 'on_hold'},
+            {'homework_name': 'hw2', 'status': 'approved'},
+        ))
+        assert len(records) == 2, (
+            'Неизвестный статус одной работы не должен отбрасывать ответ.'
+        )
+        sent = []
+        assert homework_module.send_new_statuses(
+            homework_module.state.StatusIndex(), records,
+            lambda text, record: sent.append(record.homework_name)
+        ) == 1
+        assert sent == ['hw2'], (
+            'Работа с неизвестным статусом пропускается, остальные '
+            'отправляются.'
+        )
+
+    def test_parse_status_accepts_record(self, homework_module):
+        record = schema.Homework('hw1', 'rejected', 1)
+        assert homework_module.parse_status(record) == (
+            homework_module.parse_status(
+                {'homework_name': 'hw1', 'status': 'rejected'}
+            )
+        )
+
+
+class RawResponse:
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        raise AssertionError('При JSON_BACKEND=orjson json() не вызывается.')
+
+
+@pytest.mark.skipif(schema.orjson is None, reason='orjson не установлен')
+class TestDecode:
+
+    def test_orjson_backend(self):
+        response = RawResponse(b'{"homeworks": [], "current_date": 1}')
+        assert schema.decode(response, 'orjson') == make_response()
+
+    def test_orjson_error_is_value_error(self):
+        with pytest.raises(ValueError):
+            schema.decode(RawResponse(b'<html>'), 'orjson')
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import telegram
+
+import send_queue
+import utils
+
+
+class RecordingBot(utils.MockTelegramBot):
+
+    def __init__(self, fail_with=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_with = fail_with
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.fail_with is not None:
+            error, self.fail_with = self.fail_with, None
+            raise error
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+class TestSendQueue:
+
+    def test_queued_message_is_coalesced(self):
+        bot = RecordingBot()
+        outbox = send_queue.SendQueue(bot)
+        outbox.put('1', 'reviewing', key=('1', 'hw'))
+        outbox.put('1', 'approved', key=('1', 'hw'))
+        outbox.put('2', 'rejected', key=('2', 'hw'))
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert [text for _, text, _ in bot.sent] == ['approved', 'rejected'], (
+            'Новый статус работы должен заменять ещё не отправленный.'
+        )
+        assert outbox.coalesced == 1
+
+    def test_chat_rate_limit(self):
+        bot = RecordingBot()
+        outbox = send_queue.SendQueue(bot, global_rate=1000, chat_rate=20)
+        for number in range(3):
+            outbox.put('1', f'message {number}')
+        outbox.put('2', 'other chat')
+        outbox.start()
+        outbox.stop(timeout=5)
+        chat_times = [sent_at for chat, _, sent_at in bot.sent if chat == '1']
+        assert len(chat_times) == 3
+        assert chat_times[2] - chat_times[0] >= 2 / 20 * 0.9, (
+            'Проверьте, что частота отправки в один чат ограничена.'
+        )
+        assert bot.sent[1][0] == '2', (
+            'Чат, исчерпавший лимит, не должен задерживать другие чаты.'
+        )
+
+    def test_retry_after(self):
+        bot = RecordingBot(fail_with=telegram.error.RetryAfter(0.1))
+        delivered = []
+        outbox = send_queue.SendQueue(bot, chat_rate=100)
+        started = time.monotonic()
+        outbox.put('1', 'approved', on_sent=lambda: delivered.append(True))
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert delivered, (
+            'Сообщение должно быть отправлено повторно после retry_after.'
+        )
+        assert bot.sent[0][2] - started >= 0.1
+
+    def test_slow_send_does_not_block_other_chats(self):
+        release = threading.Event()
+
+        class HangingBot(RecordingBot):
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if chat_id == 'slow':
+                    release.wait(5)
+                super().send_message(chat_id, text, **kwargs)
+
+        bot = HangingBot()
+        outbox = send_queue.SendQueue(bot, global_rate=1000, workers=2)
+        outbox.start()
+        outbox.put('slow', 'hanging')
+        for number in range(5):
+            outbox.put(str(number), 'fast')
+        deadline = time.monotonic() + 5
+        while len(bot.sent) < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(bot.sent) == 5, (
+            'Зависшая отправка в один чат не должна задерживать остальные.'
+        )
+        release.set()
+        outbox.stop(timeout=5)
+        assert outbox.sent == 6
+
+    def test_failed_send_is_retried(self):
+        class FlakyBot(RecordingBot):
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if not self.fails:
+                    return super().send_message(chat_id, text, **kwargs)
+                self.fails -= 1
+                raise RuntimeError('connection reset')
+
+        bot = FlakyBot()
+        bot.fails = 2
+        delivered = []
+        outbox = send_queue.SendQueue(bot, chat_rate=100, retry_delay=0.01)
+        outbox.put('1', 'approved', on_sent=lambda: delivered.append(True))
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert delivered, (
+            'Сбой отправки не должен останавливать поток и терять сообщение.'
+        )
+        assert outbox.busy == 0 and outbox.failed == 0
+
+    def test_message_dropped_after_attempts(self):
+        class BrokenBot(RecordingBot):
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                raise telegram.error.NetworkError('bot was blocked')
+
+        failed = []
+        outbox = send_queue.SendQueue(
+            BrokenBot(), chat_rate=100, attempts=3, retry_delay=0.01
+        )
+        outbox.put('1', 'approved', on_failed=lambda: failed.append(True))
+        outbox.start()
+        outbox.stop(timeout=5)
+        assert failed and outbox.failed == 1, (
+            'После всех попыток сообщение отбрасывается с вызовом on_failed.'
+        )
+
+    def test_discarded_messages_are_not_sent(self):
+        release = threading.Event()
+
+        class HangingBot(RecordingBot):
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                if text == 'in flight':
+                    release.wait(5)
+                    raise RuntimeError('connection reset')
+                super().send_message(chat_id, text, **kwargs)
+
+        bot = HangingBot()
+        failed = []
+        outbox = send_queue.SendQueue(
+            bot, global_rate=1000, chat_rate=1000, retry_delay=0.01
+        )
+        outbox.put(
+            '1', 'in flight', key=('7', 'hw0'),
+            on_failed=lambda: failed.append(True)
+        )
+        outbox.start()
+        deadline = time.monotonic() + 5
+        while not outbox.busy and time.monotonic() < deadline:
+            time.sleep(0.01)
+        outbox.put('1', 'queued', key=('7', 'hw1'))
+        outbox.put('2', 'other tenant', key=('8', 'hw1'))
+        assert outbox.discard(lambda key: key[0] == '7') == 1
+        release.set()
+        outbox.stop(timeout=5)
+        assert [text for _, text, _ in bot.sent] == ['other tenant'], (
+            'Убранные сообщения не отправляются, а отправка, которая шла '
+            'в этот момент, не повторяется.'
+        )
+        assert not failed and not len(outbox)
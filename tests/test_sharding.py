@@ -0,0 +1,188 @@
+import sharding
+import state_store
+
+
+class TestHashRing:
+    KEYS = [str(number) for number in range(2000)]
+
+    def owners(self, ring):
+        return {key: ring.owner(key) for key in self.KEYS}
+
+    def test_only_affected_keys_move(self):
+        before = self.owners(sharding.HashRing(['a', 'b', 'c']))
+        after = self.owners(sharding.HashRing(['a', 'b', 'c', 'd']))
+        moved = [key for key in self.KEYS if before[key] != after[key]]
+        assert all(after[key] == 'd' for key in moved), (
+            'При добавлении воркера студенты переходят только к нему.'
+        )
+        assert len(moved) < len(self.KEYS) / 2
+        removed = self.owners(sharding.HashRing(['a', 'c', 'd']))
+        assert all(
+            removed[key] == after[key]
+            for key in self.KEYS if after[key] != 'b'
+        ), 'При уходе воркера переходят только его студенты.'
+
+    def test_empty_ring(self):
+        assert sharding.HashRing().owner('1') is None
+
+
+class TestMembership:
+
+    def test_failover_after_lease_expiry(self, tmp_path):
+        now = [1000.0]
+        path = str(tmp_path / 'shards.sqlite3')
+        workers = [
+            sharding.Membership(
+                path, worker_id, lease_ttl=30, clock=lambda: now[0]
+            )
+            for worker_id in ('a', 'b')
+        ]
+        for worker in workers:
+            worker.heartbeat()
+        workers[0].heartbeat()
+        now[0] += 10
+        keys = [str(number) for number in range(200)]
+        owned = [
+            sum(worker.owns(key) for worker in workers) for key in keys
+        ]
+        assert owned == [1] * len(keys), (
+            'Каждого студента должен обслуживать ровно один воркер.'
+        )
+        # воркер b перестал продлевать аренду
+        now[0] += 30
+        workers[0].heartbeat()
+        assert workers[0].ring.nodes == {'a'}
+        assert not all(workers[0].owns(key) for key in keys), (
+            'Перешедших студентов воркер берёт после задержки передачи.'
+        )
+        now[0] += 10
+        assert all(workers[0].owns(key) for key in keys)
+        for worker in workers:
+            worker.stop()
+
+
+class TestStateStoreReload:
+
+    def test_reload_reads_other_process_writes(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        stale = state_store.StateStore(path)
+        other = state_store.StateStore(path)
+        other.advance('7', 500)
+        other.record_status('7', 'hw1', 'approved')
+        other.close()
+        assert stale.get('7') is None
+        assert stale.reload('7') == (500, {'hw1': 'approved'}), (
+            'reload() должен читать состояние, записанное другим процессом.'
+        )
+        assert stale.get('7') == 500
+        stale.close()
+
+
+class TestPollerSchedule:
+
+    def test_foreign_tenants_leave_schedule_until_ring_changes(
+            self, tmp_path):
+        import poller
+        import send_queue
+        import utils
+
+        now = [1000.0]
+        path = str(tmp_path / 'shards.sqlite3')
+        workers = [
+            sharding.Membership(
+                path, worker_id, lease_ttl=30, clock=lambda: now[0]
+            )
+            for worker_id in ('a', 'b')
+        ]
+        for worker in workers:
+            worker.heartbeat()
+        shard = workers[0]
+        shard.heartbeat()
+        bot = utils.MockTelegramBot()
+        tenants = [
+            poller.Tenant(str(number), 'token', str(number))
+            for number in range(50)
+        ]
+        engine = poller.Poller(
+            tenants, bot, shard=shard, outbox=send_queue.SendQueue(bot),
+            store=state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        )
+        engine.unpark()
+        version = shard.version
+        foreign = [
+            tenant.tenant_id for tenant in tenants
+            if engine.park(tenant.tenant_id, version)
+        ]
+        assert foreign and len(foreign) < len(tenants)
+        assert not any(shard.assigned(tenant_id) for tenant_id in foreign), (
+            'Из расписания убираются только студенты других процессов.'
+        )
+        engine.unpark()
+        assert not engine._schedule, (
+            'Пока кольцо не изменилось, чужие студенты не опрашиваются.'
+        )
+        # воркер b перестал продлевать аренду
+        now[0] += 40
+        shard.heartbeat()
+        engine.unpark()
+        assert sorted(tenant_id for _, tenant_id in engine._schedule) == (
+            sorted(foreign)
+        ), 'После смены кольца студенты возвращаются в расписание.'
+        assert not engine.park(foreign[0], version), (
+            'Студент, кольцо которого изменилось во время опроса, '
+            'остаётся в расписании.'
+        )
+        engine.store.close()
+        for worker in workers:
+            worker.stop()
+
+    def test_moved_tenant_messages_are_released(self, tmp_path):
+        import poller
+        import send_queue
+        import utils
+
+        now = [1000.0]
+        path = str(tmp_path / 'shards.sqlite3')
+        shard = sharding.Membership(
+            path, 'a', lease_ttl=30, clock=lambda: now[0]
+        )
+        shard.heartbeat()
+        bot = utils.MockTelegramBot()
+        tenants = [
+            poller.Tenant(str(number), 'token', str(number))
+            for number in range(50)
+        ]
+        outbox = send_queue.SendQueue(bot)
+        engine = poller.Poller(
+            tenants, bot, shard=shard, outbox=outbox,
+            store=state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        )
+        engine.unpark()
+        homework_ = {'homework_name': 'hw1', 'status': 'approved'}
+        for tenant in tenants:
+            engine.process(tenant.tenant_id, [homework_], 2000)
+        # к кольцу присоединился воркер b
+        other = sharding.Membership(
+            path, 'b', lease_ttl=30, clock=lambda: now[0]
+        )
+        other.heartbeat()
+        shard.heartbeat()
+        engine.unpark()
+        moved = [
+            tenant.tenant_id for tenant in tenants
+            if not shard.assigned(tenant.tenant_id)
+        ]
+        assert moved and len(moved) < len(tenants)
+        queued = {message.key[0] for message in outbox.pending()}
+        assert not queued & set(moved), (
+            'Сообщения студентов, ушедших к другому процессу, убираются '
+            'из очереди: новый владелец найдёт эти работы сам.'
+        )
+        assert len(queued) == len(tenants) - len(moved)
+        assert engine.process(moved[0], [homework_], 2000) == 0, (
+            'Опрос, закончившийся после передачи, не ставит сообщений.'
+        )
+        assert engine.states[moved[0]].timestamp == 0
+        engine.store.close()
+        shard.stop()
+        other.stop()
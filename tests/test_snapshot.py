@@ -0,0 +1,105 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+import poller
+import send_queue
+import shutdown
+import snapshot
+import state_store
+import utils
+
+
+class TestGracefulShutdown:
+
+    def test_signal_interrupts_pause(self):
+        graceful = shutdown.GracefulShutdown()
+        with pytest.raises(SystemExit):
+            with graceful.pause():
+                graceful.handle(signal.SIGTERM, None)
+        assert graceful.requested
+
+    def test_signal_during_cycle_skips_pause(self):
+        graceful = shutdown.GracefulShutdown()
+        graceful.handle(signal.SIGTERM, None)
+        with pytest.raises(SystemExit):
+            with graceful.pause():
+                raise AssertionError('Пауза после сигнала не начинается.')
+
+
+class TestWarmRestart:
+    HOMEWORK = {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+
+    def make(self, tmp_path):
+        bot = utils.MockTelegramBot()
+        tenants = [
+            poller.Tenant(str(number), f'token{number}', str(number))
+            for number in range(3)
+        ]
+        return poller.Poller(
+            tenants, bot,
+            store=state_store.StateStore(str(tmp_path / 'state.sqlite3')),
+            outbox=send_queue.SendQueue(bot),
+            snapshot_path=str(tmp_path / 'poller.snapshot')
+        )
+
+    def test_snapshot_round_trip(self, tmp_path):
+        engine = self.make(tmp_path)
+        now = time.monotonic()
+        engine.schedule('0', now + 300)
+        engine.schedule('1', now - 1000)
+        engine.schedule('2', now + 30)
+        engine.process('0', [self.HOMEWORK])
+        assert engine.states['1'].reporter.failure(ValueError('500'))
+        snapshot.save(engine.snapshot_path, engine.snapshot())
+        engine.store.close()
+
+        restored = self.make(tmp_path)
+        started = time.monotonic()
+        restored._schedule_start()
+        due = {tenant_id: at - started for at, tenant_id in restored._schedule}
+        assert 290 < due['0'] <= 300, (
+            'Опрос должен продолжаться по сохранённому расписанию.'
+        )
+        assert 0 <= due['1'] <= poller.CATCHUP_SPREAD
+        assert [message.text for message in restored.outbox.pending()] == [
+            'Изменился статус проверки работы "hw1". '
+            'Работа проверена: ревьюеру всё понравилось. Ура!'
+        ], 'Неотправленные сообщения должны восстанавливаться из снимка.'
+        assert restored.process('0', [self.HOMEWORK]) == 0, (
+            'Восстановленное сообщение не должно дублироваться.'
+        )
+        assert restored.states['1'].reporter.failure(ValueError('500')) is (
+            None
+        ), 'После перезапуска о том же сбое не сообщается повторно.'
+        assert restored.states['1'].reporter.success() == (
+            'Работа восстановлена. Сбоев за время перебоя: 2.'
+        ), 'Восстановление после перезапуска должно быть замечено.'
+        assert not os.path.exists(restored.snapshot_path), (
+            'Снимок используется только один раз.'
+        )
+        restored.store.close()
+
+    def test_sigterm_writes_snapshot(self, tmp_path, monkeypatch,
+                                     homework_module):
+        monkeypatch.setattr(
+            homework_module, 'fetch_homework_statuses',
+            lambda *args, **kwargs: {'homeworks': [], 'current_date': 1}
+        )
+        engine = self.make(tmp_path)
+
+        async def terminate_soon():
+            asyncio.get_running_loop().call_later(
+                0.2, os.kill, os.getpid(), signal.SIGTERM
+            )
+            await asyncio.wait_for(poller.serve(engine), 10)
+
+        asyncio.run(terminate_soon())
+        engine.store.close()
+        saved = snapshot.load(engine.snapshot_path)
+        assert saved and set(saved['tenants']) == {'0', '1', '2'}, (
+            'По SIGTERM poller должен сохранить снимок состояния.'
+        )
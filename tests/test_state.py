@@ -0,0 +1,69 @@
+import logging
+
+import utils
+
+
+class TestStatusIndex:
+
+    def test_notify_only_changed_homeworks(self, homework_module):
+        statuses = homework_module.state.StatusIndex()
+        sent = []
+        homeworks = [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+        ]
+        send = lambda text, homework: sent.append(text)  # noqa: E731
+        assert homework_module.send_new_statuses(
+            statuses, homeworks, send
+        ) == 2, 'Проверьте, что обрабатываются все работы из ответа API.'
+        homeworks[0] = dict(homeworks[0], status='rejected')
+        homework_module.send_new_statuses(statuses, homeworks, send)
+        assert len(sent) == 3, (
+            'Сообщение должно отправляться только по работам '
+            'со сменившимся статусом.'
+        )
+        assert sent[-1].startswith(
+            'Изменился статус проверки работы "hw1"'
+        )
+
+    def test_main_sends_every_homework(self, monkeypatch, homework_module,
+                                       random_timestamp):
+        homeworks = [
+            {'homework_name': f'hw{i}', 'status': 'approved'}
+            for i in range(3)
+        ]
+        sent = []
+
+        def mock_get(*args, **kwargs):
+            response = utils.MockResponseGET(random_timestamp=random_timestamp)
+            response.json = lambda: {
+                'homeworks': homeworks, 'current_date': random_timestamp
+            }
+            return response
+
+        def sleep_to_interrupt(secs):
+            raise utils.BreakInfiniteLoop('break')
+
+        for name, value in (('PRACTICUM_TOKEN', 'sometoken'),
+                            ('TELEGRAM_TOKEN', '1234:abcdefg'),
+                            ('TELEGRAM_CHAT_ID', '12345')):
+            monkeypatch.setattr(homework_module, name, value)
+        monkeypatch.setattr(homework_module.requests, 'get', mock_get)
+        monkeypatch.setattr(homework_module.time, 'sleep', sleep_to_interrupt)
+        monkeypatch.setattr(
+            homework_module.telegram, 'Bot', utils.MockTelegramBot
+        )
+        monkeypatch.setattr(
+            homework_module, 'send_message',
+            lambda bot, message: sent.append(message)
+        )
+        logging.disable(logging.WARNING)
+        try:
+            homework_module.main()
+        except utils.BreakInfiniteLoop:
+            pass
+        finally:
+            logging.disable(logging.NOTSET)
+        assert len(sent) == len(homeworks), (
+            'Проверьте, что main() отправляет сообщение по каждой работе.'
+        )
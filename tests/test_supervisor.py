@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+
+import pytest
+
+import circuit_breaker
+import exceptions
+import poller
+import send_queue
+import state_store
+import supervisor
+import utils
+from benchmarks import fake_api
+
+
+def crash_once(batch):
+    """Первый вызов аварийно завершает процесс пула."""
+    marker = os.environ['CRASH_MARKER']
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return supervisor.parse_batch(batch)
+
+
+class CrashingSupervisor(supervisor.Supervisor):
+    batch_task = staticmethod(crash_once)
+
+
+@pytest.fixture
+def api(monkeypatch, homework_module):
+    server = fake_api.FakePracticumAPI(
+        homeworks_per_student=3, change_rate=0, seed=1
+    ).start()
+    monkeypatch.setattr(homework_module, 'ENDPOINT', server.url)
+    yield server
+    server.stop()
+
+
+class TestSupervisor:
+
+    def make(self, tmp_path, cls=supervisor.Supervisor, **kwargs):
+        tenants = [
+            poller.Tenant(str(number), f'token{number}', str(number))
+            for number in range(7)
+        ]
+        bot = utils.MockTelegramBot()
+        engine = cls(
+            tenants, bot, workers=2, batch_size=3,
+            store=state_store.StateStore(str(tmp_path / 'state.sqlite3')),
+            outbox=send_queue.SendQueue(bot),
+            breaker=kwargs.pop('breaker', circuit_breaker.CircuitBreaker()),
+            **kwargs
+        )
+        # с from_date в прошлом эмулятор вернёт все работы
+        for tenant_state in engine.states.values():
+            tenant_state.timestamp = 1
+        return engine
+
+    def test_cycle_delivers_from_single_stage(self, tmp_path, api):
+        engine = self.make(tmp_path)
+        try:
+            assert engine.run_cycle() == 21, (
+                'Супервизор должен получить сообщения по всем работам '
+                'всех студентов из процессов пула.'
+            )
+            assert len(engine.outbox) == 21
+            assert engine.run_cycle() == 0, (
+                'Уже отправленные статусы не должны отправляться повторно.'
+            )
+        finally:
+            engine._executor.shutdown()
+            engine.store.close()
+
+    def test_crashed_worker_is_restarted(self, tmp_path, api, monkeypatch):
+        monkeypatch.setenv('CRASH_MARKER', str(tmp_path / 'crashed'))
+        engine = self.make(tmp_path, CrashingSupervisor)
+        try:
+            assert engine.run_cycle() == 21, (
+                'Пачки упавшего процесса должны быть опрошены повторно.'
+            )
+            assert engine.restarts == 1
+        finally:
+            engine._executor.shutdown()
+            engine.store.close()
+
+    def test_requests_are_not_limited_by_workers(
+            self, tmp_path, monkeypatch, homework_module):
+        # все 7 запросов должны быть «в полёте» одновременно, хотя
+        # процессов пула всего 2
+        barrier = threading.Barrier(7, timeout=5)
+
+        def mock_fetch(token, timestamp, session=None, raw=False):
+            barrier.wait()
+            return json.dumps({
+                'homeworks': [{'homework_name': token, 'status': 'approved'}],
+                'current_date': 1000,
+            }).encode()
+
+        monkeypatch.setattr(
+            homework_module, 'fetch_homework_statuses', mock_fetch
+        )
+        engine = self.make(tmp_path, fetchers=7)
+        try:
+            assert engine.run_cycle() == 7, (
+                'Запросы к API идут параллельно в потоках супервизора, '
+                'а не по одному в каждом процессе пула.'
+            )
+        finally:
+            engine._executor.shutdown()
+            engine._fetch_executor.shutdown()
+            engine.store.close()
+
+    def test_half_open_breaker_sends_one_probe_batch(
+            self, tmp_path, monkeypatch, homework_module):
+        now = [0.0]
+        breaker = circuit_breaker.CircuitBreaker(
+            failure_threshold=1, base_delay=30, jitter=0,
+            clock=lambda: now[0]
+        )
+        requests_sent = []
+        api_is_down = [True]
+
+        def mock_fetch(token, timestamp, session=None, raw=False):
+            requests_sent.append(token)
+            if api_is_down[0]:
+                raise exceptions.ConnectionError(
+                    {'url': 'https://api'}, 'timed out'
+                )
+            return b'{"homeworks": [], "current_date": 1000}'
+
+        monkeypatch.setattr(
+            homework_module, 'fetch_homework_statuses', mock_fetch
+        )
+        engine = self.make(tmp_path, breaker=breaker)
+        try:
+            breaker.record_failure()
+            assert engine.run_cycle() == 0
+            assert not requests_sent, (
+                'Пока автомат разомкнут, API не запрашивается.'
+            )
+            now[0] += 31
+            engine.run_cycle()
+            assert len(requests_sent) == 3, (
+                'В полуоткрытом состоянии уходит только пробная пачка.'
+            )
+            assert breaker.state == circuit_breaker.OPEN
+            requests_sent.clear()
+            api_is_down[0] = False
+            now[0] += 61
+            engine.run_cycle()
+            assert len(requests_sent) == 7, (
+                'Когда проба замкнула автомат, опрашиваются все студенты.'
+            )
+        finally:
+            if engine._executor is not None:
+                engine._executor.shutdown()
+            engine._fetch_executor.shutdown()
+            engine.store.close()
+
+    def test_status_is_remembered_after_delivery(self, tmp_path):
+        engine = self.make(tmp_path)
+        result = supervisor.TenantResult(
+            '0', 1000, (('hw1', 'approved', 'Работа проверена'),)
+        )
+        try:
+            assert engine.deliver(result) == 1
+            tenant_state = engine.states['0']
+            assert tenant_state.timestamp == 1, (
+                'Курсор не должен сдвигаться, пока сообщение не доставлено.'
+            )
+            assert tenant_state.statuses.get('hw1') is None
+            assert engine.deliver(result) == 0, (
+                'Статус, сообщение о котором ждёт отправки, не дублируется.'
+            )
+            message, = engine.outbox.pending()
+            message.on_sent()
+            assert tenant_state.statuses.get('hw1') == 'approved'
+            assert tenant_state.timestamp == 1000
+        finally:
+            engine.store.close()
+
+    def test_worker_failures_are_fingerprinted(self, tmp_path):
+        engine = self.make(tmp_path)
+        key = ('ConnectionError', 'homework.fetch_homework_statuses')
+        try:
+            for attempt in range(3):
+                engine.deliver(supervisor.TenantResult(
+                    '0', error=f'попытка {attempt}', fingerprint=key
+                ))
+            assert [
+                message.text for message in engine.outbox.pending()
+            ] == ['Сбой в работе программы: попытка 0'], (
+                'Повторы сбоя из процесса пула сводятся по отпечатку.'
+            )
+            engine.deliver(supervisor.TenantResult('0', 1000))
+            assert engine.outbox.pending()[0].text.startswith(
+                'Работа восстановлена'
+            )
+        finally:
+            engine.store.close()
@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import exceptions
+import timeouts
+import utils
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+
+    def test_timeout_is_bounded_by_remaining_budget(self):
+        clock = FakeClock()
+        deadline = timeouts.Deadline(10, clock=clock)
+        assert deadline.timeout(3) == 3
+        clock.now += 8
+        assert deadline.timeout(3) == 2, (
+            'Тайм-аут не должен превышать остаток бюджета.'
+        )
+        clock.now += 2
+        with pytest.raises(exceptions.DeadlineExceeded):
+            deadline.timeout(3)
+
+    def test_current_inside_with(self):
+        assert timeouts.current() is None
+        with timeouts.Deadline(5) as deadline:
+            assert timeouts.current() is deadline
+        assert timeouts.current() is None
+
+
+class TestLatencyTracker:
+
+    def test_default_read_timeout_without_samples(self):
+        tracker = timeouts.LatencyTracker(min_samples=5)
+        tracker.observe(0.1)
+        assert tracker.read_timeout() == timeouts.API_READ_TIMEOUT
+        assert tracker.hedge_delay() is None
+
+    def test_read_timeout_follows_p99(self):
+        tracker = timeouts.LatencyTracker(min_samples=5)
+        for _ in range(99):
+            tracker.observe(0.5)
+        tracker.observe(1.0)
+        assert tracker.read_timeout() == 1.0 * timeouts.TIMEOUT_MULTIPLIER, (
+            'Тайм-аут чтения должен считаться по p99 задержки.'
+        )
+        assert tracker.hedge_delay() == 0.5
+
+    def test_read_timeout_is_clamped(self):
+        tracker = timeouts.LatencyTracker(min_samples=1)
+        tracker.observe(0.001)
+        assert tracker.read_timeout() == timeouts.API_READ_TIMEOUT_MIN
+        tracker.observe(1000)
+        assert tracker.read_timeout() == timeouts.API_READ_TIMEOUT
+
+    def test_timeout_recovers_after_latency_step_up(self):
+        tracker = timeouts.LatencyTracker(min_samples=5)
+        for _ in range(timeouts.LATENCY_WINDOW):
+            tracker.observe(0.1)
+        latency = 5.0
+        assert tracker.read_timeout() < latency
+        for attempt in range(10):
+            read_timeout = tracker.read_timeout()
+            if latency <= read_timeout:
+                break
+            # запрос прерван по тайм-ауту: задержка не меньше него
+            tracker.observe(read_timeout)
+        else:
+            pytest.fail('Тайм-аут чтения не догнал выросшую задержку API.')
+
+
+class TestHedged:
+
+    def test_fast_call_is_not_duplicated(self):
+        calls = []
+
+        def call():
+            calls.append(1)
+            return 'ok'
+
+        assert timeouts.hedged(call, 1.0) == 'ok'
+        assert len(calls) == 1, 'Быстрый запрос не нужно дублировать.'
+
+    def test_slow_call_is_hedged(self):
+        release = threading.Event()
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+                return 'slow'
+            return 'fast'
+
+        started = time.monotonic()
+        try:
+            assert timeouts.hedged(call, 0.05) == 'fast', (
+                'Должен использоваться ответ, пришедший первым.'
+            )
+        finally:
+            release.set()
+        assert time.monotonic() - started < 1
+
+    def test_failed_hedge_waits_for_primary(self):
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return 'primary'
+            raise RuntimeError('hedge')
+
+        assert timeouts.hedged(call, 0.01) == 'primary'
+
+    def test_queueing_does_not_trigger_hedge(self):
+        release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        # единственный поток пула занят другим запросом
+        executor.submit(release.wait, 5)
+        calls = []
+
+        def call():
+            calls.append(1)
+            return 'ok'
+
+        timer = threading.Timer(0.1, release.set)
+        timer.start()
+        try:
+            assert timeouts.hedged(call, 0.05, executor=executor) == 'ok'
+        finally:
+            release.set()
+            executor.shutdown()
+        assert len(calls) == 1, (
+            'Ожидание свободного потока не должно порождать дубль запроса.'
+        )
+
+
+class TestFetchTimeouts:
+
+    def test_request_has_connect_and_read_timeouts(
+            self, monkeypatch, homework_module):
+        seen = {}
+
+        def mock_get(*args, **kwargs):
+            seen.update(kwargs)
+            return utils.MockResponseGET(
+                random_timestamp=1, current_timestamp=1
+            )
+
+        monkeypatch.setattr(homework_module.requests, 'get', mock_get)
+        with timeouts.Deadline(2):
+            homework_module.get_api_answer(1)
+        connect, read = seen['timeout']
+        assert connect <= timeouts.API_CONNECT_TIMEOUT
+        assert read <= 2, 'Тайм-аут чтения ограничен бюджетом цикла.'
+
+    def test_timed_out_request_is_observed(
+            self, monkeypatch, homework_module):
+        def mock_get(*args, **kwargs):
+            raise homework_module.requests.Timeout('read timeout')
+
+        tracker = timeouts.LatencyTracker()
+        monkeypatch.setattr(timeouts, 'LATENCY', tracker)
+        monkeypatch.setattr(homework_module.requests, 'get', mock_get)
+        with pytest.raises(exceptions.ConnectionError):
+            homework_module.get_api_answer(1)
+        assert len(tracker._samples) == 1, (
+            'Запрос, прерванный по тайм-ауту, должен попадать в окно задержек.'
+        )
+
+    def test_exhausted_budget_skips_request(
+            self, monkeypatch, homework_module):
+        def mock_get(*args, **kwargs):
+            raise AssertionError('Запрос после исчерпания бюджета.')
+
+        monkeypatch.setattr(homework_module.requests, 'get', mock_get)
+        with pytest.raises(exceptions.DeadlineExceeded):
+            with timeouts.Deadline(0):
+                homework_module.get_api_answer(1)
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+import tracing
+import utils
+
+
+def read_spans(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    exporter = tracing.JsonlExporter(str(tmp_path / 'traces.jsonl'))
+    monkeypatch.setattr(tracing.TRACER, 'exporter', exporter)
+    monkeypatch.setattr(tracing.TRACER, 'sample_rate', 1.0)
+    return tracing.TRACER
+
+
+class TestTracer:
+
+    def test_spans_are_nested_in_trace(self, tracer):
+        with tracing.trace('cycle', tenant='7'):
+            with tracing.span('get_api_answer') as span:
+                span.set(http_status=200)
+            with tracing.span('check_response'):
+                pass
+        tracer.exporter.flush()
+        spans = {span['name']: span for span in read_spans(
+            tracer.exporter.path
+        )}
+        assert set(spans) == {'cycle', 'get_api_answer', 'check_response'}
+        root = spans['cycle']
+        assert root['parent_id'] is None
+        assert root['attributes'] == {'tenant': '7'}
+        for name in ('get_api_answer', 'check_response'):
+            assert spans[name]['trace_id'] == root['trace_id']
+            assert spans[name]['parent_id'] == root['span_id'], (
+                'Этапы должны быть вложены в трассу цикла.'
+            )
+        assert spans['get_api_answer']['attributes'] == {'http_status': 200}
+
+    def test_unsampled_trace_writes_nothing(self, tracer, monkeypatch):
+        monkeypatch.setattr(tracer, 'sample_rate', 0)
+        with tracing.trace('cycle'):
+            with tracing.span('get_api_answer') as span:
+                span.set(http_status=200)
+        assert tracer.exporter._thread is None, (
+            'Цикл вне выборки не должен трассироваться.'
+        )
+
+    def test_span_outside_trace_is_noop(self, tracer):
+        with tracing.span('parse_status') as span:
+            assert span is tracing.NOOP_SPAN
+
+    def test_error_is_recorded(self, tracer):
+        with pytest.raises(ValueError):
+            with tracing.trace('cycle'):
+                raise ValueError('bad')
+        tracer.exporter.flush()
+        [span] = read_spans(tracer.exporter.path)
+        assert span['attributes']['error'] == 'ValueError'
+
+    def test_full_buffer_drops_spans(self, tmp_path):
+        exporter = tracing.JsonlExporter(
+            str(tmp_path / 'traces.jsonl'), buffer_size=1
+        )
+        # поток записи не запущен: буфер переполняется сразу
+        exporter._thread = object()
+        span = tracing.Span('t', None, 'cycle', {})
+        span.finish()
+        exporter.export(span)
+        exporter.export(span)
+        assert exporter.dropped == 1, (
+            'При переполнении буфера интервал отбрасывается без ожидания.'
+        )
+
+    def test_writer_survives_bad_span(self, tracer):
+        with tracing.trace('cycle') as span:
+            span.set(payload=object())
+        tracer.exporter.flush()
+        with tracing.trace('cycle'):
+            pass
+        tracer.exporter.flush()
+        assert tracer.exporter.dropped == 1
+        assert len(read_spans(tracer.exporter.path)) == 1, (
+            'Ошибка записи одного интервала не должна останавливать поток.'
+        )
+
+    def test_summarize(self):
+        lines = [
+            json.dumps({'name': name, 'duration_ms': duration})
+            for name, duration in [
+                ('get_api_answer', 100), ('get_api_answer', 300),
+                ('check_response', 5),
+            ]
+        ]
+        rows = tracing.summarize(lines)
+        assert rows[0][:2] == ('get_api_answer', 2), (
+            'Самый медленный этап должен быть первым.'
+        )
+        assert rows[0][4:] == (300, 400)
+
+
+class TestHomeworkTracing:
+
+    def test_fetch_span_attributes(self, tracer, monkeypatch,
+                                   homework_module):
+        def mock_get(*args, **kwargs):
+            return utils.MockResponseGET(random_timestamp=1)
+
+        monkeypatch.setattr(homework_module.requests, 'get', mock_get)
+        with tracing.trace('cycle'):
+            response = homework_module.get_api_answer(1)
+            homework_module.check_response(response)
+        tracer.exporter.flush()
+        spans = {span['name']: span for span in read_spans(
+            tracer.exporter.path
+        )}
+        assert spans['get_api_answer']['attributes']['http_status'] == 200
+        assert spans['check_response']['attributes'] == {'homeworks': 0}
+
+class TestSendQueueTracing:
+
+    def test_send_is_traced_in_cycle_of_put(self, tracer):
+        import send_queue
+
+        outbox = send_queue.SendQueue(utils.MockTelegramBot())
+        with tracing.trace('cycle'):
+            outbox.put('1', 'approved')
+        outbox.start()
+        outbox.stop(timeout=5)
+        tracer.exporter.flush()
+        spans = {span['name']: span for span in read_spans(
+            tracer.exporter.path
+        )}
+        assert spans['send_message']['parent_id'] == (
+            spans['cycle']['span_id']
+        ), 'Отправка из очереди должна попадать в трассу своего цикла.'
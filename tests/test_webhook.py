@@ -0,0 +1,103 @@
+import http.client
+
+import pytest
+import requests
+
+import poller
+import send_queue
+import state_store
+import utils
+import webhook
+
+
+class TestReceiver:
+    HOMEWORK = {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+
+    @pytest.fixture
+    def receiver(self):
+        pushed = []
+
+        def on_push(tenant_id, homeworks):
+            if tenant_id != '7':
+                raise KeyError(tenant_id)
+            pushed.append(homeworks)
+            return len(homeworks)
+
+        server = webhook.start_receiver(
+            on_push, port=0, address='127.0.0.1', secret='s3cret'
+        )
+        host, port = server.server_address[:2]
+        yield f'http://{host}:{port}{webhook.PUSH_PATH}', pushed
+        server.shutdown()
+        server.server_close()
+
+    def post(self, url, body, secret='s3cret'):
+        return requests.post(
+            url, json=body, headers={'X-Webhook-Secret': secret}, timeout=5
+        )
+
+    def test_push_is_delivered(self, receiver):
+        url, pushed = receiver
+        response = self.post(url + '7', self.HOMEWORK)
+        assert response.status_code == 202, (
+            'Корректное уведомление должно приниматься.'
+        )
+        assert response.json() == {'sent': 1}
+        assert pushed[0][0].status == 'approved'
+        self.post(url + '7', {'homeworks': [self.HOMEWORK] * 2})
+        assert len(pushed[1]) == 2
+
+    def test_rejected_requests(self, receiver):
+        url, pushed = receiver
+        assert self.post(url + '7', self.HOMEWORK, 'x').status_code == 403
+        assert self.post(url + '8', self.HOMEWORK).status_code == 404
+        response = self.post(url + '7', [self.HOMEWORK, {'status': 'x'}])
+        assert response.status_code == 400, (
+            'Уведомление, не прошедшее проверку схемы, отклоняется.'
+        )
+        assert 'homeworks[1]' in response.json()['error']
+        assert not pushed
+
+    @pytest.mark.parametrize('length', [None, '-1', 'abc'])
+    def test_bad_content_length(self, receiver, length):
+        url, pushed = receiver
+        host, port = url.split('/')[2].split(':')
+        connection = http.client.HTTPConnection(host, int(port), timeout=5)
+        connection.putrequest('POST', webhook.PUSH_PATH + '7')
+        connection.putheader('X-Webhook-Secret', 's3cret')
+        if length is not None:
+            connection.putheader('Content-Length', length)
+        connection.endheaders()
+        response = connection.getresponse()
+        connection.close()
+        assert response.status == 400, (
+            'Запрос без корректного Content-Length должен отклоняться.'
+        )
+        assert not pushed
+
+    def test_receiver_requires_secret(self):
+        with pytest.raises(ValueError):
+            webhook.start_receiver(lambda *args: 0, port=0, secret='')
+
+
+class TestPollerPush:
+
+    def test_push_and_poll_do_not_duplicate(self, tmp_path):
+        bot = utils.MockTelegramBot()
+        outbox = send_queue.SendQueue(bot)
+        store = state_store.StateStore(str(tmp_path / 'state.sqlite3'))
+        engine = poller.Poller(
+            [poller.Tenant('7', 'token', '1007')], bot,
+            store=store, outbox=outbox
+        )
+        homeworks = webhook.parse_push(
+            b'{"homework_name": "hw1", "status": "approved"}'
+        )
+        assert engine.push('7', homeworks) == 1
+        assert engine.push('7', homeworks) == 0, (
+            'Уже известный статус не должен отправляться повторно.'
+        )
+        assert len(outbox) == 1
+        with pytest.raises(KeyError):
+            engine.push('8', homeworks)
+        store.close()
@@ -0,0 +1,194 @@
+"""Тайм-ауты, бюджет времени цикла и дублирующие запросы к API.
+
+Запрос к API ограничен отдельными тайм-аутами на соединение и на чтение.
+Тайм-аут чтения подстраивается под наблюдаемые задержки: это p99 последних
+LATENCY_WINDOW запросов, умноженный на TIMEOUT_MULTIPLIER, в пределах
+от API_READ_TIMEOUT_MIN до API_READ_TIMEOUT. Запрос, прерванный по
+тайм-ауту, тоже попадает в окно - с задержкой, равной тайм-ауту, - поэтому
+после резкого роста задержек тайм-аут растёт следом, а не обрывает все
+запросы.
+
+Цикл опроса main() выполняется внутри with Deadline(CYCLE_BUDGET): запрос
+к API и отправка сообщений делят один бюджет, и ни один из них не ждёт
+дольше, чем от него осталось.
+
+С HEDGE_REQUESTS=1 запрос, не получивший ответа за p95 задержки,
+дублируется, и используется ответ, пришедший первым.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import exceptions
+import metrics
+
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 3.05))
+# Верхняя и нижняя граница тайм-аута чтения
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 10))
+API_READ_TIMEOUT_MIN = float(os.getenv('API_READ_TIMEOUT_MIN', 1))
+# Бюджет одного цикла main(): запрос к API и отправка сообщений
+CYCLE_BUDGET = float(os.getenv('CYCLE_BUDGET', 60))
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', '0') == '1'
+HEDGE_PERCENTILE = 95
+# Число последних задержек, по которым считаются перцентили
+LATENCY_WINDOW = 256
+# До этого числа наблюдений используются тайм-ауты по умолчанию
+MIN_SAMPLES = 20
+TIMEOUT_MULTIPLIER = 3
+# Потоки дублирующих запросов: на каждый опрос poller.py «в полёте» -
+# основной запрос и его дубль (потоки создаются по мере надобности)
+HEDGE_WORKERS = int(os.getenv(
+    'HEDGE_WORKERS', 2 * int(os.getenv('MAX_IN_FLIGHT', 32))
+))
+
+_current = contextvars.ContextVar('deadline', default=None)
+_executor = None
+_lock = threading.Lock()
+
+
+class Deadline:
+    """Бюджет времени: сколько секунд осталось до крайнего срока.
+
+    В блоке with бюджет становится текущим (current()) для кода,
+    выполняющегося в том же потоке.
+    """
+
+    def __init__(self, budget, clock=time.monotonic):
+        self.budget = budget
+        self._clock = clock
+        self.expires_at = clock() + budget
+        self._token = None
+
+    def remaining(self) -> float:
+        """Секунд до крайнего срока; не меньше нуля."""
+        return max(0.0, self.expires_at - self._clock())
+
+    def timeout(self, limit=None) -> float:
+        """Тайм-аут операции: остаток бюджета, но не больше limit.
+
+        Выбрасывает DeadlineExceeded, если бюджет исчерпан.
+        """
+        remaining = self.remaining()
+        if not remaining:
+            raise exceptions.DeadlineExceeded(self.budget)
+        return remaining if limit is None else min(limit, remaining)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+
+def current():
+    """Текущий бюджет времени или None вне with Deadline(...)."""
+    return _current.get()
+
+
+class LatencyTracker:
+    """Скользящее окно задержек запросов и тайм-ауты по их перцентилям."""
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Учитывает задержку одного ответа."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent):
+        """Перцентиль задержки; None, пока наблюдений меньше min_samples."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        index = min(len(samples) - 1, len(samples) * percent // 100)
+        return samples[index]
+
+    def read_timeout(self) -> float:
+        """Тайм-аут чтения по p99 в пределах допустимых границ."""
+        p99 = self.percentile(99)
+        if p99 is None:
+            return API_READ_TIMEOUT
+        return min(
+            API_READ_TIMEOUT,
+            max(API_READ_TIMEOUT_MIN, p99 * TIMEOUT_MULTIPLIER)
+        )
+
+    def hedge_delay(self):
+        """Через сколько секунд дублировать запрос; None - не дублировать."""
+        return self.percentile(HEDGE_PERCENTILE)
+
+
+# Задержки ответов API в этом процессе
+LATENCY = LatencyTracker()
+
+
+def request_timeout(tracker=LATENCY, deadline=None):
+    """Пара (соединение, чтение) для requests с учётом бюджета."""
+    deadline = deadline or current()
+    read = tracker.read_timeout()
+    if deadline is None:
+        return API_CONNECT_TIMEOUT, read
+    return deadline.timeout(API_CONNECT_TIMEOUT), deadline.timeout(read)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=HEDGE_WORKERS, thread_name_prefix='hedge'
+                )
+    return _executor
+
+
+def _discard(future):
+    """Закрывает ответ проигравшего запроса, чтобы вернуть соединение."""
+    if not future.cancelled() and future.exception() is None:
+        close = getattr(future.result(), 'close', None)
+        if close is not None:
+            close()
+
+
+def hedged(call, delay, executor=None):
+    """Результат call(); если за delay секунд его нет - ещё один call().
+
+    delay отсчитывается с начала выполнения call(), а не с постановки в
+    пул: ожидание свободного потока не порождает лишних дублей.
+    Возвращает первый успешный результат. Если оба вызова завершились
+    ошибкой, выбрасывает ошибку первого. Только для идемпотентных
+    запросов.
+    """
+    if delay is None:
+        return call()
+    executor = executor or _get_executor()
+    started = threading.Event()
+
+    def primary_call():
+        started.set()
+        return call()
+
+    primary = executor.submit(primary_call)
+    started.wait()
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    metrics.API_HEDGED.inc()
+    hedge = executor.submit(call)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.add_done_callback(_discard)
+                return future.result()
+    return primary.result()
@@ -0,0 +1,268 @@
+"""Трассировка циклов опроса в локальный файл JSONL.
+
+Каждый цикл опроса студента - трасса (trace), а его этапы - вложенные
+интервалы (span): get_api_answer, check_response, parse_status,
+send_message и пауза до следующего цикла. У интервала есть атрибуты,
+например http_status, body_size и homeworks.
+
+В poller.py сообщения отправляет очередь send_queue.py в своём потоке:
+интервал send_message открывается в трассе цикла, поставившего сообщение
+(attach()), и может закончиться позже самой трассы. Паузы sleep у циклов
+poller.py нет - следующий опрос студента планируется, а не ожидается.
+
+Трассируется доля TRACE_SAMPLE_RATE циклов (0 - трассировка выключена).
+Завершённые интервалы кладутся в ограниченный буфер без ожидания, а
+фоновый поток дописывает их в TRACE_FILE; при переполнении буфера
+интервалы отбрасываются, и цикл опроса никогда не ждёт диска.
+
+Сводка по самым медленным этапам:
+
+    python tracing.py traces.jsonl --top 10
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0))
+# Сколько интервалов ждёт записи; остальные отбрасываются
+TRACE_BUFFER_SIZE = 10000
+
+_current = contextvars.ContextVar('span', default=None)
+
+
+class Span:
+    """Интервал трассы: этап цикла с длительностью и атрибутами."""
+
+    __slots__ = (
+        'trace_id', 'span_id', 'parent_id', 'name', 'start', 'duration',
+        'attributes', '_started'
+    )
+
+    def __init__(self, trace_id, parent_id, name, attributes):
+        self.trace_id = trace_id
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration = None
+        self.attributes = attributes
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        """Добавляет атрибуты интервала."""
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+        }
+
+
+class NoopSpan:
+    """Интервал цикла, который не попал в выборку."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class JsonlExporter:
+    """Дописывает интервалы в файл JSONL из фонового потока."""
+
+    def __init__(self, path=TRACE_FILE, buffer_size=TRACE_BUFFER_SIZE):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        """Кладёт интервал в буфер; при переполнении отбрасывает его."""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Ждёт записи всех интервалов из буфера."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write_loop, name='tracing', daemon=True
+                )
+                self._thread.start()
+                # при выходе дописываются интервалы, оставшиеся в буфере
+                atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.writelines(
+                        json.dumps(span.to_dict(), ensure_ascii=False) + '\n'
+                        for span in batch
+                    )
+            except Exception:
+                # поток записи не должен умирать: иначе flush() при
+                # выходе ждёт буфер, который никто не разбирает
+                self.dropped += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class Tracer:
+    """Создаёт трассы циклов и интервалы этапов."""
+
+    def __init__(self, exporter=None, sample_rate=TRACE_SAMPLE_RATE,
+                 rng=random.random):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._rng = rng
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Трасса одного цикла; в выборку попадает доля sample_rate."""
+        if not self.sample_rate or self._rng() >= self.sample_rate:
+            # внутренние интервалы тоже не записываются
+            token = _current.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current.reset(token)
+            return
+        if self.exporter is None:
+            self.exporter = JsonlExporter()
+        trace_id = f'{random.getrandbits(128):032x}'
+        with self._span(trace_id, None, name, attributes) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Интервал этапа внутри текущей трассы."""
+        parent = _current.get()
+        if parent is None or parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+        with self._span(
+            parent.trace_id, parent.span_id, name, attributes
+        ) as span:
+            yield span
+
+    @contextmanager
+    def _span(self, trace_id, parent_id, name, attributes):
+        span = Span(trace_id, parent_id, name, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.set(error=type(error).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            span.finish()
+            self.exporter.export(span)
+
+
+TRACER = Tracer()
+trace = TRACER.trace
+span = TRACER.span
+
+
+def current():
+    """Текущий интервал: Span, NOOP_SPAN вне выборки или None вне трассы."""
+    return _current.get()
+
+
+@contextmanager
+def attach(parent):
+    """Делает parent текущим интервалом, например в другом потоке.
+
+    Интервалы, открытые внутри блока, вкладываются в parent - трассу,
+    в которой была поставлена отложенная работа.
+    """
+    token = _current.set(parent)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def summarize(lines) -> list:
+    """Сводка по этапам: (имя, число, p50, p95, максимум, сумма) в мс."""
+    # нужен только утилите сводки, а не боту
+    import statistics
+
+    durations = defaultdict(list)
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            durations[record['name']].append(record['duration_ms'])
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append((
+            name, len(values), statistics.median(values),
+            values[min(len(values) - 1, len(values) * 95 // 100)],
+            values[-1], sum(values)
+        ))
+    return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Самые медленные этапы циклов опроса по файлу трасс'
+    )
+    parser.add_argument('path', nargs='?', default=TRACE_FILE)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+    with open(args.path, encoding='utf-8') as file:
+        rows = summarize(file)
+    print(
+        f'{"stage":<20} {"count":>7} {"p50 ms":>10} {"p95 ms":>10} '
+        f'{"max ms":>10} {"total ms":>12}'
+    )
+    for name, count, p50, p95, maximum, total in rows[:args.top]:
+        print(
+            f'{name:<20} {count:>7} {p50:>10.2f} {p95:>10.2f} '
+            f'{maximum:>10.2f} {total:>12.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
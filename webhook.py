@@ -0,0 +1,136 @@
+"""Приём уведомлений о смене статуса домашней работы (push).
+
+Локальный HTTP-приёмник принимает запросы
+    POST /push/<id студента>
+с телом в формате записей homework_statuses: одна работа, список работ
+или объект {"homeworks": [...]}. Работы проверяются по схеме schema.py
+и сразу передаются в on_push(tenant_id, homeworks) - дальше они идут тем
+же путём, что и ответ API: parse_status() и отправка в Telegram.
+
+Опрос API при этом не отключается, а только замедляется до
+WEBHOOK_POLL_INTERVAL: он сверяет статусы на случай потерянного
+уведомления.
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import schema
+
+# 0 - приёмник выключен
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 0))
+WEBHOOK_ADDRESS = os.getenv('WEBHOOK_ADDRESS', '127.0.0.1')
+# Значение заголовка X-Webhook-Secret; без него приёмник не запускается
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+# Интервал сверочного опроса API, пока работает приёмник
+WEBHOOK_POLL_INTERVAL = int(os.getenv('WEBHOOK_POLL_INTERVAL', 3600))
+PUSH_PATH = '/push/'
+MAX_BODY_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def parse_push(body) -> list:
+    """Проверяет тело уведомления и возвращает записи schema.Homework."""
+    data = json.loads(body)
+    if type(data) is dict:
+        data = data['homeworks'] if 'homeworks' in data else [data]
+    if type(data) is not list:
+        raise TypeError(
+            f'Ожидалась работа или список работ, получен {type(data).__name__}'
+        )
+    validate = schema.validate_homework
+    return [validate(item, index) for index, item in enumerate(data)]
+
+
+class PushHandler(BaseHTTPRequestHandler):
+    """Обработчик POST /push/<id студента>.
+
+    on_push и secret задаются в подклассе, который создаёт
+    start_receiver().
+    """
+
+    on_push = None
+    secret = ''
+
+    def reply(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_push(self):
+        """Id студента и работы из запроса; при ошибке - ответ и None."""
+        path = self.path.split('?')[0]
+        tenant_id = path[len(PUSH_PATH):]
+        if not path.startswith(PUSH_PATH) or not tenant_id:
+            return self.reply(404, {'error': 'not_found'})
+        if not self.secret or not hmac.compare_digest(
+            self.headers.get('X-Webhook-Secret', ''), self.secret
+        ):
+            return self.reply(403, {'error': 'forbidden'})
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self.reply(400, {'error': 'bad_content_length'})
+        if length > MAX_BODY_SIZE:
+            return self.reply(413, {'error': 'too_large'})
+        try:
+            return tenant_id, parse_push(self.rfile.read(length))
+        except (TypeError, KeyError, ValueError) as error:
+            logger.warning('Неверное уведомление: %s', error)
+            return self.reply(400, {'error': str(error)})
+
+    def do_POST(self):
+        push = self.read_push()
+        if push is None:
+            return
+        tenant_id, homeworks = push
+        try:
+            sent = self.on_push(tenant_id, homeworks)
+        except KeyError:
+            self.reply(404, {'error': 'unknown_tenant'})
+        except Exception as error:
+            logger.error(
+                'Студент %s: сбой обработки уведомления: %s',
+                tenant_id, error, exc_info=True
+            )
+            self.reply(500, {'error': 'internal_error'})
+        else:
+            self.reply(202, {'sent': sent})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_receiver(on_push, port=WEBHOOK_PORT, address=WEBHOOK_ADDRESS,
+                   secret=WEBHOOK_SECRET):
+    """Запускает приёмник уведомлений в фоновом потоке.
+
+    on_push(tenant_id, homeworks) возвращает число отправленных
+    сообщений и выбрасывает KeyError для неизвестного студента. Без
+    secret приёмник не запускается: выбрасывается ValueError.
+    """
+    if not secret:
+        message = (
+            'Приёмник уведомлений не запущен: не задан WEBHOOK_SECRET.'
+        )
+        logger.critical(message)
+        raise ValueError(message)
+    handler = type('PushHandler', (PushHandler,), {
+        'on_push': staticmethod(on_push), 'secret': secret
+    })
+    server = ThreadingHTTPServer((address, port), handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='webhook', daemon=True
+    ).start()
+    logger.info('Приём уведомлений на %s:%s', *server.server_address[:2])
+    return server